@@ -2,63 +2,29 @@
 Lab 3: Netmiko config changes driven by external files.
 - Devices loaded from CSV (default: data/lab3-devices.csv)
 - Show commands loaded from JSON (default: data/show-commands.json) with selectable flags
-- R51 config loaded from JSON (default: data/lab3-config.json -> r51_config list)
-- R52 config loaded from file path (default: data/lab3-r52_eigrp.cfg)
+- Per-device config from JSON (default: data/lab3-config.json): device_configs by hostname/IP,
+  R51 lines (r51_config, first CSV row), R52 file (r52_config_file, second row), else default_config
+- Config is pushed to the --push-config-targets in waves: a canary, then percentages of the rest
+- Running-config snapshots (runs/snapshots.db) are invalidated for every device pushed to
 """
 
 import argparse
-import csv
 import json
 from pathlib import Path
-from typing import List, Dict, Any
-from netmiko import ConnectHandler
+from typing import Dict, Any, List, Optional, Tuple
+from tools.connect_utils import open_connection
+from tools.inventory_utils import Device, read_inventory
+from tools.metrics_utils import add_metrics_args, open_metrics
+from tools.parse_utils import OutputParser, add_parse_args, parse_outputs
+from tools.push_utils import Rollout, add_push_args, config_for, push_config, push_missing
+from tools.runner_utils import add_runner_args, run_devices
+from tools.snapshot_utils import add_snapshot_args, open_snapshots
+from tools.timeout_utils import add_timeout_args, open_timeouts
 
 ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_DEVICES_CSV = ROOT / "data" / "lab3-devices.csv"
 DEFAULT_COMMANDS_JSON = ROOT / "data" / "show-commands.json"
 DEFAULT_CONFIG_JSON = ROOT / "data" / "lab3-config.json"
-DEFAULT_DEVICE_TYPE = "cisco_ios"
-DEFAULT_HOSTNAMES = ["C8K-R51", "C8K-R52"]
-
-
-def load_devices(csv_path: Path) -> List[Dict[str, Any]]:
-    devices: List[Dict[str, Any]] = []
-    try:
-        with csv_path.open(newline="", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            if reader.fieldnames:
-                for row in reader:
-                    ip = (row.get("ip") or row.get("device_ips") or "").strip()
-                    if not ip:
-                        continue
-                    hostname = (row.get("hostname") or "").strip()
-                    device_type = (row.get("device_type") or DEFAULT_DEVICE_TYPE).strip()
-                    devices.append({
-                        "hostname": hostname,
-                        "ip": ip,
-                        "device_type": device_type or DEFAULT_DEVICE_TYPE,
-                    })
-            if not devices:
-                f.seek(0)
-                reader2 = csv.reader(f)
-                for idx, row in enumerate(reader2):
-                    if not row:
-                        continue
-                    val = row[0].strip()
-                    if idx == 0 and val.lower() in ("device_ips", "ip"):
-                        continue
-                    if val:
-                        hostname = DEFAULT_HOSTNAMES[idx] if idx < len(DEFAULT_HOSTNAMES) else f"device{idx+1}"
-                        devices.append({
-                            "hostname": hostname,
-                            "ip": val,
-                            "device_type": DEFAULT_DEVICE_TYPE,
-                        })
-    except FileNotFoundError:
-        print(f"CSV not found at {csv_path}. Provide a valid path with --devices-csv.")
-    except Exception as exc:
-        print(f"Error reading CSV {csv_path}: {exc}")
-    return devices
 
 
 def load_commands(commands_path: Path) -> Dict[str, str]:
@@ -87,6 +53,11 @@ def load_lab3_config(config_path: Path) -> Dict[str, Any]:
             "network 10.0.0.0 0.0.0.255",
         ],
         "r52_config_file": str(ROOT / "data" / "lab3-r52_eigrp.cfg"),
+        "device_configs": {},
+        "default_config": [
+            "router eigrp 100",
+            "network 10.0.0.0 0.0.0.255",
+        ],
     }
     try:
         data = json.loads(config_path.read_text(encoding="utf-8"))
@@ -113,11 +84,17 @@ def main():
     parser.add_argument("--show-eigrp-interfaces", action="store_true", help="Run show ip eigrp interfaces")
     parser.add_argument("--show-eigrp-neighbors", action="store_true", help="Run show ip eigrp neighbors")
     parser.add_argument("--show-eigrp-topology", action="store_true", help="Run show ip eigrp topology")
+    add_runner_args(parser)
+    add_push_args(parser)
+    add_snapshot_args(parser)
+    add_parse_args(parser)
+    add_metrics_args(parser)
+    add_timeout_args(parser)
     args = parser.parse_args()
 
-    devices = load_devices(Path(args.devices_csv))
-    if len(devices) < 2:
-        print("Need at least two device entries; check the CSV.")
+    devices = read_inventory(Path(args.devices_csv), "--devices-csv")
+    if not devices:
+        print("No device entries loaded; check the CSV.")
         return
 
     commands_map = load_commands(Path(args.commands_json))
@@ -135,78 +112,105 @@ def main():
     if args.show_eigrp_topology:
         selected_keys.append("show_eigrp_topology")
     selected_cmds = [commands_map[k] for k in selected_keys if k in commands_map]
+    output_parser = OutputParser() if args.parse else None
+    metrics = open_metrics(args)
+    timeouts = open_timeouts(args)
 
     lab3_cfg = load_lab3_config(Path(args.lab3_config_json))
-    r51_config = lab3_cfg.get("r51_config") or []
-    r52_cfg_file = args.r52_config or lab3_cfg.get("r52_config_file")
+    if args.r52_config:
+        lab3_cfg["r52_config_file"] = str(Path(args.r52_config).resolve())
 
     push_enabled = args.push_config
-    push_targets = {t.strip().lower() for t in (args.push_config_targets or "").split(",") if t.strip()} if args.push_config_targets else set()
+    # Resolve hostnames/IPs through the inventory index once, then match on device index
+    push_targets = set()
+    for target in (args.push_config_targets or "").split(","):
+        target = target.strip()
+        if not target or target.lower() in ("all", "none"):
+            continue
+        device = devices.find(target)
+        if device is None:
+            print(f"Push target '{target}' is not in the devices CSV; ignoring it.")
+        else:
+            push_targets.add(device.index)
     push_all = push_enabled and args.push_config_targets.strip().lower() == "all"
-    push_none = (not push_enabled) or args.push_config_targets.strip().lower() == "none" or not push_targets
+    push_none = (not push_enabled) or args.push_config_targets.strip().lower() == "none" or (not push_targets and not push_all)
+    targets = [] if push_none else [d for d in devices if push_all or d.index in push_targets]
+
+    def conn_for(device: Device) -> Dict[str, Any]:
+        return {
+            "device_type": device.device_type,
+            "host": device.ip,
+            "port": device.port,
+            "username": args.username,
+            "password": args.password,
+        }
 
-    if not r51_config:
-        print("No R51 config provided; nothing to push to R51.")
-    if not r52_cfg_file:
-        print("No R52 config file provided; skipping R52 config push.")
+    # Running-config snapshots; every push below drops the pushed device's snapshot
+    snapshots = open_snapshots(args) if targets else None
+
+    def push(device: Device) -> Optional[str]:
+        source = config_for(device, lab3_cfg, ROOT)
+        if source is None:
+            raise ValueError(f"No config for {device.name} in {args.lab3_config_json}")
+        with open_connection(conn_for(device)) as net_connect:
+            if args.skip_unchanged:
+                # Only the lines the running-config lacks; None if there are none
+                return push_missing(net_connect, device, source, snapshots)
+            try:
+                return push_config(net_connect, source)
+            finally:
+                if snapshots is not None:
+                    snapshots.invalidate(device)
 
     # ----------------------------------------------
-    # Connect to Router 51 without 'with' statement
+    # Push config in waves: canary first, then the rest
     # ----------------------------------------------
-    r51 = devices[0]
-    r51_name = r51.get("hostname") or r51["ip"]
-    print(f"\n===== Connecting to {r51_name} ({r51['ip']}) =====")
-    r51_conn = {
-        "device_type": r51.get("device_type") or DEFAULT_DEVICE_TYPE,
-        "host": r51["ip"],
-        "username": args.username,
-        "password": args.password,
-    }
-    net_connect = ConnectHandler(**r51_conn)
-    should_push_r51 = push_enabled and (push_all or (not push_none and (r51_name.lower() in push_targets or r51["ip"].lower() in push_targets)))
-    if should_push_r51 and r51_config:
-        output = net_connect.send_config_set(r51_config)
-        print("\n>>> Sending config to R51...")
-        print(output)
-    elif should_push_r51:
-        print("Push-config requested but no R51 config provided.")
-    if selected_cmds:
-        for cmd in selected_cmds:
-            output = net_connect.send_command(cmd)
-            print(f"\n{r51_name} - {cmd}\n{output}\n")
-    net_connect.disconnect()
+    if targets:
+        rollout = Rollout(targets, args.canary, args.waves, args.max_failures)
+        current_wave = 0
+        for wave, result in rollout.run(push, workers=args.workers, timeout=args.device_timeout):
+            if wave != current_wave:
+                current_wave = wave
+                print(f"\n##### {rollout.label(wave)} #####")
+            device = result["device"]
+            print(f"\n===== Pushing config to {device.name} ({device.ip}) =====")
+            if result["ok"] and result["output"] is None:
+                print("Already in the desired state; nothing pushed.")
+            elif result["ok"]:
+                print(result["output"])
+            else:
+                print(f"Error on {device.name} ({device.ip}): {result['error']}")
+        print(f"\n>>> Config push: {rollout.summary()}")
+        if snapshots is not None and args.skip_unchanged:
+            print(f">>> Running-config: {snapshots.fetches} fetched, {snapshots.reused} reused from {args.snapshot_db}")
+    elif push_enabled:
+        print("Push-config requested but no push targets selected.")
 
     # ----------------------------------------------
-    # Connect to Router 52 using 'with' statement
+    # Show commands on every device, in parallel
     # ----------------------------------------------
-    if len(devices) >= 2 and r52_cfg_file:
-        r52 = devices[1]
-        r52_name = r52.get("hostname") or r52["ip"]
-        print(f"\n===== Connecting to {r52_name} ({r52['ip']}) =====")
-        r52_conn = {
-            "device_type": r52.get("device_type") or DEFAULT_DEVICE_TYPE,
-            "host": r52["ip"],
-            "username": args.username,
-            "password": args.password,
-        }
-        cfg_path = Path(r52_cfg_file)
-        should_push_r52 = push_enabled and (push_all or (not push_none and (r52_name.lower() in push_targets or r52["ip"].lower() in push_targets)))
-        if should_push_r52 and not cfg_path.exists():
-            print(f"Config file not found: {cfg_path}")
-            return
-        with ConnectHandler(**r52_conn) as net_connect:
-            if should_push_r52 and cfg_path.exists():
-                output = net_connect.send_config_from_file(str(cfg_path))
-                print("\n>>> Sending config to R52 (from file)...")
-                print(output)
-            elif should_push_r52:
-                print("Push-config requested but no R52 config file provided.")
-            if selected_cmds:
-                for cmd in selected_cmds:
-                    output = net_connect.send_command(cmd)
-                    print(f"\n{r52_name} - {cmd}\n{output}\n")
-    else:
-        print("Skipping R52: missing device entry or config file.")
+    def collect(device: Device) -> List[Tuple[str, str]]:
+        with open_connection(conn_for(device)) as net_connect:
+            outputs = [(cmd, net_connect.send_command(cmd)) for cmd in selected_cmds]
+        return parse_outputs(output_parser, device.device_type, outputs)
+
+    if selected_cmds:
+        for result in run_devices(devices, collect, workers=args.workers, timeout=args.device_timeout):
+            device = result["device"]
+            print(f"\n===== Connecting to {device.name} ({device.ip}) =====")
+            if not result["ok"]:
+                print(f"Error on {device.name} ({device.ip}): {result['error']}")
+                continue
+            for cmd, output in result["output"]:
+                print(f"\n{device.name} - {cmd}\n{output}\n")
+    if output_parser is not None:
+        output_parser.close()
+    if snapshots is not None:
+        snapshots.close()
+    if metrics is not None:
+        metrics.close()
+    if timeouts is not None:
+        timeouts.close()
 
 
 if __name__ == "__main__":
@@ -6,57 +6,24 @@ Lab 4: Netmiko using a single for loop.
 """
 
 import argparse
-import csv
 import json
 from pathlib import Path
-from typing import List, Dict, Any
-from netmiko import ConnectHandler
+from typing import List, Dict, Tuple
+from tools.command_utils import add_command_args, command_outputs, run_command_batch
+from tools.connect_utils import add_driver_args, open_connection, set_driver
+from tools.diff_utils import add_diff_args, open_tracker, report_outputs
+from tools.events_utils import open_events, record, tracked
+from tools.inventory_utils import Device, add_device_filter_args, count_devices, only_devices, stream_inventory
+from tools.metrics_utils import add_metrics_args, open_metrics
+from tools.parse_utils import OutputParser, add_parse_args
+from tools.reachability_utils import add_precheck_args, apply_precheck, print_unreachable
+from tools.results_utils import add_results_args, open_results
+from tools.runner_utils import add_runner_args, run_devices
+from tools.timeout_utils import add_timeout_args, open_timeouts
 
 ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_CSV = ROOT / "data" / "lab4-devices.csv"
 DEFAULT_COMMANDS_JSON = ROOT / "data" / "show-commands.json"
-DEFAULT_DEVICE_TYPE = "cisco_ios"
-DEFAULT_HOSTNAMES = ["C8K-R51", "C8K-R52"]
-
-
-def load_devices(csv_path: Path) -> List[Dict[str, Any]]:
-    devices: List[Dict[str, Any]] = []
-    try:
-        with csv_path.open(newline="", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            if reader.fieldnames:
-                for row in reader:
-                    ip = (row.get("ip") or row.get("device_ips") or "").strip()
-                    if not ip:
-                        continue
-                    hostname = (row.get("hostname") or "").strip()
-                    device_type = (row.get("device_type") or DEFAULT_DEVICE_TYPE).strip()
-                    devices.append({
-                        "hostname": hostname,
-                        "ip": ip,
-                        "device_type": device_type or DEFAULT_DEVICE_TYPE,
-                    })
-            if not devices:
-                f.seek(0)
-                reader2 = csv.reader(f)
-                for idx, row in enumerate(reader2):
-                    if not row:
-                        continue
-                    val = row[0].strip()
-                    if idx == 0 and val.lower() in ("device_ips", "ip"):
-                        continue
-                    if val:
-                        hostname = DEFAULT_HOSTNAMES[idx] if idx < len(DEFAULT_HOSTNAMES) else f"device{idx+1}"
-                        devices.append({
-                            "hostname": hostname,
-                            "ip": val,
-                            "device_type": DEFAULT_DEVICE_TYPE,
-                        })
-    except FileNotFoundError:
-        print(f"CSV not found at {csv_path}. Provide a valid path with --csv-path.")
-    except Exception as exc:
-        print(f"Error reading CSV {csv_path}: {exc}")
-    return devices
 
 
 def load_commands(commands_path: Path) -> Dict[str, str]:
@@ -90,12 +57,25 @@ def main():
     parser.add_argument("--show-eigrp-interfaces", action="store_true", help="Run show ip eigrp interfaces")
     parser.add_argument("--show-eigrp-neighbors", action="store_true", help="Run show ip eigrp neighbors")
     parser.add_argument("--show-eigrp-topology", action="store_true", help="Run show ip eigrp topology")
+    add_runner_args(parser)
+    add_device_filter_args(parser)
+    add_driver_args(parser)
+    add_precheck_args(parser)
+    add_command_args(parser)
+    add_parse_args(parser)
+    add_results_args(parser)
+    add_diff_args(parser)
+    add_metrics_args(parser)
+    add_timeout_args(parser)
     args = parser.parse_args()
+    set_driver(args.driver)
 
-    devices = load_devices(Path(args.csv_path))
-    if not devices:
+    # Devices stream in from the CSV; the first ones connect while the rest are still being read
+    devices = stream_inventory(Path(args.csv_path))
+    if devices is None:
         print("No device entries loaded; nothing to do.")
         return
+    devices = only_devices(devices, args.only_devices)
 
     commands_map = load_commands(Path(args.commands_json))
     selected_keys = []
@@ -116,21 +96,66 @@ def main():
         return
 
     selected_cmds = [commands_map[k] for k in selected_keys if k in commands_map]
+    output_parser = OutputParser() if args.parse else None
+    store = open_results(args, "Lab 4")
+    tracker = open_tracker(args)
+    events = open_events("Lab 4", lambda: count_devices(Path(args.csv_path), args.only_devices))
+    metrics = open_metrics(args)
+    timeouts = open_timeouts(args)
 
-    # Single for loop with context manager
-    for device in devices:
-        name = device.get("hostname") or device["ip"]
-        print(f"\n===== Connecting to {name} ({device['ip']}) =====")
+    def collect(device: Device) -> List[Tuple[str, str]]:
         conn = {
-            "device_type": device.get("device_type") or DEFAULT_DEVICE_TYPE,
-            "host": device["ip"],
+            "device_type": device.device_type,
+            "host": device.ip,
+            "port": device.port,
             "username": args.username,
             "password": args.password,
         }
-        with ConnectHandler(**conn) as net_connect:
-            for cmd in selected_cmds:
-                output = net_connect.send_command(cmd)
-                print(f"\n{name} - {cmd}\n{output}\n")
+        outputs = []
+        with open_connection(conn) as net_connect:
+            if args.batch_commands:
+                # One pipelined exchange instead of a round trip per command
+                outputs = command_outputs(run_command_batch(net_connect, selected_cmds))
+            else:
+                for cmd in selected_cmds:
+                    outputs.append((cmd, net_connect.send_command(cmd)))
+        if store is not None:
+            store.add_outputs(device, outputs)
+        # Compared and parsed after the session is released (no-ops without --changes-only/--parse)
+        return report_outputs(tracker, output_parser, device, outputs)
+
+    # Single for loop with context manager; devices run in parallel, output stays in CSV order
+    unreachable = []
+    devices = apply_precheck(devices, args, unreachable)
+    for result in run_devices(devices, tracked(collect), workers=args.workers, timeout=args.device_timeout):
+        record(result)
+        device = result["device"]
+        if tracker is not None and result["ok"] and not result["output"]:
+            continue  # nothing changed on this device
+        name = device.name
+        print(f"\n===== Connecting to {name} ({device.ip}) =====")
+        if not result["ok"]:
+            print(f"Error on {name} ({device.ip}): {result['error']}")
+            if store is not None:
+                store.add(device, None, error=result["error"], elapsed=result["elapsed"])
+            continue
+        for cmd, output in result["output"]:
+            print(f"\n{name} - {cmd}\n{output}\n")
+
+    print_unreachable(unreachable)
+    if tracker is not None:
+        tracker.close()
+        print(f"\n{tracker.summary()}")
+    if store is not None:
+        store.close()
+    if output_parser is not None:
+        output_parser.close()
+    if metrics is not None:
+        metrics.close()
+    if timeouts is not None:
+        timeouts.close()
+    if events is not None:
+        events.close()
 
 
 if __name__ == "__main__":
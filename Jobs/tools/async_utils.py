@@ -0,0 +1,285 @@
+"""
+Asyncio SSH driver (asyncssh) for high-concurrency collection (--driver asyncssh).
+- AsyncIOSSession: one interactive IOS-style shell per device as coroutines
+  (send_command, send_config_set, find_prompt); no thread per session
+- AsyncConnectHandler: the ConnectHandler methods the labs use, run on one
+  shared event-loop thread, so open_connection() can hand it to any lab
+- collect(): fan-out of thousands of sessions on a single event loop, with
+  results shaped like run_devices() (index, device, ok, output, error, elapsed)
+"""
+
+import asyncio
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_CONNECT_TIMEOUT = 30.0
+DEFAULT_CONCURRENCY = 1000
+_PROMPT_TAIL = 512
+_ANY_PROMPT = re.compile(r"([^\r\n]+?)(?:\([^)\r\n]*\))?[>#]\s*$")
+
+
+class AsyncIOSSession:
+    """Interactive shell to a Cisco IOS-style device over asyncssh."""
+
+    def __init__(self, conn: Dict[str, Any], read_timeout: float = DEFAULT_READ_TIMEOUT):
+        self.conn = conn
+        self.read_timeout = read_timeout
+        self.base_prompt = ""
+        self._ssh: Any = None
+        self._writer: Any = None
+        self._pump: Optional["asyncio.Task[None]"] = None
+        self._chunks: List[str] = []
+        self._arrived: Optional[asyncio.Event] = None
+        self._eof = False
+        self._prompt: Optional["re.Pattern[str]"] = None
+
+    async def connect(self) -> "AsyncIOSSession":
+        import asyncssh
+
+        self._ssh = await asyncio.wait_for(
+            asyncssh.connect(
+                self.conn["host"],
+                port=self.conn.get("port") or 22,
+                username=self.conn.get("username"),
+                password=self.conn.get("password"),
+                known_hosts=None,
+                client_keys=None,
+                agent_path=None,
+            ),
+            self.conn.get("conn_timeout") or DEFAULT_CONNECT_TIMEOUT,
+        )
+        self._writer, reader, _ = await self._ssh.open_session(term_type="vt100", term_size=(511, 24))
+        self._arrived = asyncio.Event()
+        self._pump = asyncio.ensure_future(self._read_forever(reader))
+        await self.find_prompt()
+        for command in ("terminal length 0", "terminal width 511"):
+            await self.send_command(command)
+        return self
+
+    async def _read_forever(self, reader: Any) -> None:
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                self._chunks.append(data)
+                self._arrived.set()
+        except Exception:
+            pass  # a dropped connection reads as end of session
+        finally:
+            self._eof = True
+            self._arrived.set()
+
+    def take(self) -> str:
+        """Everything received and not read yet (Netmiko's read_channel)."""
+        text = "".join(self._chunks)
+        self._chunks.clear()
+        self._arrived.clear()
+        return text
+
+    def write(self, data: str) -> None:
+        self._writer.write(data)
+
+    async def _read_until_prompt(
+        self, pattern: "re.Pattern[str]", timeout: float, echo: Optional[str] = None
+    ) -> Tuple[str, int, "re.Match[str]"]:
+        """
+        Read until `pattern` matches at the end of what arrived after `echo` (the
+        command as echoed back), so a prompt left over from earlier output cannot
+        end the read early. Returns (text, end of echo, prompt match).
+        """
+        text = ""
+        start = None if echo else 0
+        deadline = time.monotonic() + timeout
+        while True:
+            text += self.take()
+            if start is None:
+                at = text.find(echo)
+                start = at + len(echo) if at >= 0 else None
+            if start is not None:
+                # Only the tail can hold the final prompt; big outputs are not rescanned
+                match = pattern.search(text, max(start, len(text) - _PROMPT_TAIL))
+                if match:
+                    return text, start, match
+            if self._eof:
+                raise EOFError(f"{self.conn['host']} closed the session")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"no prompt from {self.conn['host']} within {timeout:g}s")
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def find_prompt(self) -> str:
+        self.write("\n")
+        _, _, match = await self._read_until_prompt(_ANY_PROMPT, self.read_timeout)
+        self.base_prompt = match.group(1).strip()
+        self._prompt = re.compile(rf"(?:^|\n){re.escape(self.base_prompt)}(?:\([^)\r\n]*\))?[>#]\s*$")
+        return match.group(0).strip()
+
+    async def send_command(self, command: str, read_timeout: Optional[float] = None) -> str:
+        """Output of one command, without the echoed command line and trailing prompt (like Netmiko)."""
+        self.write(command + "\n")
+        text, start, match = await self._read_until_prompt(self._prompt, read_timeout or self.read_timeout, command)
+        return text[start:match.start()].replace("\r\n", "\n").replace("\r", "").strip("\n")
+
+    async def send_config_set(self, config_commands: Sequence[str], read_timeout: Optional[float] = None) -> str:
+        """Enter config mode, send every line, leave with `end`; returns the session transcript."""
+        transcript = []
+        for command in ["configure terminal", *config_commands, "end"]:
+            self.write(command + "\n")
+            text, _, match = await self._read_until_prompt(self._prompt, read_timeout or self.read_timeout, command)
+            transcript.append(text[: match.end()].replace("\r\n", "\n"))
+        return "".join(transcript)
+
+    async def close(self) -> None:
+        if self._ssh is None:
+            return
+        try:
+            self.write("exit\n")
+        except Exception:
+            pass
+        self._ssh.close()
+        if self._pump is not None:
+            self._pump.cancel()
+        self._ssh = None
+
+
+# -- ConnectHandler-style facade -----------------------------------------------------
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """The shared event loop, running in a daemon thread, started on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="asyncssh-loop", daemon=True).start()
+        return _loop
+
+
+def _run(coro: Any) -> Any:
+    return asyncio.run_coroutine_threadsafe(coro, event_loop()).result()
+
+
+async def _call(function: Any, *args: Any) -> Any:
+    return function(*args)
+
+
+class AsyncConnectHandler:
+    """
+    Drop-in for the part of Netmiko's ConnectHandler the labs use. The caller's
+    thread only waits; the SSH work for every session runs on the shared loop.
+    """
+
+    def __init__(self, **conn: Any):
+        self.host = conn.get("host")
+        self._session = AsyncIOSSession(conn, float(conn.get("read_timeout_override") or DEFAULT_READ_TIMEOUT))
+        try:
+            _run(self._session.connect())
+        except BaseException:
+            _run(self._session.close())
+            raise
+
+    @property
+    def base_prompt(self) -> str:
+        return self._session.base_prompt
+
+    def find_prompt(self) -> str:
+        return _run(self._session.find_prompt())
+
+    def send_command(self, command_string: str, read_timeout: Optional[float] = None, **kwargs: Any) -> str:
+        return _run(self._session.send_command(command_string, read_timeout))
+
+    def send_config_set(self, config_commands: Sequence[str], read_timeout: Optional[float] = None, **kwargs: Any) -> str:
+        if isinstance(config_commands, str):
+            config_commands = [config_commands]
+        return _run(self._session.send_config_set(list(config_commands), read_timeout))
+
+    def send_config_from_file(self, config_file: str, **kwargs: Any) -> str:
+        with open(config_file, encoding="utf-8") as f:
+            return self.send_config_set(f.read().splitlines(), **kwargs)
+
+    def write_channel(self, out_data: str) -> None:
+        _run(_call(self._session.write, out_data))
+
+    def read_channel(self) -> str:
+        return _run(_call(self._session.take))
+
+    def is_alive(self) -> bool:
+        return self._session._ssh is not None and not self._session._eof
+
+    def disconnect(self) -> None:
+        _run(self._session.close())
+
+    def __enter__(self) -> "AsyncConnectHandler":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.disconnect()
+
+
+# -- native fan-out ------------------------------------------------------------------
+
+
+async def _collect_one(
+    index: int,
+    device: Any,
+    conn: Dict[str, Any],
+    commands: Sequence[str],
+    limit: asyncio.Semaphore,
+    timeout: float,
+) -> Dict[str, Any]:
+    async with limit:
+        start = time.monotonic()
+        session = AsyncIOSSession(conn)
+        try:
+            async def run() -> List[Tuple[str, str]]:
+                await session.connect()
+                return [(cmd, await session.send_command(cmd)) for cmd in commands]
+
+            output = await (asyncio.wait_for(run(), timeout) if timeout else run())
+            ok, error = True, None
+        except asyncio.TimeoutError:
+            output, ok, error = None, False, f"timed out after {timeout:g}s"
+        except Exception as exc:
+            output, ok, error = None, False, str(exc) or exc.__class__.__name__
+        finally:
+            await session.close()
+        return {"index": index, "device": device, "ok": ok, "output": output, "error": error, "elapsed": time.monotonic() - start}
+
+
+async def collect(
+    devices: Iterable[Any],
+    commands: Sequence[str],
+    username: str,
+    password: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = 0,
+) -> List[Dict[str, Any]]:
+    """Run `commands` on every inventory Device, up to `concurrency` sessions at once; results in device order."""
+    limit = asyncio.Semaphore(max(1, concurrency))
+    tasks = [
+        _collect_one(
+            index,
+            device,
+            {"host": device.ip, "port": device.port, "username": username, "password": password},
+            commands,
+            limit,
+            timeout,
+        )
+        for index, device in enumerate(devices)
+    ]
+    return list(await asyncio.gather(*tasks))
+
+
+def run_collect(devices: Iterable[Any], commands: Sequence[str], username: str, password: str, **options: Any) -> List[Dict[str, Any]]:
+    """collect() from synchronous code, on its own event loop."""
+    return asyncio.run(collect(devices, commands, username, password, **options))
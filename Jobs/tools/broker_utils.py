@@ -0,0 +1,358 @@
+"""
+Local SSH session broker shared by lab runs.
+- A long-lived process keeps warm Netmiko sessions keyed by device + credentials
+- Lab scripts lease a session, run commands through it and hand it back
+- Idle sessions are evicted after --idle-timeout and probed every --keepalive seconds
+- A lease with no call for --lease-timeout seconds is reclaimed and its session
+  closed, so a lab killed while holding one (cancelled job, crash, abandoned
+  --device-timeout worker) cannot use up --max-sessions for good
+- --max-sessions caps the number of open SSH sessions; idle ones are evicted first
+
+Start it with:  python -m tools.broker_utils --port 50555   (from the Jobs folder)
+Clients find it through the NETLAB_BROKER / NETLAB_BROKER_KEY environment variables.
+"""
+
+import argparse
+import functools
+import hashlib
+import os
+import threading
+import time
+import uuid
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, List, Optional
+
+BROKER_ENV = "NETLAB_BROKER"
+BROKER_KEY_ENV = "NETLAB_BROKER_KEY"
+DEFAULT_PORT = 50555
+DEFAULT_MAX_SESSIONS = 200
+DEFAULT_IDLE_TIMEOUT = 600.0
+DEFAULT_KEEPALIVE = 30.0
+DEFAULT_LEASE_TIMEOUT = 300.0
+DEFAULT_ACQUIRE_TIMEOUT = 120.0
+
+# Connection methods a client may call on a leased session
+FORWARDED_METHODS = (
+    "send_command",
+    "send_command_timing",
+    "send_config_set",
+    "save_config",
+    "find_prompt",
+    "check_config_mode",
+    "exit_config_mode",
+    "write_channel",
+    "read_channel",
+)
+_CONFIG_METHODS = ("send_config_set", "save_config")
+
+
+def session_key(params: Dict[str, Any]) -> str:
+    secret = hashlib.sha256(str(params.get("password", "")).encode("utf-8")).hexdigest()[:16]
+    return "|".join([
+        str(params.get("device_type", "")),
+        str(params.get("host", "")),
+        str(params.get("port") or 22),
+        str(params.get("username", "")),
+        secret,
+    ])
+
+
+class _Session:
+    __slots__ = ("key", "conn", "lease", "last_used", "last_checked", "dirty", "calls")
+
+    def __init__(self, key: str, conn: Any):
+        self.key = key
+        self.conn = conn
+        self.lease: Optional[str] = None
+        self.last_used = time.monotonic()  # while leased: start/end of the last call
+        self.last_checked = self.last_used
+        self.dirty = False
+        self.calls = 0  # calls in progress; a lease is never reclaimed mid-call
+
+
+def _close(conn: Any) -> None:
+    try:
+        conn.disconnect()
+    except Exception:
+        pass
+
+
+class SessionPool:
+    """Warm Netmiko sessions held by the broker process."""
+
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        keepalive: float = DEFAULT_KEEPALIVE,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.acquire_timeout = acquire_timeout
+        self.lease_timeout = lease_timeout
+        self._cond = threading.Condition()
+        self._sessions: Dict[str, List[_Session]] = {}
+        self._leases: Dict[str, _Session] = {}
+        self._opening = 0
+        threading.Thread(target=self._maintain, name="broker-maintenance", daemon=True).start()
+
+    # -- bookkeeping (caller holds self._cond) ---------------------------------
+
+    def _count(self) -> int:
+        return self._opening + sum(len(v) for v in self._sessions.values())
+
+    def _remove(self, session: _Session) -> None:
+        sessions = self._sessions.get(session.key, [])
+        if session in sessions:
+            sessions.remove(session)
+        if not sessions:
+            self._sessions.pop(session.key, None)
+        self._cond.notify_all()
+
+    def _lease(self, session: _Session) -> str:
+        lease = uuid.uuid4().hex
+        session.lease = lease
+        session.last_used = time.monotonic()
+        self._leases[lease] = session
+        return lease
+
+    def _evict_lru_idle(self) -> Optional[_Session]:
+        idle = [s for v in self._sessions.values() for s in v if s.lease is None]
+        if not idle:
+            return None
+        victim = min(idle, key=lambda s: s.last_used)
+        self._remove(victim)
+        return victim
+
+    # -- client API --------------------------------------------------------------
+
+    def acquire(self, params: Dict[str, Any]) -> str:
+        key = session_key(params)
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            victim = None
+            with self._cond:
+                while True:
+                    idle = next((s for s in self._sessions.get(key, []) if s.lease is None), None)
+                    if idle is not None:
+                        lease = self._lease(idle)
+                        break
+                    if self._count() < self.max_sessions:
+                        self._opening += 1
+                        lease = None
+                        break
+                    victim = self._evict_lru_idle()
+                    if victim is not None:
+                        self._opening += 1
+                        lease = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RuntimeError(f"Session broker is at its limit of {self.max_sessions} sessions")
+                    self._cond.wait(remaining)
+            if victim is not None:
+                _close(victim.conn)
+            if lease is None:
+                return self._open(key, params)
+            session = self._leases[lease]
+            if session.conn.is_alive():
+                return lease
+            # Stale session (device reloaded, idle timeout on the box): drop it and try again
+            with self._cond:
+                self._leases.pop(lease, None)
+                self._remove(session)
+            _close(session.conn)
+
+    def _open(self, key: str, params: Dict[str, Any]) -> str:
+        from netmiko import ConnectHandler
+
+        try:
+            conn = ConnectHandler(**{"keepalive": int(self.keepalive), **params})
+        except Exception:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self._opening -= 1
+            session = _Session(key, conn)
+            self._sessions.setdefault(key, []).append(session)
+            return self._lease(session)
+
+    def call(self, lease: str, method: str, *args: Any, **kwargs: Any) -> Any:
+        if method not in FORWARDED_METHODS:
+            raise AttributeError(f"Method {method!r} is not available through the session broker")
+        with self._cond:
+            session = self._leases.get(lease)
+            if session is None:
+                raise RuntimeError("Unknown or expired session lease")
+            if method in _CONFIG_METHODS:
+                session.dirty = True
+            session.calls += 1
+            session.last_used = time.monotonic()
+        try:
+            return getattr(session.conn, method)(*args, **kwargs)
+        finally:
+            with self._cond:
+                session.calls -= 1
+                session.last_used = time.monotonic()
+
+    def release(self, lease: str, discard: bool = False) -> None:
+        with self._cond:
+            session = self._leases.pop(lease, None)
+        if session is None:
+            return
+        if not discard and session.dirty:
+            try:
+                if session.conn.check_config_mode():
+                    session.conn.exit_config_mode()
+                session.dirty = False
+            except Exception:
+                discard = True
+        with self._cond:
+            if discard:
+                self._remove(session)
+            else:
+                session.lease = None
+                session.last_used = time.monotonic()
+                self._cond.notify_all()
+        if discard:
+            _close(session.conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            sessions = [s for v in self._sessions.values() for s in v]
+            return {
+                "sessions": len(sessions),
+                "leased": sum(1 for s in sessions if s.lease is not None),
+                "devices": len(self._sessions),
+                "opening": self._opening,
+            }
+
+    # -- maintenance -------------------------------------------------------------
+
+    def _maintain(self) -> None:
+        interval = max(1.0, min(self.keepalive, 30.0))
+        while True:
+            time.sleep(interval)
+            now = time.monotonic()
+            expired: List[_Session] = []
+            probe: List[_Session] = []
+            with self._cond:
+                # Leases whose lab went away without releasing them
+                for lease, session in list(self._leases.items()):
+                    if session.calls == 0 and now - session.last_used >= self.lease_timeout:
+                        del self._leases[lease]
+                        session.lease = None
+                        self._remove(session)
+                        expired.append(session)
+                for session in [s for v in self._sessions.values() for s in v if s.lease is None]:
+                    if now - session.last_used >= self.idle_timeout:
+                        self._remove(session)
+                        expired.append(session)
+                    elif now - session.last_checked >= self.keepalive:
+                        session.lease = "keepalive"
+                        probe.append(session)
+            for session in expired:
+                _close(session.conn)
+            for session in probe:
+                try:
+                    alive = session.conn.is_alive()
+                except Exception:
+                    alive = False
+                with self._cond:
+                    session.lease = None
+                    session.last_checked = time.monotonic()
+                    if not alive:
+                        self._remove(session)
+                    self._cond.notify_all()
+                if not alive:
+                    _close(session.conn)
+
+
+class BrokeredConnection:
+    """ConnectHandler stand-in that runs every call on a session leased from the broker."""
+
+    def __init__(self, pool: Any, params: Dict[str, Any]):
+        self._pool = pool
+        self.host = params.get("host")
+        self._lease: Optional[str] = pool.acquire(params)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in FORWARDED_METHODS:
+            if self._lease is None:
+                raise RuntimeError("Brokered session already returned to the pool")
+            return functools.partial(self._pool.call, self._lease, name)
+        raise AttributeError(name)
+
+    def send_config_from_file(self, config_file: str, **kwargs: Any) -> str:
+        # Read the file here: the broker may not share our working directory
+        with open(config_file, encoding="utf-8") as f:
+            return self.send_config_set(f.read().splitlines(), **kwargs)
+
+    def disconnect(self, discard: bool = False) -> None:
+        if self._lease is not None:
+            lease, self._lease = self._lease, None
+            self._pool.release(lease, discard)
+
+    def __enter__(self) -> "BrokeredConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.disconnect(discard=exc_type is not None)
+
+
+class _BrokerServer(BaseManager):
+    pass
+
+
+class _BrokerClient(BaseManager):
+    pass
+
+
+_BrokerClient.register("pool")
+
+
+def connect_broker(address: str, authkey: str, wait: float = 5.0) -> Any:
+    host, port = address.rsplit(":", 1)
+    deadline = time.monotonic() + wait
+    while True:
+        manager = _BrokerClient(address=(host, int(port)), authkey=authkey.encode("utf-8"))
+        try:
+            manager.connect()
+            return manager.pool()
+        except ConnectionRefusedError:
+            # The broker may still be starting up
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def serve(host: str, port: int, authkey: str, pool: SessionPool) -> None:
+    _BrokerServer.register("pool", callable=lambda: pool)
+    manager = _BrokerServer(address=(host, port), authkey=authkey.encode("utf-8"))
+    server = manager.get_server()
+    print(f"Session broker listening on {host}:{port} (max {pool.max_sessions} sessions)", flush=True)
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep warm Netmiko sessions for lab runs")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="Maximum open SSH sessions")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="Seconds before an unused session is closed")
+    parser.add_argument("--keepalive", type=float, default=DEFAULT_KEEPALIVE, help="Seconds between liveness checks of idle sessions")
+    parser.add_argument("--lease-timeout", type=float, default=DEFAULT_LEASE_TIMEOUT, help="Seconds without a call before a leased session is taken back and closed")
+    args = parser.parse_args()
+
+    authkey = os.environ.get(BROKER_KEY_ENV, "")
+    pool = SessionPool(args.max_sessions, args.idle_timeout, args.keepalive, lease_timeout=args.lease_timeout)
+    serve(args.host, args.port, authkey, pool)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Per-session command runner for the lab command loops.
+- run_command_batch() pipelines show commands over one session: the next
+  commands are written while the device is still answering the current one,
+  and output is split on the device prompt instead of one round trip per command
+- run_command_loop() is the plain one-send_command()-per-command loop, for comparison
+- Both return {command: {"output", "elapsed"}} in the order the commands were given;
+  a command listed twice is run once
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_WINDOW = 8
+_POLL_SECONDS = 0.01
+_LINEFEEDS = re.compile(r"\r\r\n|\r\n|\n\r|\r")
+
+
+def add_command_args(parser) -> None:
+    parser.add_argument("--batch-commands", action="store_true", help="Send all selected commands over the session at once and split the output on the prompt")
+
+
+def _normalize(text: str) -> str:
+    return _LINEFEEDS.sub("\n", text)
+
+
+def _command_output(segment: str) -> str:
+    # The segment starts with the device's echo of the command; drop that line
+    _, _, output = segment.partition("\n")
+    return output.rstrip("\n")
+
+
+def run_command_batch(
+    conn: Any,
+    commands: Sequence[str],
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    window: int = DEFAULT_WINDOW,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run `commands` on an open Netmiko connection with up to `window` commands
+    in flight, and return {command: {"output", "elapsed"}}. `elapsed` is the
+    time from the previous prompt to the prompt that ended this command.
+    Raises TimeoutError when a command produces no prompt within `read_timeout`
+    (or the per-command limit of a session under --adaptive-timeouts).
+    Only for commands that end at the normal exec prompt (show commands, not
+    anything that asks for confirmation or changes mode).
+    Duplicate commands are dropped up front (results are keyed by command, so a
+    second copy would shift every later output onto the wrong command).
+    """
+    commands = list(dict.fromkeys(commands))
+    results: Dict[str, Dict[str, Any]] = {}
+    if not commands:
+        return results
+    prompt = conn.find_prompt()
+    prompt_re = re.compile(r"^" + re.escape(prompt), re.M)
+    conn.read_channel()  # drop anything left over after the prompt
+
+    # Sessions from open_connection() under --adaptive-timeouts know each command's limit
+    read_timeout_for = getattr(conn, "read_timeout_for", None)
+    limits = [read_timeout_for(cmd) if read_timeout_for else read_timeout for cmd in commands]
+
+    window = max(1, window)
+    sent = min(window, len(commands))
+    conn.write_channel("".join(f"{cmd}\n" for cmd in commands[:sent]))
+
+    buffer = ""
+    pending_cr = ""
+    segment_start = 0
+    done = 0
+    last_prompt = time.perf_counter()
+    deadline = last_prompt + limits[0]
+    while done < len(commands):
+        chunk = conn.read_channel()
+        if not chunk:
+            if time.perf_counter() > deadline:
+                timed_out = getattr(conn, "timed_out", None)  # counted by --adaptive-timeouts
+                if timed_out is not None:
+                    timed_out()
+                raise TimeoutError(f"No prompt after '{commands[done]}' within {limits[done]:g}s")
+            time.sleep(_POLL_SECONDS)
+            continue
+        # A "\r" at the end of a read may be the first half of "\r\n"
+        chunk = pending_cr + chunk
+        pending_cr = "\r" if chunk.endswith("\r") else ""
+        if pending_cr:
+            chunk = chunk[:-1]
+        # Only rescan the tail that could still hold the start of a prompt
+        scan_from = max(segment_start, len(buffer) - len(prompt))
+        buffer += _normalize(chunk)
+        for match in prompt_re.finditer(buffer, scan_from):
+            now = time.perf_counter()
+            results[commands[done]] = {
+                "output": _command_output(buffer[segment_start:match.start()]),
+                "elapsed": now - last_prompt,
+            }
+            segment_start = match.end()
+            last_prompt = now
+            done += 1
+            if done < len(commands):
+                deadline = now + limits[done]
+            if sent < len(commands):
+                conn.write_channel(f"{commands[sent]}\n")
+                sent += 1
+            if done == len(commands):
+                break
+        # Finished segments are copied out; keep only the one still being read
+        buffer = buffer[segment_start:]
+        segment_start = 0
+    # Sessions from open_connection() under --metrics / --adaptive-timeouts record each command's time
+    observe = getattr(conn, "observe", None)
+    if observe is not None:
+        for cmd, result in results.items():
+            observe("send_command", cmd, result["elapsed"], len(result["output"]))
+    return results
+
+
+def run_command_loop(conn: Any, commands: Sequence[str], read_timeout: float = DEFAULT_READ_TIMEOUT) -> Dict[str, Dict[str, Any]]:
+    """One send_command() per command, as the labs did originally; same result shape."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for cmd in dict.fromkeys(commands):
+        start = time.perf_counter()
+        output = conn.send_command(cmd, read_timeout=read_timeout)
+        results[cmd] = {"output": output, "elapsed": time.perf_counter() - start}
+    return results
+
+
+def command_outputs(results: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str]]:
+    return [(cmd, result["output"]) for cmd, result in results.items()]
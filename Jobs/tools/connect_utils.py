@@ -0,0 +1,113 @@
+"""
+Connection helper shared by the labs.
+- open_connection() takes the same dict as ConnectHandler(**conn)
+- When NETLAB_BROKER is set (app.py does this when session reuse is on), the
+  session is borrowed from the local session broker instead of logging in again
+- --driver asyncssh swaps Netmiko for AsyncConnectHandler (tools/async_utils.py),
+  which runs every session on one shared event loop
+- With --metrics (tools/metrics_utils.py) login, prompt detection and every call
+  on the session are timed
+- With --adaptive-timeouts (tools/timeout_utils.py) each send_command gets a
+  read_timeout learned from the device's earlier response times
+"""
+
+import os
+import threading
+from typing import Any, Dict
+
+from netmiko import ConnectHandler
+from tools.broker_utils import BROKER_ENV, BROKER_KEY_ENV, BrokeredConnection, connect_broker
+from tools.metrics_utils import Metrics, MeteredConnection, active_metrics
+from tools.timeout_utils import AdaptiveConnection, active_timeouts
+
+DRIVERS = ("netmiko", "asyncssh")
+
+_driver = "netmiko"
+_broker: Any = None
+_broker_failed = False
+_broker_lock = threading.Lock()
+
+
+def _get_broker() -> Any:
+    global _broker, _broker_failed
+    address = os.environ.get(BROKER_ENV)
+    if not address or _broker_failed:
+        return None
+    with _broker_lock:
+        if _broker is None and not _broker_failed:
+            try:
+                _broker = connect_broker(address, os.environ.get(BROKER_KEY_ENV, ""))
+            except Exception as exc:
+                _broker_failed = True
+                print(f"Session broker at {address} not available ({exc}); connecting directly.")
+        return _broker
+
+
+def add_driver_args(parser) -> None:
+    parser.add_argument("--driver", choices=DRIVERS, default="netmiko", help="SSH backend: Netmiko (a thread per session) or asyncssh (one event loop for all sessions)")
+
+
+def set_driver(name: str) -> None:
+    """Backend for every later open_connection() in this process."""
+    global _driver
+    if name not in DRIVERS:
+        raise ValueError(f"Unknown driver {name!r}; use one of {', '.join(DRIVERS)}")
+    _driver = name
+
+
+def _connect(conn: Dict[str, Any]) -> Any:
+    if _driver == "asyncssh":
+        from tools.async_utils import AsyncConnectHandler
+
+        return AsyncConnectHandler(**conn)
+    broker = _get_broker()
+    if broker is not None:
+        return BrokeredConnection(broker, conn)
+    return ConnectHandler(**conn)
+
+
+def _open_netmiko(conn: Dict[str, Any], metrics: Metrics, device: str) -> Any:
+    # Netmiko's own _open(), split so the SSH login and the prompt detection /
+    # terminal setup that follows it are timed separately
+    net_connect = ConnectHandler(**conn, auto_connect=False)
+    try:
+        with metrics.timer("login", device=device):
+            net_connect._modify_connection_params()
+            net_connect.establish_connection()
+        with metrics.timer("prompt", device=device):
+            net_connect._try_session_preparation()
+    except Exception:
+        # What ConnectHandler does when its own _open() fails, plus closing a
+        # transport that logged in before the prompt step failed: disconnect()
+        # closes the socket and session log and drops the secrets log filter
+        net_connect.disconnect()
+        raise
+    return net_connect
+
+
+def _label(conn: Dict[str, Any]) -> str:
+    return f"{conn.get('host')}:{conn['port']}" if conn.get("port") else str(conn.get("host"))
+
+
+def open_connection(conn: Dict[str, Any]) -> Any:
+    """
+    Returns a Netmiko connection (or a brokered / asyncssh stand-in with the same
+    methods). Use it like ConnectHandler: in a `with` block or call disconnect() when done.
+    """
+    connection = _metered(conn)
+    timeouts = active_timeouts()
+    if timeouts is None:
+        return connection
+    return AdaptiveConnection(connection, timeouts, _label(conn))
+
+
+def _metered(conn: Dict[str, Any]) -> Any:
+    metrics = active_metrics()
+    if metrics is None:
+        return _connect(conn)
+    device = _label(conn)
+    if _driver == "netmiko" and _get_broker() is None:
+        return MeteredConnection(_open_netmiko(conn, metrics, device), metrics, device)
+    with metrics.timer("connect", device=device):
+        connection = _connect(conn)
+    return MeteredConnection(connection, metrics, device)
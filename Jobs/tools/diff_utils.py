@@ -0,0 +1,188 @@
+"""
+Change detection for repeated lab runs (--changes-only).
+- Each device+command output is hashed, after masking uptimes, timers and
+  EIGRP neighbor counters so a quiet router hashes the same every run
+- Only the latest output (compressed) and digest are kept per device+command,
+  plus the compact diff of its latest change, in a small SQLite file
+  (runs/state.db), so the file follows fleet size, not the number of runs
+- Unchanged commands are dropped from the lab's output, and unchanged devices
+  are only counted, so output size follows churn instead of fleet size
+"""
+
+import difflib
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from tools.inventory_utils import Device
+from tools.parse_utils import OutputParser, parse_outputs
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_STATE_DB = ROOT / "runs" / "state.db"
+MAX_DIFF_LINES = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS latest (
+    device TEXT NOT NULL,
+    command TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    output BLOB NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (device, command)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    device TEXT NOT NULL,
+    command TEXT NOT NULL,
+    ts REAL NOT NULL,
+    digest TEXT NOT NULL,
+    diff TEXT,
+    PRIMARY KEY (device, command)
+);
+"""
+
+# Fields that change on every run without the device's state changing
+_NORMALIZERS = [
+    (re.compile(r"uptime is .*"), "uptime is <uptime>"),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:\.\d+)?\b"), "<time>"),
+    (re.compile(r"\b\d+[ywdhm]\d+[ywdhms](?:\d+[ywdhms])?\b"), "<time>"),
+]
+_COMMAND_NORMALIZERS = {
+    # H  Address  Interface  Hold  Uptime  SRTT  RTO  Q  Seq -> keep neighbor, address, interface
+    "show ip eigrp neighbors": [
+        (re.compile(r"^(\s*\d+\s+\S+\s+\S+)\s+\d+\s+\S+\s+\d+\s+\d+\s+\d+\s+\d+\s*$", re.M), r"\1"),
+    ],
+}
+
+
+def add_diff_args(parser) -> None:
+    parser.add_argument("--changes-only", action="store_true", help="Only print commands whose output changed since the last run (as a diff)")
+    parser.add_argument("--state-db", default=str(DEFAULT_STATE_DB), help="SQLite file holding the last output of every device/command for --changes-only")
+    parser.add_argument("--exact-changes", action="store_true", help="With --changes-only, count uptime/timer/counter changes too")
+
+
+def normalize(command: str, output: str) -> str:
+    for pattern, repl in _COMMAND_NORMALIZERS.get(command.strip().lower(), []):
+        output = pattern.sub(repl, output)
+    for pattern, repl in _NORMALIZERS:
+        output = pattern.sub(repl, output)
+    return output
+
+
+def compact_diff(before: str, after: str) -> str:
+    """Changed lines only (no context), capped at MAX_DIFF_LINES."""
+    lines = list(difflib.unified_diff(before.splitlines(), after.splitlines(), n=0, lineterm=""))[2:]
+    if len(lines) > MAX_DIFF_LINES:
+        more = len(lines) - MAX_DIFF_LINES
+        lines = lines[:MAX_DIFF_LINES] + [f"... ({more} more diff lines)"]
+    return "\n".join(lines)
+
+
+class ChangeTracker:
+    """Latest digest per device+command; reports what changed since the previous run."""
+
+    def __init__(self, path: Path, normalized: bool = True):
+        self.path = Path(path)
+        self.normalized = normalized
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+        self._lock = threading.Lock()
+        self.changed_devices = 0
+        self.unchanged_devices = 0
+
+    def _migrate(self) -> None:
+        # A state.db from before one changes row per device+command kept every
+        # change ever seen; carry over only the newest one of each
+        columns = self._db.execute("PRAGMA table_info(changes)").fetchall()
+        legacy = bool(columns) and not any(column[5] for column in columns)  # no primary key
+        if legacy:
+            with self._db:
+                self._db.execute("ALTER TABLE changes RENAME TO changes_legacy")
+        self._db.executescript(SCHEMA)
+        if legacy:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO changes (device, command, ts, digest, diff) "
+                    "SELECT device, command, ts, digest, diff FROM changes_legacy ORDER BY ts"
+                )
+                self._db.execute("DROP TABLE changes_legacy")
+
+    def _prepare(self, command: str, output: str) -> str:
+        return normalize(command, output) if self.normalized else output
+
+    def update(self, device: Device, outputs: Sequence[Tuple[str, str]]) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Record this run's outputs and return the changed ones as (command, output, diff).
+        diff is None the first time a device+command is seen.
+        """
+        prepared = [(cmd, output, self._prepare(cmd, output)) for cmd, output in outputs]
+        digests = [hashlib.sha256(text.encode("utf-8")).hexdigest() for _, _, text in prepared]
+        changed: List[Tuple[str, str, Optional[str]]] = []
+        now = time.time()
+        with self._lock, self._db:
+            for (cmd, output, text), digest in zip(prepared, digests):
+                row = self._db.execute(
+                    "SELECT digest, output FROM latest WHERE device = ? AND command = ?", (device.name, cmd)
+                ).fetchone()
+                if row is not None and row[0] == digest:
+                    continue
+                diff = None
+                if row is not None:
+                    previous = zlib.decompress(row[1]).decode("utf-8")
+                    diff = compact_diff(self._prepare(cmd, previous), text)
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO changes (device, command, ts, digest, diff) VALUES (?, ?, ?, ?, ?)",
+                        (device.name, cmd, now, digest, diff),
+                    )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO latest (device, command, digest, output, updated) VALUES (?, ?, ?, ?, ?)",
+                    (device.name, cmd, digest, zlib.compress(output.encode("utf-8")), now),
+                )
+                changed.append((cmd, output, diff))
+            if changed:
+                self.changed_devices += 1
+            else:
+                self.unchanged_devices += 1
+        return changed
+
+    def summary(self) -> str:
+        return f"{self.changed_devices} device(s) new or changed, {self.unchanged_devices} unchanged since the last run"
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def open_tracker(args) -> Optional[ChangeTracker]:
+    """ChangeTracker for a lab started with --changes-only, else None. Prints problems instead of raising."""
+    if not getattr(args, "changes_only", False):
+        return None
+    try:
+        return ChangeTracker(Path(args.state_db), normalized=not args.exact_changes)
+    except (OSError, sqlite3.Error) as exc:
+        print(f"State DB {args.state_db} not available ({exc}); printing all output.")
+        return None
+
+
+def report_outputs(
+    tracker: Optional[ChangeTracker],
+    parser: Optional[OutputParser],
+    device: Device,
+    outputs: Sequence[Tuple[str, str]],
+) -> List[Tuple[str, str]]:
+    """
+    (command, text to print) for a device. Without a tracker this is parse_outputs().
+    With one, unchanged commands are left out, changed ones become a diff and
+    first-seen ones are printed in full.
+    """
+    if tracker is None:
+        return parse_outputs(parser, device.device_type, outputs)
+    changes = tracker.update(device, outputs)
+    first_seen = dict(parse_outputs(parser, device.device_type, [(cmd, output) for cmd, output, diff in changes if diff is None]))
+    return [(cmd, first_seen[cmd] if diff is None else f"(changed since the last run)\n{diff}") for cmd, output, diff in changes]
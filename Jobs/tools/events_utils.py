@@ -0,0 +1,358 @@
+"""
+Structured progress events for the app's run dashboard (NETLAB_EVENTS).
+- app.py gives every job an events file in the NETLAB_EVENTS variable; a lab
+  that calls open_events() appends one JSON line per event to it: run_start,
+  total (the device count, from a background thread so the first devices
+  connect while the inventory is still being counted), start/done per device,
+  done for devices --precheck skips, call for every SSH call timed by
+  tools/metrics_utils.py, and run_end
+- Each event is one O_APPEND write, so worker threads and --processes workers
+  forked from the lab all append to the same file without mixing lines
+- Nothing is written when the variable is unset (a lab run from the shell)
+- RunProgress follows the file from the app, reading only the bytes added since
+  its last poll: done/failed/running/pending counts, devices/sec, the devices
+  still running (stragglers), and the slowest devices, calls and commands
+- The app cancels single devices of a running job by appending their names to
+  the events file + ".cancel" (request_cancel()); tools/runner_utils.py gives
+  up on them as if they had hit --device-timeout
+"""
+
+import collections
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+EVENTS_ENV = "NETLAB_EVENTS"
+SLOWEST = 50
+RATE_WINDOW = 30.0  # seconds of finished devices behind the live devices/sec
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+CANCEL_SUFFIX = ".cancel"  # device names/IPs the app asked the lab to give up on, one per line
+CANCEL_POLL_SECONDS = 1.0
+CANCELLED = "cancelled from the app"
+
+_active: Optional["EventLog"] = None
+
+
+class _CancelList:
+    """Device names/IPs in a job's cancel file, re-read at most every CANCEL_POLL_SECONDS."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.names: Set[str] = set()
+        self._offset = 0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def __contains__(self, device: Any) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked >= CANCEL_POLL_SECONDS:
+                self._checked = now
+                self._read()
+            return device.name in self.names or device.ip in self.names
+
+    def _read(self) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return  # nothing cancelled yet
+        data = data[:data.rfind(b"\n") + 1]  # a line still being written is read next time
+        self._offset += len(data)
+        self.names.update(line.strip() for line in data.decode("utf-8", errors="replace").splitlines() if line.strip())
+
+
+class EventLog:
+    """Appends events for one lab run to the file app.py named in NETLAB_EVENTS."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cancelled = _CancelList(path + CANCEL_SUFFIX)
+        # Left open until the process exits: a worker thread abandoned by
+        # --device-timeout may still emit, and must never hit a reused fd
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        line = json.dumps({"time": round(time.time(), 3), "event": event, **fields}, default=str) + "\n"
+        try:
+            os.write(self._fd, line.encode("utf-8"))
+        except OSError:
+            pass  # progress reporting must never fail the run
+
+    def close(self) -> None:
+        """Write run_end; later events from stray worker threads are dropped."""
+        global _active
+        self.emit("run_end")
+        if _active is self:
+            _active = None
+
+
+def _error_line(error: Any) -> str:
+    # Netmiko errors run to several lines of advice; the first one says what happened
+    lines = str(error).strip().splitlines()
+    return lines[0] if lines else error.__class__.__name__
+
+
+def active_events() -> Optional[EventLog]:
+    return _active
+
+
+def emit(event: str, **fields: Any) -> None:
+    """Append to the active EventLog; does nothing when events are off."""
+    events = _active
+    if events is not None:
+        events.emit(event, **fields)
+
+
+def cancel_check() -> Optional[Callable[[Any], bool]]:
+    """device -> True once the app asked to cancel it; None when events are off."""
+    events = _active
+    if events is None:
+        return None
+    return events.cancelled.__contains__
+
+
+def request_cancel(path: str, names: Iterable[str]) -> None:
+    """Ask the lab writing events to `path` to give up on these devices (app side)."""
+    with open(path + CANCEL_SUFFIX, "a", encoding="utf-8") as f:
+        f.write("".join(f"{name}\n" for name in names))
+
+
+def emit_done(device: Any, ok: bool, error: Any = None, elapsed: float = 0.0, skipped: bool = False) -> None:
+    events = _active
+    if events is not None:
+        events.emit(
+            "done", index=device.index, device=device.name, ip=device.ip, ok=ok,
+            error=None if ok else _error_line(error), elapsed=round(elapsed, 3), skipped=skipped,
+        )
+
+
+def tracked(task: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """task(device) that reports start/done for the device when events are on (unchanged otherwise)."""
+    if _active is None:
+        return task
+
+    def run(device: Any) -> Any:
+        emit("start", index=device.index, device=device.name, ip=device.ip)
+        start = time.monotonic()
+        try:
+            output = task(device)
+        except Exception as exc:
+            emit_done(device, False, exc, time.monotonic() - start)
+            raise
+        emit_done(device, True, elapsed=time.monotonic() - start)
+        return output
+
+    return run
+
+
+def record(result: Dict[str, Any]) -> None:
+    """
+    Report a failed runner result. Covers what tracked() cannot see: devices given
+    up on by --device-timeout or lost with a worker process (readers keep the
+    first failure, so a device tracked() already reported is not counted twice).
+    """
+    if not result["ok"]:
+        emit_done(result["device"], False, result["error"], result["elapsed"] or 0.0)
+
+
+def open_events(lab: str, total: Callable[[], int]) -> Optional[EventLog]:
+    """
+    EventLog for a lab started by app.py (made active for tracked()/emit()), else
+    None. total() counts the devices the run will cover. It is only called when
+    events are on, since it may have to read the whole inventory again, and on a
+    background thread that reports it in a "total" event, so the lab's first
+    devices never wait for the count.
+    """
+    global _active
+    path = os.environ.get(EVENTS_ENV)
+    if not path:
+        return None
+    try:
+        events = EventLog(path)
+    except OSError as exc:
+        print(f"Could not open progress events file {path}: {exc}")
+        return None
+    events.emit("run_start", lab=lab, total=None, pid=os.getpid())
+    _active = events
+    threading.Thread(target=_count, args=(events, total), name="events-total", daemon=True).start()
+    return events
+
+
+def _count(events: EventLog, total: Callable[[], int]) -> None:
+    try:
+        count = total()
+    except Exception:
+        return  # the lab reports the inventory problem itself
+    events.emit("total", total=count)
+
+
+# -- reading (app.py) ----------------------------------------------------------------
+
+
+class RunProgress:
+    """Incrementally follows a job's events file and aggregates it for the dashboard."""
+
+    def __init__(self, path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        self.offset = 0
+        self._partial = b""
+        self.lab: Optional[str] = None
+        self.total: Optional[int] = None
+        self.started_at: Optional[float] = None
+        self.ended_at: Optional[float] = None
+        self.running: Dict[int, Dict[str, Any]] = {}  # index -> start event
+        self.finished: Dict[int, Dict[str, Any]] = {}  # index -> done event
+        self.failed = 0
+        self._done_times: Deque[float] = collections.deque()
+        self._slow_devices: List[Tuple[float, int, Dict[str, Any]]] = []  # min-heaps of the SLOWEST biggest
+        self._slow_calls: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._commands: Dict[Tuple[str, str], List[float]] = {}  # -> [count, errors, total, max]
+        self._seq = itertools.count()
+
+    @property
+    def seen(self) -> bool:
+        return self.started_at is not None
+
+    def poll(self) -> int:
+        """Read and apply new events; returns how many were applied."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size <= self.offset:
+            return 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(size - self.offset, self.chunk_bytes))
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        applied = 0
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            self._apply(event)
+            applied += 1
+        return applied
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        kind = event.get("event")
+        if kind == "run_start":
+            self.lab = event.get("lab")
+            self.total = event.get("total")
+            self.started_at = event["time"]
+        elif kind == "total":
+            self.total = event["total"]
+        elif kind == "run_end":
+            self.ended_at = event["time"]
+        elif kind == "start":
+            if event["index"] not in self.finished:
+                self.running[event["index"]] = event
+        elif kind == "done":
+            self._done(event)
+        elif kind == "call":
+            self._call(event)
+
+    def _done(self, event: Dict[str, Any]) -> None:
+        index = event["index"]
+        previous = self.finished.get(index)
+        if previous is not None and (not previous["ok"] or event["ok"]):
+            return  # a failure sticks; a late success after a timeout does not undo it
+        self.running.pop(index, None)
+        self.finished[index] = event
+        if not event["ok"]:
+            self.failed += 1
+        if previous is None:
+            self._done_times.append(event["time"])
+            self._keep(self._slow_devices, event.get("elapsed") or 0.0, event)
+
+    def _call(self, event: Dict[str, Any]) -> None:
+        seconds = event.get("seconds") or 0.0
+        stats = self._commands.get((event["phase"], event["command"]))
+        if stats is None:
+            stats = self._commands[(event["phase"], event["command"])] = [0, 0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += 1 if event.get("error") else 0
+        stats[2] += seconds
+        stats[3] = max(stats[3], seconds)
+        self._keep(self._slow_calls, seconds, event)
+
+    def _keep(self, heap: List[Tuple[float, int, Dict[str, Any]]], seconds: float, event: Dict[str, Any]) -> None:
+        item = (seconds, next(self._seq), event)
+        if len(heap) < SLOWEST:
+            heapq.heappush(heap, item)
+        elif seconds > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    # -- views ----------------------------------------------------------------------
+
+    def counts(self) -> Dict[str, Optional[int]]:
+        done = len(self.finished)
+        pending = None if self.total is None else max(0, self.total - done - len(self.running))
+        return {"done": done - self.failed, "failed": self.failed, "running": len(self.running), "pending": pending}
+
+    def fraction(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return min(1.0, len(self.finished) / self.total)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Devices finished per second: over the last RATE_WINDOW seconds while running, overall once ended."""
+        if self.started_at is None:
+            return 0.0
+        if self.ended_at is not None:
+            return len(self.finished) / max(self.ended_at - self.started_at, 1e-3)
+        now = time.time() if now is None else now
+        while self._done_times and self._done_times[0] < now - RATE_WINDOW:
+            self._done_times.popleft()
+        return len(self._done_times) / max(min(RATE_WINDOW, now - self.started_at), 1e-3)
+
+    def stragglers(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Devices still running, longest first."""
+        now = time.time() if now is None else now
+        rows = [
+            {"device": event["device"], "ip": event["ip"], "running for (s)": round(now - event["time"], 1)}
+            for event in self.running.values()
+        ]
+        return sorted(rows, key=lambda row: row["running for (s)"], reverse=True)
+
+    def slowest_devices(self) -> List[Dict[str, Any]]:
+        return [
+            {"device": event["device"], "ip": event["ip"], "seconds": event.get("elapsed"),
+             "status": "skipped" if event.get("skipped") else ("ok" if event["ok"] else "failed"),
+             "error": event.get("error") or ""}
+            for _, _, event in sorted(self._slow_devices, reverse=True)
+        ]
+
+    def slowest_calls(self) -> List[Dict[str, Any]]:
+        return [
+            {"session": event["device"], "phase": event["phase"], "command": event["command"],
+             "seconds": round(event["seconds"], 3), "error": bool(event.get("error"))}
+            for _, _, event in sorted(self._slow_calls, reverse=True)
+        ]
+
+    def command_stats(self) -> List[Dict[str, Any]]:
+        return [
+            {"phase": phase, "command": command, "calls": count, "errors": errors,
+             "avg (s)": round(total / count, 3), "max (s)": round(longest, 3)}
+            for (phase, command), (count, errors, total, longest) in sorted(
+                self._commands.items(), key=lambda item: item[1][3], reverse=True)
+        ]
+
+    def failed_devices(self) -> List[str]:
+        return [event["device"] for event in self.finished.values() if not event["ok"]]
+
+    def unfinished_devices(self) -> List[str]:
+        return [event["device"] for event in self.running.values()]
+
+    def ok_devices(self) -> List[str]:
+        return [event["device"] for event in self.finished.values() if event["ok"]]
@@ -0,0 +1,228 @@
+"""
+Shared device inventory for the labs and app.py.
+- Reads CSV (hostname/ip/device_type header, optional port column, or a single column of IPs) and YAML (`devices:` list)
+- iter_devices()/stream_inventory() yield devices while a big CSV is still being read
+- Parsed inventories are cached per file and reused until its mtime or size changes
+- Inventory keeps lookup indexes by hostname, IP and device_type
+- --only-devices limits a lab run to some hostnames/IPs (used to retry failures)
+"""
+
+import csv
+import itertools
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_DEVICE_TYPE = "cisco_ios"
+DEFAULT_HOSTNAMES = ["C8K-R51", "C8K-R52"]
+IP_COLUMNS = ("ip", "device_ips", "device_ip", "host")
+HEADER_WORDS = ("hostname", "device_ips", "device_ip", "ip", "host")
+
+
+class Device:
+    """One inventory row. Slotted to keep 100k-device inventories small."""
+
+    __slots__ = ("index", "hostname", "ip", "device_type", "port")
+
+    def __init__(self, index: int, hostname: str, ip: str, device_type: str = DEFAULT_DEVICE_TYPE, port: Optional[int] = None):
+        self.index = index
+        self.hostname = hostname
+        self.ip = ip
+        self.device_type = device_type or DEFAULT_DEVICE_TYPE
+        self.port = port  # None: the protocol default (22 for SSH)
+
+    @property
+    def name(self) -> str:
+        return self.hostname or self.ip
+
+    def __repr__(self) -> str:
+        port = f", port={self.port}" if self.port else ""
+        return f"Device({self.index}, {self.hostname!r}, {self.ip!r}, {self.device_type!r}{port})"
+
+
+class Inventory:
+    """Ordered devices plus O(1) lookups by hostname, IP and device_type."""
+
+    __slots__ = ("devices", "by_hostname", "by_ip", "by_type")
+
+    def __init__(self, devices: List[Device]):
+        self.devices = tuple(devices)
+        self.by_hostname: Dict[str, Device] = {}
+        self.by_ip: Dict[str, Device] = {}
+        self.by_type: Dict[str, List[Device]] = {}
+        for device in self.devices:
+            if device.hostname:
+                self.by_hostname.setdefault(device.hostname.lower(), device)
+            self.by_ip.setdefault(device.ip.lower(), device)
+            self.by_type.setdefault(device.device_type, []).append(device)
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def __iter__(self) -> Iterator[Device]:
+        return iter(self.devices)
+
+    def __getitem__(self, index):
+        return self.devices[index]
+
+    def find(self, name: str) -> Optional[Device]:
+        """Device whose hostname or IP matches `name` (case-insensitive)."""
+        key = name.strip().lower()
+        return self.by_hostname.get(key) or self.by_ip.get(key)
+
+    def names(self) -> List[str]:
+        return [d.name for d in self.devices]
+
+
+def _port(value) -> Optional[int]:
+    """A port column value; blank or invalid means the protocol default (None)."""
+    try:
+        port = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return port if 0 < port < 65536 else None
+
+
+def _iter_csv(path: Path) -> Iterator[Device]:
+    # Opened on the first next(), so an iterator that is never started holds no file
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        fieldnames = [name.strip().lower() for name in header]
+        ip_column = next((c for c in IP_COLUMNS if c in fieldnames), None)
+        if ip_column is not None:
+            ip_at = fieldnames.index(ip_column)
+            host_at = fieldnames.index("hostname") if "hostname" in fieldnames else None
+            type_at = fieldnames.index("device_type") if "device_type" in fieldnames else None
+            port_at = fieldnames.index("port") if "port" in fieldnames else None
+            count = 0
+            for row in reader:
+                ip = row[ip_at].strip() if ip_at < len(row) else ""
+                if not ip:
+                    continue
+                hostname = row[host_at].strip() if host_at is not None and host_at < len(row) else ""
+                device_type = row[type_at].strip() if type_at is not None and type_at < len(row) else ""
+                port = _port(row[port_at]) if port_at is not None and port_at < len(row) else None
+                yield Device(count, hostname, ip, device_type, port)
+                count += 1
+            return
+        # No usable header: treat the first column as device IPs
+        count = 0
+        for idx, row in enumerate(itertools.chain([header], reader)):
+            if not row:
+                continue
+            val = row[0].strip()
+            if idx == 0 and val.lower() in HEADER_WORDS:
+                continue
+            if val:
+                hostname = DEFAULT_HOSTNAMES[idx] if idx < len(DEFAULT_HOSTNAMES) else f"device{idx+1}"
+                yield Device(count, hostname, val)
+                count += 1
+
+
+def iter_devices(path: Path) -> Iterator[Device]:
+    """
+    Yield devices as CSV rows are parsed, so work can start before the file is
+    fully read. The file is opened on the first next() (which raises
+    FileNotFoundError) and closed when the rows run out or the iterator is
+    closed. YAML inventories are parsed whole.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".yaml", ".yml"):
+        return iter(load_inventory(path))
+    return _iter_csv(path)
+
+
+def _devices_from_yaml(path: Path) -> List[Device]:
+    import yaml  # optional; only needed for YAML inventories
+
+    with path.open(encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    rows = data.get("devices", []) if isinstance(data, dict) else data
+    devices: List[Device] = []
+    for row in rows or []:
+        ip = str(row.get("ip") or row.get("host") or "").strip()
+        if not ip:
+            continue
+        devices.append(Device(
+            len(devices),
+            str(row.get("hostname") or "").strip(),
+            ip,
+            str(row.get("device_type") or "").strip(),
+            _port(row.get("port")),
+        ))
+    return devices
+
+
+_cache: Dict[str, Tuple[int, int, Inventory]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_inventory(path: Path) -> Inventory:
+    """
+    Parse a CSV/YAML inventory, reusing the cached result while the file's
+    mtime and size are unchanged. Raises FileNotFoundError / parse errors.
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = str(path.resolve())
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+    if path.suffix.lower() in (".yaml", ".yml"):
+        inventory = Inventory(_devices_from_yaml(path))
+    else:
+        inventory = Inventory(list(iter_devices(path)))
+    with _cache_lock:
+        _cache[key] = (stat.st_mtime_ns, stat.st_size, inventory)
+    return inventory
+
+
+def read_inventory(path: Path, path_arg: str = "--csv-path") -> Inventory:
+    """load_inventory() for the lab scripts: prints problems and returns an empty inventory."""
+    try:
+        return load_inventory(path)
+    except FileNotFoundError:
+        print(f"CSV not found at {path}. Provide a valid path with {path_arg}.")
+    except Exception as exc:
+        print(f"Error reading CSV {path}: {exc}")
+    return Inventory([])
+
+
+def stream_inventory(path: Path, path_arg: str = "--csv-path") -> Optional[Iterator[Device]]:
+    """
+    iter_devices() for the lab scripts: prints problems and returns None when
+    there is nothing to run, otherwise an iterator that starts at the first device.
+    """
+    try:
+        devices = iter_devices(path)
+        first = next(devices, None)
+    except FileNotFoundError:
+        print(f"CSV not found at {path}. Provide a valid path with {path_arg}.")
+        return None
+    except Exception as exc:
+        print(f"Error reading CSV {path}: {exc}")
+        return None
+    if first is None:
+        return None
+    return itertools.chain([first], devices)
+
+
+def add_device_filter_args(parser) -> None:
+    parser.add_argument("--only-devices", default="", help="Comma-separated hostnames/IPs to run on (default: every device in the CSV)")
+
+
+def only_devices(devices: Iterable[Device], names: Optional[str]) -> Iterable[Device]:
+    """The devices whose hostname or IP is in the comma-separated `names` (case-insensitive); all of them when blank."""
+    wanted = {name.strip().lower() for name in (names or "").split(",") if name.strip()}
+    if not wanted:
+        return devices
+    return (d for d in devices if d.ip.lower() in wanted or (d.hostname and d.hostname.lower() in wanted))
+
+
+def count_devices(path: Path, names: Optional[str] = None) -> int:
+    """Devices a lab run over `path` (limited to --only-devices `names`) will cover."""
+    return sum(1 for _ in only_devices(iter_devices(path), names))
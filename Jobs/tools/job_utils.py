@@ -0,0 +1,224 @@
+"""
+Background job manager for app.py.
+- Lab runs are queued with a job ID and run without blocking the Streamlit thread
+- Up to `max_concurrent` jobs run at once; queued or running jobs can be cancelled
+- Each job runs in a pre-started ("warm") worker process that has already
+  imported netmiko, so a click does not pay for a fresh interpreter + imports
+- stdout/stderr of every job go to log files under `log_dir/<job_id>/`, next to
+  events.jsonl, the progress events file named to the job in NETLAB_EVENTS
+"""
+
+import collections
+import importlib
+import json
+import os
+import runpy
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_WARM_WORKERS = 2
+ACTIVE_STATES = ("queued", "running", "cancelling")
+EVENTS_ENV = "NETLAB_EVENTS"  # read by tools/events_utils.py (this file also runs outside the tools package)
+
+
+def _warm_worker() -> None:
+    # Pay for the heavy imports before the job arrives (loaded for sys.modules, not used here)
+    try:
+        importlib.import_module("netmiko")
+    except ImportError:
+        pass
+    line = sys.stdin.readline()
+    if not line:
+        return
+    spec = json.loads(line)
+    os.environ.update(spec["env"])
+    script = spec["script"]
+    code = 0
+    with open(spec["stdout"], "w", encoding="utf-8", buffering=1) as out, open(spec["stderr"], "w", encoding="utf-8", buffering=1) as err:
+        # Redirect at the fd level too, so output from C extensions lands in the logs
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        sys.stdout, sys.stderr = out, err
+        sys.argv = [script] + list(spec["args"])
+        # Same import path as `python script.py`
+        sys.path[0] = str(Path(script).resolve().parent)
+        try:
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as exc:
+            if isinstance(exc.code, int):
+                code = exc.code
+            elif exc.code is not None:
+                print(exc.code, file=err)
+                code = 1
+        except BaseException:
+            traceback.print_exc(file=err)
+            code = 1
+        out.flush()
+        err.flush()
+    os._exit(code)
+
+
+class _WarmProcess:
+    # A plain interpreter (not multiprocessing) so the child never re-imports
+    # the caller's __main__, which under Streamlit is app.py itself.
+    __slots__ = ("process",)
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, __file__], stdin=subprocess.PIPE, text=True)
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def start(self, spec: Dict[str, Any]) -> None:
+        self.process.stdin.write(json.dumps(spec) + "\n")
+        self.process.stdin.close()
+
+
+class JobManager:
+    """Queue of lab runs executed in warm worker processes."""
+
+    def __init__(
+        self,
+        log_dir: Path,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        warm_workers: int = DEFAULT_WARM_WORKERS,
+    ):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_concurrent = max(1, max_concurrent)
+        self.warm_workers = max(0, warm_workers)
+        self._lock = threading.Condition()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Deque[str] = collections.deque()
+        self._processes: Dict[str, _WarmProcess] = {}
+        self._warm: List[_WarmProcess] = []
+        self._running = 0
+        self._refill()
+        threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True).start()
+
+    def _refill(self) -> None:
+        while len(self._warm) < self.warm_workers:
+            self._warm.append(_WarmProcess())
+
+    def _take_warm(self) -> _WarmProcess:
+        while self._warm:
+            proc = self._warm.pop(0)
+            if proc.is_alive():
+                return proc
+        return _WarmProcess()
+
+    # -- public API --------------------------------------------------------------
+
+    def submit(
+        self,
+        script: Path,
+        args: List[str],
+        env: Optional[Dict[str, str]] = None,
+        label: str = "",
+        timeout: Optional[float] = None,
+    ) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.log_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        job = {
+            "id": job_id,
+            "label": label or Path(script).name,
+            "script": str(script),
+            "args": list(args),
+            "env": {**(env or {}), EVENTS_ENV: str(job_dir / "events.jsonl")},
+            "timeout": timeout,
+            "status": "queued",
+            "returncode": None,
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "stdout": str(job_dir / "stdout.log"),
+            "stderr": str(job_dir / "stderr.log"),
+            "events": str(job_dir / "events.jsonl"),
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._queue.append(job_id)
+            self._lock.notify_all()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted((dict(j) for j in self._jobs.values()), key=lambda j: j["submitted"], reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] not in ("queued", "running"):
+                return False
+            if job["status"] == "queued":
+                self._queue.remove(job_id)
+                job["status"] = "cancelled"
+                job["finished"] = time.time()
+                return True
+            job["status"] = "cancelling"
+            proc = self._processes.get(job_id)
+        if proc is not None:
+            proc.process.terminate()
+        return True
+
+    # -- dispatching -------------------------------------------------------------
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue or self._running >= self.max_concurrent:
+                    self._lock.wait()
+                job_id = self._queue.popleft()
+                job = self._jobs[job_id]
+                proc = self._take_warm()
+                self._refill()
+                self._processes[job_id] = proc
+                self._running += 1
+                job["status"] = "running"
+                job["started"] = time.time()
+            spec = {k: job[k] for k in ("script", "args", "env", "stdout", "stderr")}
+            try:
+                proc.start(spec)
+            except OSError:
+                # Worker died while idle; the watcher below records the failure
+                pass
+            threading.Thread(target=self._watch, args=(job_id, proc), name=f"job-{job_id}", daemon=True).start()
+
+    def _watch(self, job_id: str, proc: _WarmProcess) -> None:
+        job = self._jobs[job_id]
+        timed_out = False
+        try:
+            proc.process.wait(job["timeout"])
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            proc.process.terminate()
+            proc.process.wait()
+        with self._lock:
+            self._processes.pop(job_id, None)
+            self._running -= 1
+            job["returncode"] = proc.process.returncode
+            job["finished"] = time.time()
+            if job["status"] == "cancelling":
+                job["status"] = "cancelled"
+            elif timed_out:
+                job["status"] = "timeout"
+            else:
+                job["status"] = "done" if proc.process.returncode == 0 else "failed"
+            self._lock.notify_all()
+
+
+if __name__ == "__main__":
+    _warm_worker()
@@ -0,0 +1,323 @@
+"""
+Latency instrumentation for the lab sessions (--metrics).
+- While metrics are on, open_connection() times SSH login and prompt detection
+  (Netmiko's session preparation) separately and wraps the session in
+  MeteredConnection: every send_command (by command), send_config_set and
+  disconnect is timed, with bytes received and errors
+- Timings go into fixed log-spaced bucket histograms, about 19% wide from 0.5 ms
+  to 7 minutes; no samples are kept, so the cost per call is one bisect, whatever
+  the fleet size
+- At the end of the run summary() prints p50/p95/p99 per phase and command plus
+  the slowest devices; --metrics-file writes the same as JSON and --metrics-prom
+  as Prometheus text (node_exporter textfile collector format)
+- When app.py's run dashboard is following the job (tools/events_utils.py),
+  sessions are timed even without --metrics and every timed call is also
+  reported as a call event; nothing is printed then
+"""
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from tools.events_utils import active_events, emit
+
+PHASES = ("login", "prompt", "connect", "send_command", "send_config_set", "disconnect")
+BOUNDS = [0.0005 * 2 ** (i / 4) for i in range(80)]  # upper bucket bounds, seconds
+PROM_PREFIX = "netlab_ssh"
+SLOWEST_DEVICES = 5
+
+Key = Tuple[str, str]  # (phase, command)
+
+_active: Optional["Metrics"] = None
+
+
+def add_metrics_args(parser) -> None:
+    parser.add_argument("--metrics", action="store_true", help="Print SSH timing percentiles per phase and command at the end of the run")
+    parser.add_argument("--metrics-file", help="Also write the timings as JSON to this file (implies --metrics)")
+    parser.add_argument("--metrics-prom", help="Also write the timings in Prometheus text format to this file (implies --metrics)")
+
+
+class Histogram:
+    """Count, sum, min, max and bucket counts of one phase/command; plus bytes and errors."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets", "bytes", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BOUNDS) + 1)  # the last one is +Inf
+        self.bytes = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, nbytes: int = 0, error: bool = False) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BOUNDS, seconds)] += 1
+        self.bytes += nbytes
+        if error:
+            self.errors += 1
+
+    def percentile(self, pct: float) -> float:
+        """Estimate from the buckets, interpolated inside the bucket and clamped to min/max."""
+        if not self.count:
+            return float("nan")
+        rank = pct / 100 * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            if hits and seen + hits >= rank:
+                low = BOUNDS[index - 1] if index else 0.0
+                high = BOUNDS[index] if index < len(BOUNDS) else self.max
+                estimate = low + (high - low) * max(0.0, rank - seen) / hits
+                return min(max(estimate, self.min), self.max)
+            seen += hits
+        return self.max
+
+    def state(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def merge(self, state: Dict[str, Any]) -> None:
+        self.count += state["count"]
+        self.total += state["total"]
+        self.min = min(self.min, state["min"])
+        self.max = max(self.max, state["max"])
+        self.buckets = [a + b for a, b in zip(self.buckets, state["buckets"])]
+        self.bytes += state["bytes"]
+        self.errors += state["errors"]
+
+
+def _ms(seconds: float) -> str:
+    if seconds != seconds:  # nan
+        return "-"
+    return f"{seconds * 1000:.0f}ms" if seconds < 10 else f"{seconds:.1f}s"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Histograms per (phase, command) and total session time per device. Thread-safe."""
+
+    def __init__(self, json_path: Optional[Path] = None, prom_path: Optional[Path] = None, report: bool = True):
+        self.json_path = json_path
+        self.prom_path = prom_path
+        self.report = report  # False: only recording for the run dashboard
+        self._series: Dict[Key, Histogram] = {}
+        self._devices: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, phase: str, command: str, seconds: float, nbytes: int = 0, error: bool = False, device: Optional[str] = None) -> None:
+        with self._lock:
+            series = self._series.get((phase, command))
+            if series is None:
+                series = self._series[(phase, command)] = Histogram()
+            series.observe(seconds, nbytes, error)
+            if device:
+                self._devices[device] = self._devices.get(device, 0.0) + seconds
+        if device:
+            emit("call", device=device, phase=phase, command=command, seconds=round(seconds, 4), error=error)
+
+    @contextmanager
+    def timer(self, phase: str, command: str = "", device: Optional[str] = None) -> Iterator[None]:
+        start = time.perf_counter()
+        error = True
+        try:
+            yield
+            error = False
+        finally:
+            self.observe(phase, command, time.perf_counter() - start, error=error, device=device)
+
+    def state(self) -> Dict[str, Any]:
+        """Everything recorded, as plain data (for merging results from worker processes)."""
+        with self._lock:
+            return {
+                "series": [[phase, command, series.state()] for (phase, command), series in self._series.items()],
+                "devices": dict(self._devices),
+            }
+
+    def merge(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            for phase, command, data in state["series"]:
+                series = self._series.get((phase, command))
+                if series is None:
+                    series = self._series[(phase, command)] = Histogram()
+                series.merge(data)
+            for device, seconds in state["devices"].items():
+                self._devices[device] = self._devices.get(device, 0.0) + seconds
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self._devices.clear()
+
+    def _ordered(self) -> List[Tuple[Key, Histogram]]:
+        rank = {phase: n for n, phase in enumerate(PHASES)}
+        with self._lock:
+            return sorted(self._series.items(), key=lambda item: (rank.get(item[0][0], len(PHASES)), item[0]))
+
+    def slowest(self, count: int = SLOWEST_DEVICES) -> List[Tuple[str, float]]:
+        with self._lock:
+            return sorted(self._devices.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def summary(self) -> str:
+        rows = self._ordered()
+        if not rows:
+            return "===== Timing: no sessions recorded ====="
+        lines = [
+            "===== Timing (per call) =====",
+            f"{'phase':<16} {'command':<28} {'count':>6} {'errors':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'avg bytes':>10}",
+        ]
+        for (phase, command), series in rows:
+            lines.append(
+                f"{phase:<16} {command[:28]:<28} {series.count:>6} {series.errors:>6} {_ms(series.percentile(50)):>7}"
+                f" {_ms(series.percentile(95)):>7} {_ms(series.percentile(99)):>7} {_ms(series.max):>7}"
+                f" {series.bytes // series.count if series.bytes else 0:>10}"
+            )
+        slowest = self.slowest()
+        if slowest:
+            lines.append("Slowest devices (session time): " + ", ".join(f"{device} {_ms(seconds)}" for device, seconds in slowest))
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        series = [
+            {
+                "phase": phase, "command": command, "count": s.count, "errors": s.errors, "bytes": s.bytes,
+                "sum_seconds": s.total, "min_seconds": s.min, "max_seconds": s.max,
+                "p50_seconds": s.percentile(50), "p95_seconds": s.percentile(95), "p99_seconds": s.percentile(99),
+            }
+            for (phase, command), s in self._ordered()
+        ]
+        slowest = [{"device": device, "seconds": seconds} for device, seconds in self.slowest()]
+        return json.dumps({"generated": time.time(), "series": series, "slowest_devices": slowest}, indent=2)
+
+    def prometheus(self) -> str:
+        """Histogram (doubling buckets), bytes and error counters per phase/command."""
+        rows = self._ordered()
+        seconds = [
+            f"# HELP {PROM_PREFIX}_seconds Time per SSH phase and command.",
+            f"# TYPE {PROM_PREFIX}_seconds histogram",
+        ]
+        received = [
+            f"# HELP {PROM_PREFIX}_received_bytes_total Output received per phase and command.",
+            f"# TYPE {PROM_PREFIX}_received_bytes_total counter",
+        ]
+        errors = [
+            f"# HELP {PROM_PREFIX}_errors_total Failed calls per phase and command.",
+            f"# TYPE {PROM_PREFIX}_errors_total counter",
+        ]
+        for (phase, command), series in rows:
+            labels = f'phase="{_label(phase)}",command="{_label(command)}"'
+            cumulative = 0
+            for index, hits in enumerate(series.buckets[:-1]):
+                cumulative += hits
+                if index % 4 == 3:
+                    seconds.append(f'{PROM_PREFIX}_seconds_bucket{{{labels},le="{BOUNDS[index]:.6g}"}} {cumulative}')
+            seconds.append(f'{PROM_PREFIX}_seconds_bucket{{{labels},le="+Inf"}} {series.count}')
+            seconds.append(f"{PROM_PREFIX}_seconds_sum{{{labels}}} {series.total:.6f}")
+            seconds.append(f"{PROM_PREFIX}_seconds_count{{{labels}}} {series.count}")
+            received.append(f"{PROM_PREFIX}_received_bytes_total{{{labels}}} {series.bytes}")
+            errors.append(f"{PROM_PREFIX}_errors_total{{{labels}}} {series.errors}")
+        return "\n".join(seconds + received + errors) + "\n"
+
+    def close(self) -> None:
+        """Print the summary and write the export files; stops recording."""
+        global _active
+        if _active is self:
+            _active = None
+        if not self.report:
+            return
+        print(f"\n{self.summary()}")
+        for path, render in ((self.json_path, self.to_json), (self.prom_path, self.prometheus)):
+            if path is None:
+                continue
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_text(render(), encoding="utf-8")
+                tmp.replace(path)  # a scraper never sees a half-written file
+                print(f"Timings written to {path}")
+            except OSError as exc:
+                print(f"Could not write timings to {path}: {exc}")
+
+
+class MeteredConnection:
+    """A session (Netmiko, brokered or asyncssh) with its calls timed into Metrics."""
+
+    def __init__(self, connection: Any, metrics: Metrics, device: Optional[str]):
+        self._connection = connection
+        self._metrics = metrics
+        self._device = device
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    def observe(self, phase: str, command: str, seconds: float, nbytes: int = 0, error: bool = False) -> None:
+        """Record a call timed elsewhere (e.g. a pipelined command batch) for this device."""
+        self._metrics.observe(phase, command, seconds, nbytes, error, self._device)
+
+    def _timed(self, phase: str, command: str, call: Any, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            output = call(*args, **kwargs)
+        except Exception:
+            self._metrics.observe(phase, command, time.perf_counter() - start, error=True, device=self._device)
+            raise
+        nbytes = len(output) if isinstance(output, str) else 0
+        self._metrics.observe(phase, command, time.perf_counter() - start, nbytes, device=self._device)
+        return output
+
+    def send_command(self, command_string: str, *args: Any, **kwargs: Any) -> Any:
+        return self._timed("send_command", command_string, self._connection.send_command, command_string, *args, **kwargs)
+
+    def send_config_set(self, *args: Any, **kwargs: Any) -> Any:
+        return self._timed("send_config_set", "", self._connection.send_config_set, *args, **kwargs)
+
+    def send_config_from_file(self, *args: Any, **kwargs: Any) -> Any:
+        return self._timed("send_config_set", "", self._connection.send_config_from_file, *args, **kwargs)
+
+    def disconnect(self) -> None:
+        self._timed("disconnect", "", self._connection.disconnect)
+
+    def __enter__(self) -> "MeteredConnection":
+        return self
+
+    def __exit__(self, *exc: Any) -> Any:
+        # The session's own __exit__ sees the exception (a brokered one is discarded, not pooled)
+        return self._timed("disconnect", "", self._connection.__exit__, *exc)
+
+
+def active_metrics() -> Optional[Metrics]:
+    return _active
+
+
+def observe(phase: str, command: str, seconds: float, nbytes: int = 0, error: bool = False, device: Optional[str] = None) -> None:
+    """Record into the active Metrics; does nothing when metrics are off."""
+    metrics = _active
+    if metrics is not None:
+        metrics.observe(phase, command, seconds, nbytes, error, device)
+
+
+def open_metrics(args) -> Optional[Metrics]:
+    """
+    Metrics for a lab started with --metrics/--metrics-file/--metrics-prom, or a
+    silent one while progress events are on (made active for open_connection),
+    else None. Call after open_events().
+    """
+    global _active
+    json_path = getattr(args, "metrics_file", None)
+    prom_path = getattr(args, "metrics_prom", None)
+    report = bool(getattr(args, "metrics", False) or json_path or prom_path)
+    if not report and active_events() is None:
+        return None
+    _active = Metrics(Path(json_path) if json_path else None, Path(prom_path) if prom_path else None, report)
+    return _active
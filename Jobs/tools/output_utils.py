@@ -0,0 +1,94 @@
+"""
+Bounded views of (possibly huge) job log files for the Streamlit UI.
+- LogFollower reads only the bytes added since the last poll and keeps the
+  newest `max_lines` lines, so memory stays flat however large the log grows
+- read_page() returns one fixed-size, line-aligned page of the full log on disk
+"""
+
+import codecs
+import collections
+from pathlib import Path
+from typing import Deque, Tuple
+
+DEFAULT_MAX_LINES = 1000
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+DEFAULT_PAGE_BYTES = 256 * 1024
+
+
+class LogFollower:
+    """Incrementally follows a growing log file, keeping only its tail in memory."""
+
+    def __init__(self, path: str, max_lines: int = DEFAULT_MAX_LINES, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        self.path = Path(path)
+        self.chunk_bytes = chunk_bytes
+        self.lines: Deque[str] = collections.deque(maxlen=max_lines)
+        self.offset = 0
+        self.size = 0
+        self.line_count = 0
+        self.skipped_bytes = 0
+        self._partial = ""
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def poll(self) -> int:
+        """Read new output; returns the number of complete lines added."""
+        try:
+            self.size = self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+        if self.size <= self.offset:
+            return 0
+        skip_to_newline = False
+        if self.size - self.offset > self.chunk_bytes:
+            # Too far behind (first look at a big log, or output faster than we poll):
+            # jump ahead and only keep the most recent chunk.
+            new_offset = self.size - self.chunk_bytes
+            self.skipped_bytes += new_offset - self.offset
+            self.offset = new_offset
+            self._partial = ""
+            self._decoder.reset()
+            skip_to_newline = True
+        with self.path.open("rb") as f:
+            f.seek(self.offset)
+            data = f.read(self.size - self.offset)
+        self.offset += len(data)
+        text = self._partial + self._decoder.decode(data)
+        if skip_to_newline:
+            text = text.split("\n", 1)[1] if "\n" in text else ""
+        parts = text.split("\n")
+        self._partial = parts.pop()
+        self.lines.extend(parts)
+        self.line_count += len(parts)
+        return len(parts)
+
+    def text(self) -> str:
+        tail = "\n".join(self.lines)
+        return f"{tail}\n{self._partial}" if self._partial else tail
+
+    @property
+    def truncated(self) -> bool:
+        return self.skipped_bytes > 0 or self.line_count > len(self.lines)
+
+
+def read_page(path: str, page: int, page_bytes: int = DEFAULT_PAGE_BYTES) -> Tuple[str, int]:
+    """Returns (text, page_count) for one page of the log, cut on line boundaries."""
+    p = Path(path)
+    try:
+        size = p.stat().st_size
+    except FileNotFoundError:
+        return "", 0
+    page_count = max(1, -(-size // page_bytes))
+    page = min(max(0, page), page_count - 1)
+    start = page * page_bytes
+    with p.open("rb") as f:
+        f.seek(start)
+        data = f.read(page_bytes)
+        # Finish the last line of this page; the next page skips it
+        if start + len(data) < size and not data.endswith(b"\n"):
+            data += f.readline()
+    if start > 0:
+        with p.open("rb") as f:
+            f.seek(start - 1)
+            starts_on_line = f.read(1) == b"\n"
+        if not starts_on_line:
+            data = data.split(b"\n", 1)[1] if b"\n" in data else b""
+    return data.decode("utf-8", errors="replace"), page_count
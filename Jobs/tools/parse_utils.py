@@ -0,0 +1,164 @@
+"""
+Structured parsing of show command output with ntc-templates/TextFSM (--parse).
+- The ntc-templates index is read once per process and every TextFSM template is
+  compiled once per process, instead of clitable re-reading it for each device
+- OutputParser parses small outputs in the calling thread and hands large ones
+  to a process pool, so parsing a big routing table does not hold up collection
+- Commands without a template keep their raw output
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_PROCESS_THRESHOLD = 64 * 1024
+
+Records = List[Dict[str, Any]]
+
+_index: Any = None
+_lookups: Dict[Tuple[str, str], Optional[str]] = {}
+_templates: Dict[str, Tuple[Any, threading.Lock]] = {}
+_cache_lock = threading.Lock()
+
+
+def add_parse_args(parser) -> None:
+    parser.add_argument("--parse", action="store_true", help="Print show command output as structured records (ntc-templates/TextFSM)")
+
+
+def _template_dir() -> str:
+    """
+    The ntc-templates directory: NTC_TEMPLATES_DIR (the variable ntc-templates
+    itself honours), else the templates folder shipped in the package. The
+    package's private lookup is only asked when neither exists.
+    """
+    configured = os.environ.get("NTC_TEMPLATES_DIR")
+    if configured:
+        return configured
+    import ntc_templates
+
+    packaged = os.path.join(os.path.dirname(ntc_templates.__file__), "templates")
+    if os.path.isdir(packaged):
+        return packaged
+    from ntc_templates.parse import _get_template_dir  # a source checkout keeps templates elsewhere
+
+    return _get_template_dir()
+
+
+def _template_for(platform: str, command: str) -> Optional[str]:
+    """Template file name(s) for this platform/command from the index, or None."""
+    global _index
+    key = (platform, command)
+    with _cache_lock:
+        if key in _lookups:
+            return _lookups[key]
+        if _index is None:
+            from textfsm import clitable
+
+            _index = clitable.CliTable("index", _template_dir()).index
+        row = _index.GetRowMatch({"Platform": platform, "Command": command})
+        name = _index.index[row]["Template"] if row else None
+        _lookups[key] = name
+        return name
+
+
+def _compiled(name: str) -> Tuple[Any, threading.Lock]:
+    with _cache_lock:
+        cached = _templates.get(name)
+        if cached is None:
+            import textfsm
+
+            with open(os.path.join(_template_dir(), name), encoding="utf-8") as f:
+                cached = (textfsm.TextFSM(f), threading.Lock())
+            _templates[name] = cached
+        return cached
+
+
+def parse_output(platform: str, command: str, text: str) -> Optional[Records]:
+    """
+    Records (lower-case field names, like ntc_templates.parse.parse_output) for
+    one command's output, or None when there is no template for the command.
+    """
+    name = _template_for(platform, command)
+    if name is None:
+        return None
+    if ":" in name:
+        # Several templates merged on their key fields; leave that to clitable
+        from ntc_templates.parse import parse_output as ntc_parse_output
+
+        return ntc_parse_output(platform=platform, command=command, data=text)
+    fsm, lock = _compiled(name)
+    # A compiled template keeps parse state, so one thread at a time per template
+    with lock:
+        fsm.Reset()
+        rows = fsm.ParseText(text)
+        header = [h.lower() for h in fsm.header]
+    return [dict(zip(header, row)) for row in rows]
+
+
+class OutputParser:
+    """parse_output() with large outputs sent to a process pool."""
+
+    def __init__(self, processes: Optional[int] = None, threshold: int = DEFAULT_PROCESS_THRESHOLD):
+        self.processes = processes or os.cpu_count() or 1
+        self.threshold = threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: the labs call this from worker threads, where fork is unsafe
+                self._pool = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def submit(self, platform: str, command: str, text: str) -> "Future[Optional[Records]]":
+        if len(text) >= self.threshold:
+            return self._get_pool().submit(parse_output, platform, command, text)
+        future: "Future[Optional[Records]]" = Future()
+        try:
+            future.set_result(parse_output(platform, command, text))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def render_parsed(output: str, parsed: "Future[Optional[Records]]") -> str:
+    """One JSON record per line, or the raw output with a note when parsing was not possible."""
+    try:
+        records = parsed.result()
+    except Exception as exc:
+        return f"{output}\n(could not parse: {exc})"
+    if records is None:
+        return f"{output}\n(no TextFSM template for this command; raw output shown)"
+    if not records:
+        return f"{output}\n(the TextFSM template matched no records; raw output shown)"
+    return "\n".join(json.dumps(record) for record in records)
+
+
+def render_output(parser: Optional[OutputParser], platform: str, command: str, output: str) -> str:
+    """Text to print for one command's output. Unchanged when parser is None."""
+    if parser is None:
+        return output
+    return render_parsed(output, parser.submit(platform, command, output))
+
+
+def parse_outputs(
+    parser: Optional[OutputParser],
+    platform: str,
+    outputs: Sequence[Tuple[str, str]],
+) -> List[Tuple[str, str]]:
+    """(command, output) pairs -> (command, text to print). Unchanged when parser is None."""
+    if parser is None:
+        return list(outputs)
+    # Submit everything first so large outputs parse side by side in the pool
+    pending = [(cmd, output, parser.submit(platform, cmd, output)) for cmd, output in outputs]
+    return [(cmd, render_parsed(output, parsed)) for cmd, output, parsed in pending]
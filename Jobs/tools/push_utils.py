@@ -0,0 +1,242 @@
+"""
+Config push engine for Lab 3.
+- config_for() picks each device's config: a per-device entry in the Lab 3 config
+  JSON, the classic R51 lines / R52 file for the first two CSV rows, or the default
+- Rollout pushes in waves: a canary first, then cumulative percentages of the
+  remaining targets (--waves 25,100), with up to --workers devices in parallel per wave
+- After any wave with more than --max-failures failed devices, the remaining waves are skipped
+- With --skip-unchanged, each target's running-config comes from the snapshot cache
+  (snapshot_utils) and only the lines it is missing are pushed; devices already
+  configured are skipped
+"""
+
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from tools.inventory_utils import Device
+from tools.runner_utils import run_devices
+from tools.snapshot_utils import RUNNING_CONFIG_COMMAND, ConfigPath, SectionIndex, SnapshotCache
+
+DEFAULT_CANARY = 1
+DEFAULT_WAVES = "25,100"
+DEFAULT_MAX_FAILURES = 0
+
+ConfigSource = Tuple[str, Any]  # ("lines", [str, ...]) or ("file", Path)
+
+# Unindented lines that open a config mode; the lines after them belong to that mode
+PARENT_KEYWORDS = (
+    "interface ", "router ", "line ", "vrf definition ", "ip vrf ", "ip access-list ",
+    "ipv6 access-list ", "route-map ", "class-map ", "policy-map ", "key chain ", "ipv6 router ",
+)
+NESTED_KEYWORDS = ("address-family ",)
+# Unindented lines that are always global, even right after a mode line
+GLOBAL_KEYWORDS = (
+    "hostname ", "ip route ", "ipv6 route ", "ntp ", "logging ", "snmp-server ",
+    "username ", "banner ", "service ", "ip domain", "ip name-server ", "spanning-tree ",
+)
+
+
+def add_push_args(parser) -> None:
+    parser.add_argument("--canary", type=int, default=DEFAULT_CANARY, help="Devices in the first (canary) wave")
+    parser.add_argument("--waves", type=parse_waves, default=DEFAULT_WAVES, help="Cumulative percentages of the remaining targets per wave, e.g. 10,50,100")
+    parser.add_argument("--max-failures", type=int, default=DEFAULT_MAX_FAILURES, help="Stop before the next wave once more devices than this have failed")
+    parser.add_argument("--skip-unchanged", action="store_true", help="Compare with the running-config first and push only missing lines")
+
+
+def parse_waves(text: str) -> List[float]:
+    """"10,50,100" -> [10.0, 50.0, 100.0]; a final 100% wave is always added."""
+    values = [float(p) for p in text.split(",") if p.strip()]
+    percentages = sorted({min(100.0, p) for p in values if p > 0})
+    if not percentages or percentages[-1] < 100:
+        percentages.append(100.0)
+    return percentages
+
+
+def plan_waves(devices: Sequence[Device], canary: int, percentages: Sequence[float]) -> List[List[Device]]:
+    """Canary wave, then one wave per cumulative percentage of the rest (empty waves dropped)."""
+    devices = list(devices)
+    canary = max(0, canary)
+    waves = [devices[:canary]] if canary and devices else []
+    rest = devices[canary:]
+    done = 0
+    for pct in percentages:
+        upto = min(len(rest), math.ceil(len(rest) * pct / 100))
+        if upto > done:
+            waves.append(rest[done:upto])
+            done = upto
+    return waves
+
+
+def _as_source(value: Any, root: Path) -> Optional[ConfigSource]:
+    if isinstance(value, dict) and value.get("file"):
+        value = value["file"]
+    elif isinstance(value, dict):
+        value = value.get("lines")
+    if isinstance(value, list):
+        return ("lines", [str(line) for line in value]) if value else None
+    if isinstance(value, str) and value:
+        path = Path(value)
+        return ("file", path if path.is_absolute() else root / path)
+    return None
+
+
+def config_for(device: Device, lab3_cfg: Dict[str, Any], root: Path) -> Optional[ConfigSource]:
+    """
+    Config for one device, by priority: device_configs[hostname or IP], then
+    r51_config (first CSV row) / r52_config_file (second row), then default_config.
+    A list means inline lines (send_config_set), a string is a config file path
+    (send_config_from_file); relative paths are resolved against `root`.
+    """
+    per_device = {str(k).lower(): v for k, v in (lab3_cfg.get("device_configs") or {}).items()}
+    for key in (device.hostname, device.ip):
+        if key and key.lower() in per_device:
+            return _as_source(per_device[key.lower()], root)
+    if device.index == 0 and lab3_cfg.get("r51_config"):
+        return _as_source(lab3_cfg["r51_config"], root)
+    if device.index == 1 and lab3_cfg.get("r52_config_file"):
+        return _as_source(lab3_cfg["r52_config_file"], root)
+    return _as_source(lab3_cfg.get("default_config"), root)
+
+
+def source_lines(source: ConfigSource) -> List[str]:
+    kind, value = source
+    if kind == "file":
+        if not Path(value).exists():
+            raise FileNotFoundError(f"Config file not found: {value}")
+        value = Path(value).read_text(encoding="utf-8").splitlines()
+    return [line.rstrip() for line in value if line.strip() and not line.strip().startswith("!")]
+
+
+def push_config(net_connect: Any, source: ConfigSource) -> str:
+    kind, value = source
+    if kind == "file":
+        if not Path(value).exists():
+            raise FileNotFoundError(f"Config file not found: {value}")
+        return net_connect.send_config_from_file(str(value))
+    return net_connect.send_config_set(value)
+
+
+# -- idempotent push ---------------------------------------------------------------
+
+
+def intended_paths(lines: Sequence[str]) -> List[ConfigPath]:
+    """
+    Paths for config lines as they are written for send_config_set(). Indentation
+    is used when present; unindented lines after a mode line (router, interface,
+    ...) are taken to be inside that mode, unless they are known global commands.
+    """
+    paths: List[ConfigPath] = []
+    stack: List[str] = []
+    for raw in lines:
+        text = raw.strip()
+        if not text:
+            continue
+        if text in ("exit", "end"):
+            stack = stack[:-1] if text == "exit" else []
+            continue
+        if raw[:1].isspace():
+            depth = 1 + (len(raw) - len(raw.lstrip())) // 2 if stack else 0
+            stack = stack[:max(1, min(len(stack), depth))] if stack else []
+        elif text.startswith(PARENT_KEYWORDS) or text.startswith(GLOBAL_KEYWORDS):
+            stack = []
+        elif text.startswith(NESTED_KEYWORDS):
+            stack = stack[:1]
+        path = tuple(stack) + (text,)
+        paths.append(path)
+        if text.startswith(PARENT_KEYWORDS) or text.startswith(NESTED_KEYWORDS):
+            stack = list(path)
+    return paths
+
+
+def missing_lines(lines: Sequence[str], running: SectionIndex) -> List[str]:
+    """
+    The config lines (with the mode lines needed to reach them) that the running
+    config does not have yet. Empty when the device is already in the desired state.
+    """
+    have = running.paths
+    out: List[str] = []
+    context: ConfigPath = ()
+    for path in intended_paths(lines):
+        leaf = path[-1]
+        if leaf.startswith("no "):
+            # Satisfied by the line itself, or by a section that exists and lacks X;
+            # a section that is not there yet (a new interface) still needs it
+            parent = path[:-1]
+            present = path in have or ((not parent or parent in have) and parent + (leaf[3:],) not in have)
+        else:
+            present = path in have
+        if present:
+            continue
+        if path[:-1] != context:
+            out.extend(path[:-1])
+            context = path[:-1]
+        out.append(leaf)
+        if leaf.startswith(PARENT_KEYWORDS) or leaf.startswith(NESTED_KEYWORDS):
+            context = path
+    return out
+
+
+def push_missing(net_connect: Any, device: Device, source: ConfigSource, snapshots: Optional[SnapshotCache]) -> Optional[str]:
+    """
+    Push only what the running-config lacks; None when nothing had to be pushed.
+    The running-config comes from the snapshot cache, whose entry for the device is
+    dropped once anything was sent to it.
+    """
+    lines = source_lines(source)
+    if snapshots is not None:
+        index = snapshots.get(device, net_connect).index
+    else:
+        index = SectionIndex(net_connect.send_command(RUNNING_CONFIG_COMMAND))
+    missing = missing_lines(lines, index)
+    if not missing:
+        return None
+    try:
+        return net_connect.send_config_set(missing)
+    finally:
+        if snapshots is not None:
+            snapshots.invalidate(device)
+
+
+class Rollout:
+    """Wave plan for a set of push targets, plus what happened while running it."""
+
+    def __init__(self, targets: Sequence[Device], canary: int, percentages: Sequence[float], max_failures: int):
+        self.waves = plan_waves(targets, canary, percentages)
+        self.canary = bool(canary) and bool(self.waves)
+        self.max_failures = max(0, max_failures)
+        self.pushed: List[Device] = []
+        self.unchanged: List[Device] = []
+        self.failed: List[Device] = []
+        self.skipped: List[Device] = []
+
+    def label(self, number: int) -> str:
+        size = len(self.waves[number - 1])
+        kind = " (canary)" if number == 1 and self.canary else ""
+        return f"Wave {number}/{len(self.waves)}{kind}: {size} device(s)"
+
+    def run(self, task, workers: int, timeout: float) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yields (wave number, run_devices() result), wave by wave, in target order.
+        A task that returns None is counted as already in the desired state.
+        """
+        for number, wave in enumerate(self.waves, 1):
+            for result in run_devices(wave, task, workers=workers, timeout=timeout):
+                if not result["ok"]:
+                    self.failed.append(result["device"])
+                elif result["output"] is None:
+                    self.unchanged.append(result["device"])
+                else:
+                    self.pushed.append(result["device"])
+                yield number, result
+            if len(self.failed) > self.max_failures:
+                self.skipped = [device for later in self.waves[number:] for device in later]
+                return
+
+    def summary(self) -> str:
+        text = f"{len(self.pushed)} pushed, {len(self.failed)} failed"
+        if self.unchanged:
+            text += f", {len(self.unchanged)} already configured"
+        if self.skipped:
+            text += f", {len(self.skipped)} skipped (stopped after {len(self.failed)} failure(s); --max-failures {self.max_failures})"
+        return text
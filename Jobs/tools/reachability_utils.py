@@ -0,0 +1,124 @@
+"""
+Fast pre-flight reachability filter for the lab device loops.
+- --precheck probes TCP port 22 (or --precheck-port, or the device's CSV port) on every device in parallel
+- Unreachable devices are dropped before Netmiko spends its full connect timeout on them
+- Probe results are cached on disk for --precheck-ttl seconds, so back-to-back runs skip probing
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from tools.events_utils import emit_done
+from tools.inventory_utils import Device
+from tools.runner_utils import run_devices
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE_PATH = ROOT / "runs" / "reachability-cache.json"
+DEFAULT_PORT = 22
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_CONCURRENCY = 100
+DEFAULT_TTL = 60.0
+
+
+def add_precheck_args(parser) -> None:
+    parser.add_argument("--precheck", action="store_true", help="Skip devices whose SSH port does not answer a quick TCP probe")
+    parser.add_argument("--precheck-port", type=int, default=DEFAULT_PORT, help="TCP port probed by --precheck")
+    parser.add_argument("--precheck-timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each probe")
+    parser.add_argument("--precheck-ttl", type=float, default=DEFAULT_TTL, help="Seconds to reuse cached probe results (0 = always probe)")
+
+
+def probe(ip: str, port: int = DEFAULT_PORT, timeout: float = DEFAULT_TIMEOUT) -> Tuple[bool, str]:
+    try:
+        with socket.create_connection((ip, port), timeout=timeout):
+            return True, ""
+    except socket.timeout:
+        return False, f"no answer on port {port} within {timeout:g}s"
+    except ConnectionRefusedError:
+        return False, f"port {port} refused the connection"
+    except OSError as exc:
+        return False, exc.strerror or str(exc)
+
+
+def _load_cache(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: Path, cache: Dict[str, Any], ttl: float) -> None:
+    now = time.time()
+    fresh = {k: v for k, v in cache.items() if now - v[0] < ttl}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(fresh), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def filter_reachable(
+    devices: Iterable[Device],
+    unreachable: List[Tuple[Device, str]],
+    port: int = DEFAULT_PORT,
+    timeout: float = DEFAULT_TIMEOUT,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ttl: float = DEFAULT_TTL,
+    cache_path: Path = DEFAULT_CACHE_PATH,
+) -> Iterator[Device]:
+    """
+    Yield the devices that answer on their inventory port (else `port`), in
+    inventory order, while probing up to `concurrency` at once. Devices that do
+    not answer are appended to `unreachable` as (device, reason) instead.
+    """
+    cache = _load_cache(cache_path) if ttl > 0 else {}
+    lock = threading.Lock()
+
+    def check(device: Device) -> Tuple[bool, str]:
+        device_port = device.port or port
+        key = f"{device.ip}:{device_port}"
+        with lock:
+            hit = cache.get(key)
+        if hit and time.time() - hit[0] < ttl:
+            return hit[1], hit[2]
+        reachable, reason = probe(device.ip, device_port, timeout)
+        with lock:
+            cache[key] = [time.time(), reachable, reason]
+        return reachable, reason
+
+    for result in run_devices(devices, check, workers=concurrency, timeout=timeout + 5):
+        reachable, reason = result["output"] if result["ok"] else (False, result["error"])
+        if reachable:
+            yield result["device"]
+        else:
+            unreachable.append((result["device"], reason))
+            emit_done(result["device"], False, reason, skipped=True)
+    if ttl > 0:
+        _save_cache(cache_path, cache, ttl)
+
+
+def apply_precheck(devices: Iterable[Device], args, unreachable: List[Tuple[Device, str]]) -> Iterable[Device]:
+    """Wrap `devices` in filter_reachable() when the lab was started with --precheck."""
+    if not getattr(args, "precheck", False):
+        return devices
+    return filter_reachable(
+        devices,
+        unreachable,
+        port=args.precheck_port,
+        timeout=args.precheck_timeout,
+        ttl=args.precheck_ttl,
+    )
+
+
+def print_unreachable(unreachable: List[Tuple[Device, str]]) -> None:
+    if not unreachable:
+        return
+    print(f"\n===== Skipped {len(unreachable)} unreachable device(s) =====")
+    for device, reason in unreachable:
+        print(f"{device.name} ({device.ip}): {reason}")
@@ -0,0 +1,272 @@
+"""
+Local SQLite store for collected show output (--results-db).
+- One row per device/command per run: run_id, device, ip, command, ts, ok, error,
+  elapsed, output, plus line_count and, with --record-counts, record_count
+  (TextFSM records, when a template exists)
+- Rows are queued and written by a background thread in batched executemany()
+  transactions, so the lab's print loop never waits on the disk; the writer
+  only inserts, and --record-counts parses in the device worker that adds the row
+- Indexed by device and by command, so fleet-wide questions are answered
+  from the index instead of re-scanning logs, e.g.:
+    python -m tools.results_utils runs/results.db drops --command "show ip route"
+"""
+
+import argparse
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from tools.inventory_utils import Device
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DB = ROOT / "runs" / "results.db"
+DEFAULT_BATCH_SIZE = 500
+_FLUSH_SECONDS = 1.0
+_IDLE = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lab TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    device TEXT NOT NULL,
+    ip TEXT,
+    command TEXT,
+    ts REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    error TEXT,
+    elapsed REAL,
+    output TEXT,
+    line_count INTEGER,
+    record_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_device ON results(device, command, run_id);
+CREATE INDEX IF NOT EXISTS results_command ON results(command, run_id, device);
+"""
+
+_INSERT = (
+    "INSERT INTO results (run_id, device, ip, command, ts, ok, error, elapsed, output, line_count, record_count)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def add_results_args(parser) -> None:
+    parser.add_argument("--results-db", help=f"Also store every command's output in this SQLite file (e.g. {DEFAULT_DB.relative_to(ROOT)})")
+    parser.add_argument("--record-counts", action="store_true", help="With --results-db, also store the TextFSM record count of every output (parses each one)")
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path), timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def _record_count(platform: str, command: str, output: str) -> Optional[int]:
+    from tools.parse_utils import parse_output
+
+    try:
+        records = parse_output(platform, command, output)
+    except Exception:
+        return None
+    return None if records is None else len(records)
+
+
+class ResultStore:
+    """One lab run's results, written in the background. Call close() at the end of the run."""
+
+    def __init__(
+        self,
+        path: Path,
+        lab: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        count_records: bool = False,
+    ):
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.count_records = count_records
+        db = connect(self.path)
+        with db:
+            self.run_id = db.execute("INSERT INTO runs (lab, started) VALUES (?, ?)", (lab, time.time())).lastrowid
+        db.close()
+        self._queue: "queue.Queue[Optional[Tuple[Any, ...]]]" = queue.Queue(maxsize=self.batch_size * 4)
+        self._error: Optional[BaseException] = None
+        self._writer = threading.Thread(target=self._write, name="results-writer", daemon=True)
+        self._writer.start()
+
+    def add(
+        self,
+        device: Device,
+        command: Optional[str],
+        output: Optional[str] = None,
+        error: Optional[str] = None,
+        elapsed: Optional[float] = None,
+    ) -> None:
+        """One command's output, or an error (command=None when the device itself failed)."""
+        if self._error is not None:
+            return
+        line_count = record_count = None
+        if output is not None:
+            line_count = output.count("\n") + 1 if output else 0
+            if self.count_records and command:
+                record_count = _record_count(device.device_type, command, output)
+        self._queue.put((
+            self.run_id, device.name, device.ip, command, time.time(), int(error is None), error, elapsed, output,
+            line_count, record_count,
+        ))
+
+    def add_outputs(self, device: Device, outputs: Sequence[Tuple[str, str]]) -> None:
+        for cmd, output in outputs:
+            self.add(device, cmd, output)
+
+    def _write(self) -> None:
+        db = None
+        batch: List[Tuple[Any, ...]] = []
+        closing = False
+        try:
+            db = connect(self.path)
+            while not closing:
+                try:
+                    item = self._queue.get(timeout=_FLUSH_SECONDS)
+                except queue.Empty:
+                    item = _IDLE
+                if item is None:
+                    closing = True
+                elif item is not _IDLE:
+                    batch.append(item)
+                # Write when the batch is full, the lab goes quiet, or the run ends
+                if batch and (closing or item is _IDLE or len(batch) >= self.batch_size):
+                    with db:
+                        db.executemany(_INSERT, batch)
+                    batch = []
+            with db:
+                db.execute("UPDATE runs SET finished = ? WHERE run_id = ?", (time.time(), self.run_id))
+        except BaseException as exc:
+            self._error = exc
+            # Keep draining so producers never block on a dead writer
+            while not closing:
+                closing = self._queue.get() is None
+        finally:
+            if db is not None:
+                db.close()
+
+    def close(self) -> None:
+        """Flush queued rows and mark the run finished."""
+        self._queue.put(None)
+        self._writer.join()
+        if self._error is not None:
+            print(f"Could not write results to {self.path}: {self._error}")
+
+
+def open_results(args, lab: str) -> Optional[ResultStore]:
+    """ResultStore for a lab started with --results-db, else None. Prints problems instead of raising."""
+    path = getattr(args, "results_db", None)
+    if not path:
+        return None
+    try:
+        store = ResultStore(Path(path), lab, count_records=getattr(args, "record_counts", False))
+    except (OSError, sqlite3.Error) as exc:
+        print(f"Results DB {path} not available ({exc}); results will not be stored.")
+        return None
+    print(f"Storing results in {path} as run {store.run_id}")
+    return store
+
+
+# -- queries ---------------------------------------------------------------------
+
+
+def last_runs(db: sqlite3.Connection, command: str, lab: Optional[str] = None, count: int = 2) -> List[int]:
+    """IDs of the newest `count` runs that collected `command`, newest first."""
+    sql = "SELECT run_id FROM runs r WHERE EXISTS (SELECT 1 FROM results WHERE command = ? AND run_id = r.run_id)"
+    params: List[Any] = [command]
+    if lab:
+        sql += " AND lab = ?"
+        params.append(lab)
+    sql += " ORDER BY run_id DESC LIMIT ?"
+    params.append(count)
+    return [row[0] for row in db.execute(sql, params)]
+
+
+def count_drops(db: sqlite3.Connection, command: str = "show ip route", lab: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Devices whose record count for `command` (lines when there is no template)
+    fell between the previous run and the latest one, biggest drop first.
+    """
+    runs = last_runs(db, command, lab)
+    if len(runs) < 2:
+        return []
+    current, previous = runs
+    rows = db.execute(
+        """
+        SELECT cur.device, prev.n, cur.n
+        FROM (SELECT device, COALESCE(record_count, line_count) AS n FROM results
+              WHERE command = ? AND run_id = ? AND ok = 1) AS cur
+        JOIN (SELECT device, COALESCE(record_count, line_count) AS n FROM results
+              WHERE command = ? AND run_id = ? AND ok = 1) AS prev
+          ON prev.device = cur.device
+        WHERE cur.n < prev.n
+        ORDER BY prev.n - cur.n DESC, cur.device
+        """,
+        (command, current, command, previous),
+    )
+    return [
+        {"device": device, "previous": before, "current": after, "previous_run": previous, "run": current}
+        for device, before, after in rows
+    ]
+
+
+def list_runs(db: sqlite3.Connection, limit: int = 20) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        """
+        SELECT r.run_id, r.lab, r.started, r.finished,
+               (SELECT COUNT(DISTINCT device) FROM results WHERE run_id = r.run_id)
+        FROM runs r ORDER BY r.run_id DESC LIMIT ?
+        """,
+        (limit,),
+    )
+    return [
+        {"run_id": run_id, "lab": lab, "started": started, "finished": finished, "devices": devices}
+        for run_id, lab, started, finished, devices in rows
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the lab results database")
+    parser.add_argument("db", nargs="?", default=str(DEFAULT_DB), help="Path to the results SQLite file")
+    sub = parser.add_subparsers(dest="query", required=True)
+    sub_runs = sub.add_parser("runs", help="List recent runs")
+    sub_runs.add_argument("--limit", type=int, default=20)
+    sub_drops = sub.add_parser("drops", help="Devices whose record count dropped since the previous run")
+    sub_drops.add_argument("--command", default="show ip route")
+    sub_drops.add_argument("--lab", help="Only compare runs of this lab")
+    args = parser.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"Results DB not found at {args.db}")
+        return
+    db = connect(Path(args.db))
+    if args.query == "runs":
+        for run in list_runs(db, args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+            print(f"{run['run_id']:>6}  {started}  {run['lab']:<8}  {run['devices']} device(s)")
+    else:
+        drops = count_drops(db, args.command, args.lab)
+        if not drops:
+            print(f"No device's '{args.command}' count dropped since the previous run.")
+        for row in drops:
+            print(f"{row['device']}: {row['previous']} -> {row['current']}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Shared execution engine for the lab device loops.
+- Runs a per-device task on a bounded pool of worker threads (--workers)
+- Gives up on a device that runs longer than --device-timeout seconds, or that
+  the app cancelled while the job runs (tools/events_utils.py)
+- Yields one result per device in inventory order, as soon as it is ready
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from tools.events_utils import CANCELLED, cancel_check, emit_done
+
+DEFAULT_WORKERS = 10
+DEFAULT_DEVICE_TIMEOUT = 300.0
+_POLL_SECONDS = 0.2
+
+
+def add_runner_args(parser) -> None:
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of devices to work on at the same time")
+    parser.add_argument("--device-timeout", type=float, default=DEFAULT_DEVICE_TIMEOUT, help="Seconds before giving up on a single device (0 = no limit)")
+
+
+class _Slot:
+    __slots__ = ("index", "device", "started", "done", "result", "abandoned", "lock")
+
+    def __init__(self, index: int, device: Any):
+        self.index = index
+        self.device = device
+        self.started: Optional[float] = None
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.abandoned = False
+        self.lock = threading.Lock()  # settles a result arriving just as the device times out
+
+
+def _result(slot: _Slot, ok: bool, output: Any, error: Optional[str], elapsed: float) -> Dict[str, Any]:
+    return {
+        "index": slot.index,
+        "device": slot.device,
+        "ok": ok,
+        "output": output,
+        "error": error,
+        "elapsed": elapsed,
+    }
+
+
+def _worker(
+    pending: "queue.Queue[Optional[_Slot]]",
+    task: Callable[[Any], Any],
+    cancelled: Optional[Callable[[Any], bool]],
+    running: Dict[int, _Slot],
+) -> None:
+    while True:
+        slot = pending.get()
+        if slot is None:
+            return
+        slot.started = time.monotonic()
+        if cancelled is not None and cancelled(slot.device):
+            result = _result(slot, False, None, CANCELLED, 0.0)  # cancelled before it started
+        else:
+            running[slot.index] = slot
+            try:
+                output = task(slot.device)
+                result = _result(slot, True, output, None, time.monotonic() - slot.started)
+            except Exception as exc:
+                result = _result(slot, False, None, str(exc) or exc.__class__.__name__, time.monotonic() - slot.started)
+            finally:
+                running.pop(slot.index, None)
+        with slot.lock:
+            if slot.abandoned:
+                return  # a replacement worker already took this thread's place
+            slot.result = result
+            slot.done.set()
+
+
+def _wait_for(slot: _Slot, timeout: float, poll: Optional[Callable[[], None]]) -> Optional[str]:
+    """None once the slot has its result, else the timeout error. poll(), if given, runs every _POLL_SECONDS meanwhile."""
+    while not slot.done.is_set():
+        if slot.started is None:
+            wait: Optional[float] = _POLL_SECONDS
+        elif timeout:
+            wait = slot.started + timeout - time.monotonic()
+            if wait <= 0:
+                return f"timed out after {timeout:g}s"
+        else:
+            wait = None
+        if poll is not None:
+            poll()
+            wait = _POLL_SECONDS if wait is None else min(wait, _POLL_SECONDS)
+        slot.done.wait(wait)
+    return None
+
+
+def run_devices(
+    devices: Iterable[Any],
+    task: Callable[[Any], Any],
+    workers: int = DEFAULT_WORKERS,
+    timeout: float = DEFAULT_DEVICE_TIMEOUT,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run task(device) for every device with at most `workers` running at once.
+    Results are dicts (index, device, ok, output, error, elapsed) yielded in
+    the same order as `devices`. A device that runs past `timeout` seconds is
+    reported as failed and its worker is replaced, so one hung SSH session
+    cannot stall the rest of the run. So is a device cancelled from the app,
+    as soon as it is cancelled, whichever device the output is waiting for.
+    """
+    workers = max(1, int(workers or 1))
+    cancelled = cancel_check()
+    pending: "queue.Queue[Optional[_Slot]]" = queue.Queue(maxsize=workers * 2)
+    ordered: "queue.Queue[Optional[_Slot]]" = queue.Queue()
+    running: Dict[int, _Slot] = {}  # index -> slot a worker is on
+    feed_error: Dict[str, BaseException] = {}
+
+    def start_worker() -> None:
+        threading.Thread(target=_worker, args=(pending, task, cancelled, running), daemon=True).start()
+
+    def give_up(slot: _Slot, reason: str) -> None:
+        with slot.lock:
+            if slot.done.is_set():
+                return  # finished right at the limit
+            # Threads cannot be killed; leave the hung one behind (it exits once
+            # its task returns) and keep the pool at full size.
+            slot.abandoned = True
+            slot.result = _result(slot, False, None, reason, time.monotonic() - slot.started)
+            slot.done.set()
+        start_worker()
+        # On the dashboard now, not when the output order reaches this device
+        emit_done(slot.device, False, reason, slot.result["elapsed"])
+
+    def cancel_requested() -> None:
+        for slot in list(running.values()):
+            if cancelled(slot.device):
+                give_up(slot, CANCELLED)
+
+    def feed() -> None:
+        try:
+            for index, device in enumerate(devices):
+                slot = _Slot(index, device)
+                ordered.put(slot)
+                pending.put(slot)
+        except BaseException as exc:
+            feed_error["error"] = exc
+        finally:
+            ordered.put(None)
+            for _ in range(workers):
+                pending.put(None)
+
+    for _ in range(workers):
+        start_worker()
+    threading.Thread(target=feed, daemon=True).start()
+
+    while True:
+        slot = ordered.get()
+        if slot is None:
+            break
+        reason = _wait_for(slot, timeout, cancel_requested if cancelled is not None else None)
+        if reason is not None:
+            give_up(slot, reason)
+        yield slot.result
+
+    if "error" in feed_error:
+        raise feed_error["error"]
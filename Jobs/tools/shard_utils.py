@@ -0,0 +1,287 @@
+"""
+Multi-process sharded runner for big sweeps (--processes).
+- Netmiko's prompt matching and output handling are CPU-bound and hold the GIL,
+  so one process tops out at one core however many --workers it has
+- ShardPool forks N worker processes that pull devices from one shared queue
+  (a slow shard never leaves the others idle); each runs its own run_devices()
+  pool of --workers sessions
+- The pool is made before the lab opens its results DB, change tracker and
+  parser, so no worker inherits their threads, locks or SQLite handles
+- Results come back over a pipe and are yielded in inventory order, shaped like
+  run_devices() results; finish(device, output) runs in the parent, so SQLite
+  stores, change tracking and parsing stay in one process
+- A worker process that dies only fails the devices it had taken
+- --metrics timings and --adaptive-timeouts samples from the worker processes
+  are merged into the main one
+- Needs the fork start method (Linux, macOS); elsewhere the run stays in one process
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from tools.metrics_utils import active_metrics
+from tools.runner_utils import DEFAULT_DEVICE_TIMEOUT, DEFAULT_WORKERS, run_devices
+from tools.timeout_utils import active_timeouts
+
+_POLL_SECONDS = 0.2
+
+
+def add_shard_args(parser) -> None:
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes, each with its own --workers sessions (0 = one per CPU core)")
+
+
+def process_count(requested: Optional[int]) -> int:
+    if requested == 0:
+        return os.cpu_count() or 1
+    return max(1, int(requested or 1))
+
+
+def _exit_with_parent(parent: int) -> None:
+    # A cancelled job's lab is killed without running its cleanup; do not outlive it
+    while os.getppid() == parent:
+        time.sleep(1)
+    os._exit(1)
+
+
+def _shard(
+    number: int,
+    parent: int,
+    tasks: "multiprocessing.Queue[Any]",
+    conn: Any,
+    task: Callable[[Any], Any],
+    workers: int,
+    timeout: float,
+) -> None:
+    """
+    Body of one worker process: run_devices() over whatever the shared queue
+    hands out. It only uses what task() reaches and the --metrics and
+    --adaptive-timeouts copies inherited from the parent.
+    """
+    threading.Thread(target=_exit_with_parent, args=(parent,), daemon=True).start()
+    metrics = active_metrics()
+    if metrics is not None:
+        metrics.reset()  # the copy inherited from the parent; only this process's calls go back
+    timeouts = active_timeouts()
+    if timeouts is not None:
+        timeouts.take()
+    code = 1
+    try:
+        # run_devices() gets the devices themselves (app cancels and events name
+        # them); the run's index of each one rides alongside, keyed by identity
+        indexes: Dict[int, int] = {}
+
+        def devices() -> Iterator[Any]:
+            for index, device in iter(tasks.get, None):
+                indexes[id(device)] = index
+                yield device
+
+        for result in run_devices(devices(), task, workers=workers, timeout=timeout):
+            index = indexes.pop(id(result["device"]))
+            try:
+                conn.send((index, result["ok"], result["output"], result["error"], result["elapsed"]))
+            except (TypeError, AttributeError, ValueError) as exc:  # output that cannot be pickled
+                conn.send((index, False, None, f"result could not be sent back: {exc}", result["elapsed"]))
+        if metrics is not None:
+            conn.send((None, "metrics", metrics.state()))
+        if timeouts is not None:
+            conn.send((None, "timeouts", timeouts.take()))
+        code = 0
+    except Exception as exc:
+        print(f"Worker process {number} stopped: {exc}")
+    finally:
+        conn.close()
+        # Skip interpreter shutdown: finalizers for objects inherited from the
+        # parent (SQLite connections, pools) must only run in the parent
+        os._exit(code)
+
+
+def _finished(result: Dict[str, Any], finish: Optional[Callable[[Any, Any], Any]]) -> Dict[str, Any]:
+    if finish is None or not result["ok"]:
+        return result
+    try:
+        result["output"] = finish(result["device"], result["output"])
+    except Exception as exc:
+        result.update(ok=False, output=None, error=str(exc) or exc.__class__.__name__)
+    return result
+
+
+class ShardPool:
+    """
+    Worker processes forked as soon as the pool is made, waiting for run() to
+    hand them devices. Make it before the lab opens anything a fork must not
+    copy: the --results-db writer thread and the SQLite handles of
+    --changes-only and --parse. The workers then never hold those objects,
+    whose locks or connections could be copied mid-use. Whatever the task needs
+    in the workers (--metrics, --adaptive-timeouts, progress events) must be
+    open before.
+    """
+
+    def __init__(
+        self,
+        task: Callable[[Any], Any],
+        processes: int = 1,
+        workers: int = DEFAULT_WORKERS,
+        timeout: float = DEFAULT_DEVICE_TIMEOUT,
+    ):
+        self.task = task
+        self.workers = workers
+        self.timeout = timeout
+        self.processes = process_count(processes)
+        if self.processes > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            print("--processes needs the fork start method, which this platform lacks; running in one process.")
+            self.processes = 1
+        self._shards: List[Any] = []
+        self._pipes: List[Any] = []
+        self._tasks: Optional["multiprocessing.Queue[Any]"] = None
+        if self.processes == 1:
+            return
+        context = multiprocessing.get_context("fork")
+        self._tasks = context.Queue(maxsize=self.processes * max(1, workers) * 2)
+        # Forked now, before the lab starts threads or opens stores, so no lock is copied mid-use.
+        # Only open_events()' device count may be running; it shares nothing the workers use.
+        for number in range(self.processes):
+            reader, writer = context.Pipe(duplex=False)
+            shard = context.Process(
+                target=_shard, args=(number, os.getpid(), self._tasks, writer, task, workers, timeout), name=f"shard-{number}", daemon=True
+            )
+            shard.start()
+            writer.close()  # the shard holds the only write end, so its exit reads as EOF here
+            self._shards.append(shard)
+            self._pipes.append(reader)
+
+    def run(self, devices: Iterable[Any], finish: Optional[Callable[[Any, Any], Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Results for `devices`, in order, shaped like run_devices() results.
+        finish(device, output), if given, turns a worker's output into the final
+        output in this process. Runs once; the workers exit when it ends.
+        """
+        if self._tasks is None:
+            task = self.task
+            chained = task if finish is None else (lambda device: finish(device, task(device)))
+            yield from run_devices(devices, chained, workers=self.workers, timeout=self.timeout)
+            return
+
+        tasks = self._tasks
+        shards = self._shards
+        pipes = self._pipes
+        waiting: Dict[int, Any] = {}  # index -> device, handed out and not received back yet
+        fed: Dict[str, Any] = {"total": None}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    tasks.put(item, timeout=_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def feed() -> None:
+            count = 0
+            try:
+                for index, device in enumerate(devices):
+                    with lock:
+                        waiting[index] = device
+                    if not put((index, device)):
+                        return
+                    count += 1
+            except BaseException as exc:
+                fed["error"] = exc
+            finally:
+                for _ in shards:
+                    put(None)
+                with lock:  # only now, so the run cannot end before every shard is told to stop
+                    fed["total"] = count
+
+        threading.Thread(target=feed, name="shard-feeder", daemon=True).start()
+
+        ready: Dict[int, Dict[str, Any]] = {}
+
+        def receive(reader: Any) -> None:
+            try:
+                message = reader.recv()
+            except EOFError:
+                pipes.remove(reader)
+                return
+            if message[0] is None:  # a shard's --metrics / --adaptive-timeouts, sent after its last result
+                merged = active_metrics() if message[1] == "metrics" else active_timeouts()
+                if merged is not None:
+                    merged.merge(message[2])
+                return
+            index, ok, output, error, elapsed = message
+            with lock:
+                device = waiting.pop(index)
+            ready[index] = {"index": index, "device": device, "ok": ok, "output": output, "error": error, "elapsed": elapsed}
+
+        next_index = 0
+        complete = False
+        try:
+            while True:
+                while next_index in ready:
+                    yield _finished(ready.pop(next_index), finish)
+                    next_index += 1
+                with lock:
+                    total = fed["total"]
+                if total is not None and next_index >= total:
+                    break
+                if not pipes:
+                    # Every process is gone: what is still waiting was lost with one
+                    # that died mid-device (or never picked up at all)
+                    with lock:
+                        lost = {index: waiting.pop(index) for index in list(waiting)}
+                    if not lost:
+                        raise RuntimeError("every worker process exited before the inventory was finished")
+                    for index, device in lost.items():
+                        ready[index] = {
+                            "index": index, "device": device, "ok": False, "output": None,
+                            "error": "worker process exited before finishing this device", "elapsed": 0.0,
+                        }
+                    continue
+                for reader in wait(pipes):
+                    receive(reader)
+            # Read to the end of every pipe so no shard's metrics or samples are left behind
+            while pipes:
+                for reader in wait(pipes):
+                    receive(reader)
+            complete = True
+        finally:
+            stop.set()
+            deadline = time.monotonic() + (5 if complete else 0)
+            for shard in shards:
+                shard.join(max(0.0, deadline - time.monotonic()))
+                if shard.exitcode is None:
+                    shard.terminate()
+                    shard.join()
+            for reader in pipes:
+                reader.close()
+            tasks.close()
+            tasks.cancel_join_thread()  # devices never handed out must not hold up exit
+        if "error" in fed:
+            raise fed["error"]
+
+
+def run_sharded(
+    devices: Iterable[Any],
+    task: Callable[[Any], Any],
+    processes: int = 1,
+    workers: int = DEFAULT_WORKERS,
+    timeout: float = DEFAULT_DEVICE_TIMEOUT,
+    finish: Optional[Callable[[Any, Any], Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    run_devices() spread over `processes` worker processes, `workers` sessions
+    each. task(device) runs in a worker process and must return something
+    picklable; finish(device, output), if given, turns it into the final output
+    in this process. With one process this is run_devices() with task and finish
+    chained in its worker threads. The workers are forked on the first result
+    asked for, so nothing may be open then that they must not inherit; a lab
+    that has such stores makes a ShardPool before opening them instead.
+    """
+    yield from ShardPool(task, processes, workers, timeout).run(devices, finish)
@@ -0,0 +1,226 @@
+"""
+Running-config snapshot cache with a section index.
+- `show running-config` is stored once per device (compressed, in runs/snapshots.db),
+  keyed by the device's "Last configuration change" stamp
+- A later run only asks the device for that one stamp line; the full config is
+  fetched again only when the stamp moved (or the snapshot is missing/invalidated)
+- SectionIndex answers lookups such as the description of interface
+  GigabitEthernet1 from the stored snapshot, without touching the device:
+    python -m tools.snapshot_utils C8K-R51 "interface GigabitEthernet1" description
+- Anything that changes a device's config (Lab 3 pushes) must call invalidate()
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from tools.inventory_utils import Device
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_SNAPSHOT_DB = ROOT / "runs" / "snapshots.db"
+RUNNING_CONFIG_COMMAND = "show running-config"
+STAMP_MARKER = "Last configuration change"
+STAMP_COMMAND = f"show running-config | include {STAMP_MARKER}"
+
+ConfigPath = Tuple[str, ...]  # a config line with the mode lines above it
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    device TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    config BLOB NOT NULL
+);
+"""
+
+
+def add_snapshot_args(parser) -> None:
+    parser.add_argument("--snapshot-db", default=str(DEFAULT_SNAPSHOT_DB), help="SQLite file caching running-config snapshots")
+    parser.add_argument("--snapshot-max-age", type=float, default=0, help="Reuse a snapshot this many seconds without checking the device (0 = always check the change stamp)")
+
+
+def config_stamp(text: str) -> str:
+    """The "! Last configuration change at ..." line, or "" if the output has none."""
+    for line in text.splitlines():
+        if STAMP_MARKER in line:
+            return line.strip().lstrip("!").strip()
+    return ""
+
+
+class SectionIndex:
+    """Parsed running-config: every line as a path of its parent mode lines, plus blocks per section."""
+
+    __slots__ = ("paths", "sections")
+
+    def __init__(self, config: str):
+        self.paths: Set[ConfigPath] = set()
+        self.sections: Dict[str, List[str]] = {}
+        stack: List[Tuple[int, str]] = []
+        for raw in config.splitlines():
+            text = raw.strip()
+            if not text or text == "end" or text.startswith(("!", "Building configuration", "Current configuration")):
+                continue
+            indent = len(raw) - len(raw.lstrip(" "))
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            path = tuple(line for _, line in stack) + (text,)
+            self.paths.add(path)
+            if len(path) == 1:
+                self.sections.setdefault(text, [])
+            else:
+                self.sections.setdefault(path[0], []).append(raw.rstrip())
+            stack.append((indent, text))
+
+    def section(self, parent: str) -> Optional[List[str]]:
+        """Lines inside a top-level section ("router eigrp 100"), or None if it does not exist."""
+        return self.sections.get(parent.strip())
+
+    def names(self, prefix: str) -> List[str]:
+        """Top-level sections starting with `prefix`, e.g. names("interface ")."""
+        return [name for name in self.sections if name.startswith(prefix)]
+
+    def get(self, parent: str, keyword: str) -> Optional[str]:
+        """Value of the first `keyword` line in a section: get("interface Gi1", "description") -> "uplink"."""
+        for line in self.sections.get(parent.strip()) or []:
+            text = line.strip()
+            if text == keyword or text.startswith(keyword + " "):
+                return text[len(keyword):].strip()
+        return None
+
+
+class Snapshot:
+    __slots__ = ("device", "stamp", "fetched", "config", "_index")
+
+    def __init__(self, device: str, stamp: str, fetched: float, config: str):
+        self.device = device
+        self.stamp = stamp
+        self.fetched = fetched
+        self.config = config
+        self._index: Optional[SectionIndex] = None
+
+    @property
+    def index(self) -> SectionIndex:
+        if self._index is None:
+            self._index = SectionIndex(self.config)
+        return self._index
+
+
+class SnapshotCache:
+    """
+    Running-config per device. Within one process a snapshot is reused as is;
+    across runs it is reused while the device's change stamp is unchanged.
+    """
+
+    def __init__(self, path: Path = DEFAULT_SNAPSHOT_DB, max_age: float = 0):
+        self.path = Path(path)
+        self.max_age = max_age
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._fresh: Dict[str, Snapshot] = {}
+        self.fetches = 0
+        self.reused = 0
+
+    @staticmethod
+    def key(device: Device) -> str:
+        return device.name
+
+    def stored(self, device: Device) -> Optional[Snapshot]:
+        """The stored snapshot, without contacting the device (None if there is none)."""
+        key = self.key(device)
+        with self._lock:
+            if key in self._fresh:
+                return self._fresh[key]
+            row = self._db.execute("SELECT stamp, fetched, config FROM snapshots WHERE device = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return Snapshot(key, row[0], row[1], zlib.decompress(row[2]).decode("utf-8"))
+
+    def get(self, device: Device, net_connect: Any) -> Snapshot:
+        """Snapshot for a connected device, fetching `show running-config` only when needed."""
+        key = self.key(device)
+        with self._lock:
+            snapshot = self._fresh.get(key)
+        if snapshot is not None:
+            return snapshot
+        snapshot = self.stored(device)
+        if snapshot is not None:
+            young = self.max_age > 0 and time.time() - snapshot.fetched < self.max_age
+            if young or (snapshot.stamp and config_stamp(net_connect.send_command(STAMP_COMMAND)) == snapshot.stamp):
+                with self._lock:
+                    self._fresh[key] = snapshot
+                    self.reused += 1
+                return snapshot
+        config = net_connect.send_command(RUNNING_CONFIG_COMMAND)
+        snapshot = Snapshot(key, config_stamp(config), time.time(), config)
+        with self._lock:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO snapshots (device, stamp, fetched, config) VALUES (?, ?, ?, ?)",
+                    (key, snapshot.stamp, snapshot.fetched, zlib.compress(config.encode("utf-8"))),
+                )
+            self._fresh[key] = snapshot
+            self.fetches += 1
+        return snapshot
+
+    def invalidate(self, device: Device) -> None:
+        """Forget a device's snapshot; call after changing its config."""
+        key = self.key(device)
+        with self._lock:
+            self._fresh.pop(key, None)
+            with self._db:
+                self._db.execute("DELETE FROM snapshots WHERE device = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def open_snapshots(args) -> Optional[SnapshotCache]:
+    """SnapshotCache for a lab's --snapshot-db, or None if it cannot be opened. Prints problems instead of raising."""
+    try:
+        return SnapshotCache(Path(args.snapshot_db), max_age=args.snapshot_max_age)
+    except (OSError, sqlite3.Error) as exc:
+        print(f"Snapshot DB {args.snapshot_db} not available ({exc}); running-config will be read from the devices.")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up values in cached running-config snapshots (no device access)")
+    parser.add_argument("device", help="Device hostname as in the inventory CSV")
+    parser.add_argument("section", nargs="?", help='Top-level section, e.g. "interface GigabitEthernet1"')
+    parser.add_argument("keyword", nargs="?", help='Line keyword inside the section, e.g. "description"')
+    parser.add_argument("--snapshot-db", default=str(DEFAULT_SNAPSHOT_DB), help="SQLite file caching running-config snapshots")
+    args = parser.parse_args()
+
+    if not Path(args.snapshot_db).exists():
+        print(f"No snapshots at {args.snapshot_db}")
+        return
+    cache = SnapshotCache(Path(args.snapshot_db))
+    snapshot = cache.stored(Device(0, args.device, args.device))
+    cache.close()
+    if snapshot is None:
+        print(f"No snapshot for {args.device}")
+        return
+    fetched = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot.fetched))
+    print(f"# {args.device}, fetched {fetched} ({snapshot.stamp or 'no change stamp'})")
+    index = snapshot.index
+    if not args.section:
+        print("\n".join(index.sections))
+    elif not args.keyword:
+        lines = index.section(args.section)
+        print(args.section if lines is not None else f"No section '{args.section}'")
+        print("\n".join(lines or []))
+    else:
+        value = index.get(args.section, args.keyword)
+        print(value if value is not None else f"No '{args.keyword}' under '{args.section}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Adaptive per-command read timeouts learned from earlier runs (--adaptive-timeouts).
+- The response time of every successful send_command (also inside
+  --batch-commands) is kept per device+command in a small SQLite file
+  (runs/timeouts.db): the newest HISTORY_SIZE per pair, plus the newest
+  FLEET_HISTORY_SIZE per command across all devices
+- Each call's read_timeout is the --timeout-percentile (default p99) of that
+  history times --timeout-headroom, kept between --timeout-min and
+  --timeout-max: a hung session fails after a few seconds, while a full-table
+  `show ip route` still gets the time it usually needs on that router
+- A device+command with too little history uses the command's fleet-wide
+  history, then --timeout-default
+- Calls that time out are not recorded, so one stuck run cannot raise the limit
+- New samples are written back once, when the lab ends; --processes workers
+  send theirs to the main process
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_TIMEOUT_DB = ROOT / "runs" / "timeouts.db"
+DEFAULT_PERCENTILE = 99.0
+DEFAULT_HEADROOM = 3.0
+DEFAULT_MIN_TIMEOUT = 5.0
+DEFAULT_MAX_TIMEOUT = 600.0
+DEFAULT_TIMEOUT = 120.0  # nothing learned yet: generous, like the first run of a big table
+HISTORY_SIZE = 50
+FLEET_HISTORY_SIZE = 1000
+MIN_SAMPLES = 5
+FLEET = "*"  # device column of the per-command rows across all devices
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    device TEXT NOT NULL,
+    command TEXT NOT NULL,
+    samples TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (device, command)
+);
+"""
+
+Key = Tuple[str, str]  # (device, command)
+
+_active: Optional["TimeoutManager"] = None
+
+
+def add_timeout_args(parser) -> None:
+    parser.add_argument("--adaptive-timeouts", action="store_true", help="Set each command's read timeout from its response times in earlier runs")
+    parser.add_argument("--timeout-db", default=str(DEFAULT_TIMEOUT_DB), help="SQLite file with the response-time history for --adaptive-timeouts")
+    parser.add_argument("--timeout-percentile", type=float, default=DEFAULT_PERCENTILE, help="Percentile of the history a read timeout is based on")
+    parser.add_argument("--timeout-headroom", type=float, default=DEFAULT_HEADROOM, help="Multiplier on that percentile")
+    parser.add_argument("--timeout-min", type=float, default=DEFAULT_MIN_TIMEOUT, help="Shortest adaptive read timeout, in seconds")
+    parser.add_argument("--timeout-max", type=float, default=DEFAULT_MAX_TIMEOUT, help="Longest adaptive read timeout, in seconds")
+    parser.add_argument("--timeout-default", type=float, default=DEFAULT_TIMEOUT, help="Read timeout for a command with no history yet, in seconds")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, min(len(ordered), -(-len(ordered) * pct // 100)))
+    return ordered[int(rank) - 1]
+
+
+def _is_timeout(exc: Exception) -> bool:
+    # Netmiko's ReadTimeout, asyncssh's and run_command_batch's TimeoutError
+    return isinstance(exc, TimeoutError) or exc.__class__.__name__ in ("ReadTimeout", "NetmikoTimeoutException")
+
+
+class TimeoutManager:
+    """Response-time history per device+command and the read timeouts derived from it. Thread-safe."""
+
+    def __init__(
+        self,
+        path: Path,
+        pct: float = DEFAULT_PERCENTILE,
+        headroom: float = DEFAULT_HEADROOM,
+        minimum: float = DEFAULT_MIN_TIMEOUT,
+        maximum: float = DEFAULT_MAX_TIMEOUT,
+        default: float = DEFAULT_TIMEOUT,
+    ):
+        self.path = Path(path)
+        self.pct = pct
+        self.headroom = headroom
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._db = self._connect()
+        self._limits: Dict[Key, float] = {}
+        self._new: Dict[Key, List[float]] = {}
+        self.timeouts = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(SCHEMA)
+        return db
+
+    def _samples(self, device: str, command: str) -> List[float]:
+        if self._pid != os.getpid():
+            # A --processes worker: never use the connection forked from the parent
+            self._pid = os.getpid()
+            self._db = self._connect()
+        row = self._db.execute("SELECT samples FROM history WHERE device = ? AND command = ?", (device, command)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def read_timeout(self, device: str, command: str) -> float:
+        """Seconds to wait for `command` on `device`, from history recorded before this run."""
+        key = (device, command)
+        with self._lock:
+            limit = self._limits.get(key)
+            if limit is not None:
+                return limit
+            samples = self._samples(device, command)
+            if len(samples) < MIN_SAMPLES:
+                fleet = self._limits.get((FLEET, command))
+                if fleet is None:
+                    samples = self._samples(FLEET, command)
+                    fleet = self._limit(samples)
+                    self._limits[(FLEET, command)] = fleet
+                limit = fleet
+            else:
+                limit = self._limit(samples)
+            self._limits[key] = limit
+            return limit
+
+    def _limit(self, samples: List[float]) -> float:
+        if len(samples) < MIN_SAMPLES:
+            return self.default
+        return min(self.maximum, max(self.minimum, percentile(samples, self.pct) * self.headroom))
+
+    def record(self, device: str, command: str, seconds: float) -> None:
+        with self._lock:
+            self._new.setdefault((device, command), []).append(round(seconds, 4))
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def take(self) -> Dict[str, Any]:
+        """Samples and timeouts recorded in this process since the last take(), as plain data."""
+        with self._lock:
+            state = {"samples": [[device, command, seconds] for (device, command), seconds in self._new.items()], "timeouts": self.timeouts}
+            self._new = {}
+            self.timeouts = 0
+        return state
+
+    def merge(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            for device, command, seconds in state["samples"]:
+                self._new.setdefault((device, command), []).extend(seconds)
+            self.timeouts += state["timeouts"]
+
+    def summary(self) -> str:
+        with self._lock:
+            calls = sum(len(seconds) for seconds in self._new.values())
+            return f"Adaptive read timeouts: {calls} response time(s) recorded, {self.timeouts} read timeout(s) (history in {self.path})"
+
+    def save(self) -> None:
+        """Append this run's samples to the stored history, trimmed to the newest ones."""
+        with self._lock:
+            new = self._new
+            self._new = {}
+        fleet: Dict[str, List[float]] = {}
+        for (device, command), seconds in new.items():
+            fleet.setdefault(command, []).extend(seconds)
+        now = time.time()
+        updates = [(device, command, seconds, HISTORY_SIZE) for (device, command), seconds in new.items()]
+        updates += [(FLEET, command, seconds, FLEET_HISTORY_SIZE) for command, seconds in fleet.items()]
+        with self._lock, self._db:
+            for device, command, seconds, keep in updates:
+                samples = (self._samples(device, command) + seconds)[-keep:]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO history (device, command, samples, updated) VALUES (?, ?, ?, ?)",
+                    (device, command, json.dumps(samples), now),
+                )
+
+    def close(self) -> None:
+        """Print the summary and store the new samples; stops adapting."""
+        global _active
+        if _active is self:
+            _active = None
+        print(f"\n{self.summary()}")
+        try:
+            self.save()
+        except sqlite3.Error as exc:
+            print(f"Could not update timeout history {self.path}: {exc}")
+        with self._lock:
+            self._db.close()
+
+
+class AdaptiveConnection:
+    """A session whose send_command calls get a read_timeout from TimeoutManager."""
+
+    def __init__(self, connection: Any, manager: TimeoutManager, device: str):
+        self._connection = connection
+        self._manager = manager
+        self._device = device
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+    def read_timeout_for(self, command: str) -> float:
+        """Per-command limit for run_command_batch()."""
+        return self._manager.read_timeout(self._device, command)
+
+    def timed_out(self) -> None:
+        """A call that ran past its limit elsewhere (a pipelined command batch)."""
+        self._manager.timed_out()
+
+    def observe(self, phase: str, command: str, seconds: float, nbytes: int = 0, error: bool = False) -> None:
+        """A call timed elsewhere (a pipelined command batch); passed on to --metrics when it is on."""
+        if phase == "send_command" and not error:
+            self._manager.record(self._device, command, seconds)
+        observe = getattr(self._connection, "observe", None)
+        if observe is not None:
+            observe(phase, command, seconds, nbytes, error)
+
+    def send_command(self, command_string: str, *args: Any, **kwargs: Any) -> Any:
+        if args or "read_timeout" in kwargs:
+            return self._connection.send_command(command_string, *args, **kwargs)  # the caller chose
+        start = time.perf_counter()
+        try:
+            output = self._connection.send_command(
+                command_string, read_timeout=self._manager.read_timeout(self._device, command_string), **kwargs
+            )
+        except Exception as exc:
+            if _is_timeout(exc):
+                self._manager.timed_out()
+            raise
+        self._manager.record(self._device, command_string, time.perf_counter() - start)
+        return output
+
+    def disconnect(self) -> None:
+        self._connection.disconnect()
+
+    def __enter__(self) -> "AdaptiveConnection":
+        return self
+
+    def __exit__(self, *exc: Any) -> Any:
+        # The session's own __exit__ sees the exception (a brokered one is discarded, not pooled)
+        return self._connection.__exit__(*exc)
+
+
+def active_timeouts() -> Optional[TimeoutManager]:
+    return _active
+
+
+def open_timeouts(args) -> Optional[TimeoutManager]:
+    """TimeoutManager for a lab started with --adaptive-timeouts (made active for open_connection), else None."""
+    global _active
+    if not getattr(args, "adaptive_timeouts", False):
+        return None
+    try:
+        _active = TimeoutManager(
+            Path(args.timeout_db),
+            pct=args.timeout_percentile,
+            headroom=args.timeout_headroom,
+            minimum=args.timeout_min,
+            maximum=args.timeout_max,
+            default=args.timeout_default,
+        )
+    except (OSError, sqlite3.Error) as exc:
+        print(f"Timeout history {args.timeout_db} not available ({exc}); using fixed read timeouts.")
+        return None
+    return _active
@@ -1,9 +1,14 @@
 import ast
+import atexit
 import json
+import os
+import secrets
+import socket
 import subprocess
 import sys
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import streamlit as st
 
 
@@ -26,8 +31,175 @@ def find_jobs_dir(root: Path) -> Path:
 
 JOBS_DIR = find_jobs_dir(ROOT)
 
+# Shared helpers used by the labs live in Jobs/tools
+TOOLS_ROOT = ROOT / "Jobs"
+if str(TOOLS_ROOT) not in sys.path:
+    sys.path.insert(0, str(TOOLS_ROOT))
+
+from tools.events_utils import RunProgress, request_cancel  # noqa: E402
+from tools.job_utils import ACTIVE_STATES, JobManager  # noqa: E402
+from tools.inventory_utils import load_inventory, only_devices  # noqa: E402
+from tools.output_utils import LogFollower, read_page  # noqa: E402
+
+RUNS_DIR = ROOT / "runs"
+POLL_SECONDS = 1.0
+LOG_HEIGHT = 400
+
+# Environment variables read by Jobs/tools/connect_utils.py to find the session broker
+BROKER_ENV = "NETLAB_BROKER"
+BROKER_KEY_ENV = "NETLAB_BROKER_KEY"
+
+
+@st.cache_resource
+def _start_session_broker():
+    # One broker per Streamlit server, shared by every session and every run
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {BROKER_ENV: f"127.0.0.1:{port}", BROKER_KEY_ENV: secrets.token_hex(16)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "tools.broker_utils", "--port", str(port)],
+        cwd=str(TOOLS_ROOT),
+        env={**os.environ, **env},
+    )
+    atexit.register(proc.terminate)
+    return proc, env
+
+
+def session_broker_env() -> Dict[str, str]:
+    proc, env = _start_session_broker()
+    if proc.poll() is not None:
+        # Broker exited (crash or killed); start a fresh one
+        _start_session_broker.clear()
+        proc, env = _start_session_broker()
+    return env
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    # Shared by every browser session, so several operators can run labs at once
+    return JobManager(RUNS_DIR)
+
+
+def render_log(job: Dict[str, Any], stream: str) -> None:
+    # Only the newest lines live in memory/the browser; the full log stays on disk
+    key = f"log-{job['id']}-{stream}"
+    follower = st.session_state.get(key)
+    if follower is None:
+        follower = st.session_state[key] = LogFollower(job[stream])
+    follower.poll()
+    with st.container(height=LOG_HEIGHT):
+        st.text(follower.text())
+    if follower.truncated:
+        st.caption(f"Showing the last {len(follower.lines)} lines of {follower.size:,} bytes. Full log: {job[stream]}")
+        with st.expander(f"Browse full {stream}"):
+            # Read only the page that is selected (read_page keeps it within the log)
+            selected = st.session_state.get(f"{key}-page", 1)
+            text, pages = read_page(job[stream], selected - 1)
+            st.number_input("Page", min_value=1, max_value=max(1, pages, selected), value=1, key=f"{key}-page")
+            st.text(text)
+
+
+def render_progress(job: Dict[str, Any]) -> Optional[RunProgress]:
+    # Built from the lab's structured events file, not by scraping its stdout
+    key = f"progress-{job['id']}"
+    progress = st.session_state.get(key)
+    if progress is None:
+        progress = st.session_state[key] = RunProgress(job["events"])
+    while progress.poll():
+        pass
+    if not progress.seen:
+        if job["status"] not in ACTIVE_STATES:
+            st.caption("This script does not report per-device progress (Labs 2, 4, 5 and 6 do).")
+        return None
+    counts = progress.counts()
+    fraction = progress.fraction()
+    finished = counts["done"] + counts["failed"]
+    if fraction is not None:
+        st.progress(fraction, text=f"{finished:,} of {progress.total:,} devices")
+    rate = progress.rate()
+    cols = st.columns(5)
+    cols[0].metric("Done", f"{counts['done']:,}")
+    cols[1].metric("Failed", f"{counts['failed']:,}")
+    cols[2].metric("Running", f"{counts['running']:,}")
+    cols[3].metric("Pending", "-" if counts["pending"] is None else f"{counts['pending']:,}")
+    cols[4].metric("Throughput", f"{rate:.1f} dev/s", help="Devices finished per second over the last 30 s (whole run once it ended)")
+    if progress.ended_at is None and job["status"] not in ACTIVE_STATES:
+        st.caption("The job stopped before the lab finished; \"Still running\" lists the devices it was working on.")
+    elif progress.ended_at is None and rate > 0 and counts["pending"] is not None:
+        st.caption(f"About {(counts['pending'] + counts['running']) / rate:,.0f} s left at this rate")
+    stragglers, slow_devices, slow_calls, commands = st.tabs(["Still running", "Slowest devices", "Slowest calls", "Per command"])
+    with stragglers:
+        running = progress.stragglers()
+        st.dataframe(running)
+        if running and job["status"] in ACTIVE_STATES:
+            # The lab gives up on these as if they hit --device-timeout; the rest of the job carries on
+            names = [row["device"] for row in running]
+            chosen = st.multiselect("Devices to cancel", names, key=f"{key}-cancel")
+            if chosen and st.button(f"Cancel {len(chosen)} device(s)", key=f"{key}-cancel-button"):
+                request_cancel(job["events"], chosen)
+                st.toast(f"Asked the lab to give up on {', '.join(chosen)}")
+    with slow_devices:
+        st.dataframe(progress.slowest_devices())
+    with slow_calls:
+        st.dataframe(progress.slowest_calls())
+    with commands:
+        st.dataframe(progress.command_stats())
+    return progress
+
+
+def cli_value(args: List[str], flag: str) -> Optional[str]:
+    value = None
+    for index, arg in enumerate(args[:-1]):
+        if arg == flag:
+            value = args[index + 1]
+    return value
+
+
+def retry_devices(job: Dict[str, Any], progress: RunProgress) -> List[str]:
+    # Failed devices and stragglers are named in the events; devices a cancelled
+    # or timed-out run never started are not, so those come from the inventory
+    names = progress.failed_devices() + progress.unfinished_devices()
+    csv_path = cli_value(job["args"], "--csv-path")
+    if progress.counts()["pending"] and csv_path:
+        seen = set(names) | set(progress.ok_devices())
+        try:
+            devices = only_devices(load_inventory(Path(csv_path)), cli_value(job["args"], "--only-devices"))
+            names += [d.name for d in devices if d.name not in seen]
+        except Exception:
+            pass
+    return names
+
+
+def retry_args(args: List[str], names: List[str]) -> List[str]:
+    kept: List[str] = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg == "--only-devices":
+            skip = True
+        else:
+            kept.append(arg)
+    return kept + ["--only-devices", ",".join(names)]
+
+
+def file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    # (mtime, size) cache key: a changed file gets a new key, so cached results are refreshed
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 
 def script_description(path: Path) -> str:
+    return _script_description(str(path), file_stamp(path))
+
+
+@st.cache_data(show_spinner=False)
+def _script_description(path_str: str, stamp: Optional[Tuple[int, int]]) -> str:
+    path = Path(path_str)
     try:
         src = path.read_text(encoding="utf-8")
         module = ast.parse(src)
@@ -51,6 +223,12 @@ def script_description(path: Path) -> str:
 
 
 def load_config(path: Path) -> Optional[Dict[str, Any]]:
+    return _load_config(str(path), file_stamp(path))
+
+
+@st.cache_data(show_spinner=False)
+def _load_config(path_str: str, stamp: Optional[Tuple[int, int]]) -> Optional[Dict[str, Any]]:
+    path = Path(path_str)
     if not path.exists():
         return None
     try:
@@ -67,35 +245,11 @@ config = load_config(CONFIG_PATH)
 
 
 def load_device_names_from_csv(csv_path: Path) -> List[str]:
-    names: List[str] = []
-    if not csv_path.exists():
-        return names
+    # Parsed once per file version and indexed by tools/inventory_utils
     try:
-        import csv  # local import to avoid unused global if not used
-
-        with csv_path.open(newline="", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            if reader.fieldnames:
-                for row in reader:
-                    hostname = (row.get("hostname") or "").strip()
-                    ip = (row.get("ip") or row.get("device_ips") or "").strip()
-                    label = hostname or ip
-                    if label:
-                        names.append(label)
-            if not names:
-                f.seek(0)
-                reader2 = csv.reader(f)
-                for idx, row in enumerate(reader2):
-                    if not row:
-                        continue
-                    val = row[0].strip()
-                    if idx == 0 and val.lower() in ("hostname", "device_ips", "ip"):
-                        continue
-                    if val:
-                        names.append(val)
+        return load_inventory(csv_path).names()
     except Exception:
-        pass
-    return names
+        return []
 
 
 def resolve_script_path(file_field: str) -> Optional[Path]:
@@ -118,6 +272,43 @@ def resolve_script_path(file_field: str) -> Optional[Path]:
         return p if p.exists() else None
 
 
+def load_scripts_catalog(config: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Keyed on the config file and the jobs folder, so adding/removing a script refreshes it
+    return _load_scripts_catalog(config, file_stamp(CONFIG_PATH), file_stamp(JOBS_DIR))
+
+
+@st.cache_data(show_spinner=False)
+def _load_scripts_catalog(
+    _config: Optional[Dict[str, Any]],
+    config_stamp: Optional[Tuple[int, int]],
+    jobs_stamp: Optional[Tuple[int, int]],
+) -> List[Dict[str, Any]]:
+    scripts_catalog: List[Dict[str, Any]] = []
+
+    if _config and isinstance(_config.get("scripts"), list):
+        for s in _config.get("scripts", []):
+            # ensure we can resolve the file
+            file_field = s.get("file")
+            path = resolve_script_path(file_field) if file_field else None
+            s_copy = dict(s)
+            s_copy["_path"] = str(path) if path else None
+            scripts_catalog.append(s_copy)
+
+    # If config is missing or empty, fall back to scanning jobs directory
+    if not scripts_catalog:
+        py_files = sorted([p for p in JOBS_DIR.glob("*.py")])
+        for p in py_files:
+            scripts_catalog.append({
+                "id": p.stem,
+                "name": p.name,
+                "file": str(p.relative_to(ROOT)),
+                "description": script_description(p),
+                "_path": str(p),
+                "inputs": [],
+            })
+    return scripts_catalog
+
+
 def build_cli_args_from_inputs(inputs: List[Dict[str, Any]], values: Dict[str, Any]) -> List[str]:
     args: List[str] = []
     for inp in inputs:
@@ -163,30 +354,16 @@ def build_cli_args_from_inputs(inputs: List[Dict[str, Any]], values: Dict[str, A
 
 st.title("Python Network Orchestrator")
 
+job_manager = get_job_manager()
+job_timeout = st.sidebar.number_input("Job timeout (seconds, 0 = none)", min_value=0, value=300, step=60)
+reuse_sessions = st.sidebar.checkbox(
+    "Reuse SSH sessions between runs",
+    value=False,
+    help="Starts a local session broker that keeps device logins warm; labs borrow sessions from it instead of logging in again.",
+)
 
-scripts_catalog: List[Dict[str, Any]] = []
 
-if config and isinstance(config.get("scripts"), list):
-    for s in config.get("scripts", []):
-        # ensure we can resolve the file
-        file_field = s.get("file")
-        path = resolve_script_path(file_field) if file_field else None
-        s_copy = dict(s)
-        s_copy["_path"] = str(path) if path else None
-        scripts_catalog.append(s_copy)
-
-# If config is missing or empty, fall back to scanning jobs directory
-if not scripts_catalog:
-    py_files = sorted([p for p in JOBS_DIR.glob("*.py")])
-    for p in py_files:
-        scripts_catalog.append({
-            "id": p.stem,
-            "name": p.name,
-            "file": str(p.relative_to(ROOT)),
-            "description": script_description(p),
-            "_path": str(p),
-            "inputs": [],
-        })
+scripts_catalog = load_scripts_catalog(config)
 
 if not scripts_catalog:
     st.warning("No scripts found. Add `.py` files to the `jobs/` folder or define them in `config/config.json`.")
@@ -275,22 +452,84 @@ if scripts_catalog:
             if args_from_inputs:
                 cmd += args_from_inputs
 
-            st.subheader("Execution")
-            st.write("Running:", " ".join(cmd))
-            try:
-                proc = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-                st.markdown(f"**Return code:** {proc.returncode}")
-                st.subheader("Stdout")
-                st.text(proc.stdout)
-                st.subheader("Stderr")
-                st.text(proc.stderr)
-            except subprocess.TimeoutExpired:
-                st.error("Script timed out (300s)")
-            except Exception as e:
-                st.error(f"Error running script: {e}")
+            run_env = session_broker_env() if reuse_sessions else {}
+            job_id = job_manager.submit(
+                script_path,
+                args_from_inputs,
+                env=run_env,
+                label=script.get("name") or script_path.name,
+                timeout=job_timeout or None,
+            )
+            st.session_state["job_id"] = job_id
+            st.session_state["job_cmd"] = " ".join(cmd)
+
+all_jobs = job_manager.list_jobs()
+if all_jobs:
+    st.subheader("Execution")
+    job_ids = [j["id"] for j in all_jobs]
+    current_id = st.session_state.get("job_id")
+    selected_job_id = st.selectbox(
+        "Job",
+        job_ids,
+        index=job_ids.index(current_id) if current_id in job_ids else 0,
+        format_func=lambda jid: next(f"{j['label']} [{jid}] - {j['status']}" for j in all_jobs if j["id"] == jid),
+    )
+    job = job_manager.get(selected_job_id)
+    if selected_job_id == current_id and st.session_state.get("job_cmd"):
+        st.write("Running:", st.session_state["job_cmd"])
+    st.markdown(f"**Status:** {job['status']}")
+    if job["status"] in ("queued", "running"):
+        if st.button("Cancel job"):
+            job_manager.cancel(job["id"])
+            st.rerun()
+    if job["returncode"] is not None:
+        st.markdown(f"**Return code:** {job['returncode']}")
+    if job["status"] == "timeout":
+        st.error(f"Script timed out ({job['timeout']:g}s)")
+    progress = render_progress(job)
+    if progress is not None:
+        # While the job runs only its failed (or cancelled) devices are done with
+        active = job["status"] in ACTIVE_STATES
+        retry = progress.failed_devices() if active else retry_devices(job, progress)
+        label = "failed" if active else "failed/unfinished"
+        if retry and st.button(f"Retry {len(retry):,} {label} device(s)"):
+            args = retry_args(job["args"], retry)
+            retry_id = job_manager.submit(
+                Path(job["script"]),
+                args,
+                env=job["env"],
+                label=f"{job['label']} (retry)",
+                timeout=job["timeout"],
+            )
+            st.session_state["job_id"] = retry_id
+            st.session_state["job_cmd"] = " ".join([sys.executable, job["script"]] + args)
+            st.rerun()
+    st.subheader("Stdout")
+    render_log(job, "stdout")
+    st.subheader("Stderr")
+    render_log(job, "stderr")
+
+    with st.expander("All jobs"):
+        st.dataframe(
+            [
+                {
+                    "id": j["id"],
+                    "script": j["label"],
+                    "status": j["status"],
+                    "return code": j["returncode"],
+                    "submitted": time.strftime("%H:%M:%S", time.localtime(j["submitted"])),
+                }
+                for j in all_jobs
+            ],
+        )
 
 st.sidebar.title("About")
 if config:
     st.sidebar.info("UI driven by `config/config.json`. Edit it to control displayed scripts and inputs.")
 else:
     st.sidebar.info("No config found; app is showing scripts discovered in the `jobs/` folder.")
+
+# Poll while the displayed job is queued or running, instead of blocking on it
+if all_jobs and job["status"] in ACTIVE_STATES:
+    time.sleep(POLL_SECONDS)
+    st.rerun()
@@ -0,0 +1,147 @@
+"""
+Benchmark: threaded Netmiko vs the asyncssh driver (Jobs/tools/async_utils.py).
+- Starts --devices fake IOS routers (benchmarks/fake_ios.py) and collects the
+  same show commands from all of them, --concurrency sessions at a time
+- "netmiko-threads": run_devices() + Netmiko ConnectHandler, one thread per session
+- "asyncssh-facade": run_devices() + AsyncConnectHandler (what --driver asyncssh
+  gives the labs): worker threads only wait, the SSH work runs on one event loop
+- "asyncssh-native": collect(), every session a coroutine on one event loop
+- Each method runs in a fresh process; reports devices/sec, errors, peak threads
+  and peak RSS of that process (the fake devices live in this one). The fake
+  devices share the CPU with the client, so use --repeat on small machines
+- Example: python benchmarks/bench_async_driver.py --devices 500 --concurrency 500 --login-delay 100
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(ROOT / "Jobs"))
+
+from fake_ios import add_fleet_args, fleet_from_args  # noqa: E402
+
+METHODS = ("netmiko-threads", "asyncssh-facade", "asyncssh-native")
+COMMANDS = ["show version", "show ip interface brief"]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak RSS of this process. On Linux ru_maxrss survives fork+exec, so a child of
+    the (large) process running the fake devices would report the parent's peak;
+    VmHWM belongs to this process image alone.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def watch_threads(peak: dict, stop: threading.Event) -> None:
+    while not stop.wait(0.05):
+        peak["threads"] = max(peak["threads"], threading.active_count())
+
+
+def settle(baseline: int, limit: float = 60.0) -> None:
+    """Wait for the fake devices to finish tearing down the last method's sessions."""
+    deadline = time.monotonic() + limit
+    while threading.active_count() > baseline and time.monotonic() < deadline:
+        time.sleep(0.2)
+
+
+def child(method: str, csv_path: str, concurrency: int) -> None:
+    from tools.inventory_utils import load_inventory
+
+    devices = load_inventory(Path(csv_path))
+    peak = {"threads": threading.active_count()}
+    stop = threading.Event()
+    threading.Thread(target=watch_threads, args=(peak, stop), daemon=True).start()
+    start = time.perf_counter()
+    if method == "asyncssh-native":
+        from tools.async_utils import run_collect
+
+        results = run_collect(devices, COMMANDS, "bench", "bench", concurrency=concurrency)
+    else:
+        from tools.connect_utils import open_connection, set_driver
+        from tools.runner_utils import run_devices
+
+        set_driver("netmiko" if method == "netmiko-threads" else "asyncssh")
+
+        def collect_one(device):
+            conn = {"device_type": device.device_type, "host": device.ip, "port": device.port,
+                    "username": "bench", "password": "bench"}
+            with open_connection(conn) as net_connect:
+                return [(cmd, net_connect.send_command(cmd)) for cmd in COMMANDS]
+
+        results = list(run_devices(devices, collect_one, workers=concurrency, timeout=0))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    print(json.dumps({
+        "seconds": elapsed,
+        "errors": sum(1 for r in results if not r["ok"]),
+        "first_error": next((r["error"] for r in results if not r["ok"]), None),
+        "threads": peak["threads"],
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def run_method(method: str, csv_path: Path, args, baseline: int) -> dict:
+    settle(baseline)
+    run = subprocess.run(
+        [sys.executable, __file__, "--child", method, "--csv", str(csv_path), "--concurrency", str(args.concurrency)],
+        capture_output=True, text=True, check=True, cwd=str(ROOT),
+    )
+    return json.loads(run.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark threaded Netmiko against the asyncssh driver")
+    add_fleet_args(parser)
+    parser.set_defaults(devices=200)
+    parser.add_argument("--concurrency", type=int, default=200, help="Sessions open at the same time (workers / semaphore)")
+    parser.add_argument("--methods", default=",".join(METHODS), help=f"Methods to run: {','.join(METHODS)}")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per method (the median run is reported)")
+    parser.add_argument("--child", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.csv, args.concurrency)
+        return
+
+    methods = [name.strip() for name in args.methods.split(",") if name.strip()]
+    unknown = [name for name in methods if name not in METHODS]
+    if unknown:
+        parser.error(f"unknown method(s): {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp, fleet_from_args(args, Path(tmp) / "devices.csv") as fleet:
+        print(
+            f"{args.devices} fake device(s), {len(COMMANDS)} command(s) each, concurrency {args.concurrency}, "
+            f"login {args.login_delay:g} ms, {args.command_latency:g} ms per command"
+        )
+        baseline = threading.active_count()
+        print(f"{'method':<16} {'seconds':>8} {'dev/s':>7} {'errors':>6} {'threads':>7} {'peak RSS':>9}")
+        for method in methods:
+            runs = sorted((run_method(method, fleet.csv_path, args, baseline) for _ in range(max(1, args.repeat))), key=lambda r: r["seconds"])
+            result = runs[len(runs) // 2]
+            print(
+                f"{method:<16} {result['seconds']:8.2f} {args.devices / result['seconds']:7.1f} {result['errors']:6d}"
+                f" {result['threads']:7d} {result['peak_rss_mb']:7.1f}MB"
+            )
+            if result["first_error"]:
+                print(f"  first error: {result['first_error'].strip().splitlines()[0]}")
+
+
+if __name__ == "__main__":
+    main()
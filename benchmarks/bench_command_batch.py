@@ -0,0 +1,144 @@
+"""
+Benchmark: one send_command() per command vs. run_command_batch() over the same session.
+- Real devices: --csv-path/--username/--password (same CSV and commands JSON as the labs)
+- No lab handy: --simulate-rtt MS runs both against an in-process fake device whose
+  every exchange costs one network round trip plus a per-command service time
+- Prints per-command timings and the total for each method, averaged over --repeat runs
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Jobs"))
+
+from tools.command_utils import run_command_batch, run_command_loop  # noqa: E402
+
+DEFAULT_COMMANDS_JSON = ROOT / "data" / "show-commands.json"
+
+
+class SimulatedDevice:
+    """Just enough of a Netmiko connection for both runners, with artificial latency."""
+
+    def __init__(self, rtt: float, service: float, output_lines: int, prompt: str = "R1#"):
+        self.rtt = rtt
+        self.service = service
+        self.prompt = prompt
+        self.output_lines = output_lines
+        self._ready: List[tuple] = []  # (time the device's answer arrives, text)
+        self._busy_until = 0.0
+
+    def _output(self, cmd: str) -> str:
+        return "\n".join(f"{cmd} line {n}" for n in range(self.output_lines))
+
+    def find_prompt(self) -> str:
+        time.sleep(self.rtt)
+        return self.prompt
+
+    def send_command(self, cmd: str, read_timeout: float = 10.0) -> str:
+        time.sleep(self.rtt + self.service)
+        return self._output(cmd)
+
+    def write_channel(self, data: str) -> None:
+        # Commands arrive after half a round trip and are served one after another
+        now = time.perf_counter()
+        for cmd in data.splitlines():
+            start = max(now + self.rtt / 2, self._busy_until)
+            self._busy_until = start + self.service
+            answer = f"{cmd}\r\n{self._output(cmd)}\r\n{self.prompt}"
+            self._ready.append((self._busy_until + self.rtt / 2, answer))
+
+    def read_channel(self) -> str:
+        now = time.perf_counter()
+        out = [text for at, text in self._ready if at <= now]
+        self._ready = [(at, text) for at, text in self._ready if at > now]
+        return "".join(out)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def load_commands(commands_path: Path) -> List[str]:
+    data = json.loads(commands_path.read_text(encoding="utf-8"))
+    return [v for v in data.get("commands", {}).values() if isinstance(v, str)]
+
+
+def time_method(conn, method, commands: List[str], repeat: int) -> Dict[str, float]:
+    totals = []
+    per_command: Dict[str, List[float]] = {cmd: [] for cmd in commands}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = method(conn, commands)
+        totals.append(time.perf_counter() - start)
+        for cmd, result in results.items():
+            per_command[cmd].append(result["elapsed"])
+    summary = {cmd: statistics.mean(values) for cmd, values in per_command.items() if values}
+    summary["TOTAL"] = statistics.mean(totals)
+    return summary
+
+
+def report(name: str, loop: Dict[str, float], batch: Dict[str, float]) -> None:
+    print(f"\n===== {name} =====")
+    width = max(len(k) for k in loop)
+    print(f"{'command'.ljust(width)}  {'loop (s)':>9}  {'batch (s)':>9}")
+    for cmd in loop:
+        print(f"{cmd.ljust(width)}  {loop[cmd]:9.3f}  {batch.get(cmd, float('nan')):9.3f}")
+    print(f"Speed-up: {loop['TOTAL'] / batch['TOTAL']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-command send_command() with batched command execution")
+    parser.add_argument("--csv-path", help="Device CSV (real devices)")
+    parser.add_argument("--username", help="Device username")
+    parser.add_argument("--password", help="Device password")
+    parser.add_argument("--commands-json", default=str(DEFAULT_COMMANDS_JSON), help="Path to JSON with command definitions")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method (results are averaged)")
+    parser.add_argument("--simulate-rtt", type=float, help="Use a simulated device with this round-trip time in ms")
+    parser.add_argument("--simulate-service", type=float, default=20.0, help="Simulated per-command device time in ms")
+    parser.add_argument("--simulate-lines", type=int, default=50, help="Simulated output lines per command")
+    args = parser.parse_args()
+
+    commands = load_commands(Path(args.commands_json))
+    repeat = max(1, args.repeat)
+
+    if args.simulate_rtt is not None:
+        device = SimulatedDevice(args.simulate_rtt / 1000, args.simulate_service / 1000, args.simulate_lines)
+        loop = time_method(device, run_command_loop, commands, repeat)
+        batch = time_method(device, run_command_batch, commands, repeat)
+        report(f"simulated device, rtt {args.simulate_rtt:g} ms", loop, batch)
+        return
+
+    if not (args.csv_path and args.username and args.password):
+        parser.error("give --csv-path, --username and --password, or --simulate-rtt")
+
+    from tools.connect_utils import open_connection
+    from tools.inventory_utils import read_inventory
+
+    for device in read_inventory(Path(args.csv_path)):
+        conn = {
+            "device_type": device.device_type,
+            "host": device.ip,
+            "port": device.port,
+            "username": args.username,
+            "password": args.password,
+        }
+        try:
+            with open_connection(conn) as net_connect:
+                loop = time_method(net_connect, run_command_loop, commands, repeat)
+                batch = time_method(net_connect, run_command_batch, commands, repeat)
+        except Exception as exc:
+            print(f"Error on {device.name} ({device.ip}): {exc}")
+            continue
+        report(f"{device.name} ({device.ip})", loop, batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark: Lab 2/4/5/6 workloads against local fake IOS devices (benchmarks/fake_ios.py).
+- Starts --devices fake SSH routers, writes their CSV, and runs each selected lab
+  script unchanged (all show commands, --workers as given) in its own process
+- Reports devices/sec, p50/p99 login and per-command latency (timed around
+  open_connection(), send_command() of either driver and the --batch-commands
+  runner, also inside --processes workers) and the peak RSS of the lab's main process
+- Extra lab flags go in --lab-args, e.g. --lab-args="--batch-commands --parse"
+- Example: python benchmarks/bench_labs.py --devices 50 --workers 20 --command-latency 30
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import runpy
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+JOBS = ROOT / "Jobs"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_ios import add_fleet_args, fleet_from_args  # noqa: E402
+
+WORKLOADS = {
+    "lab2": "Lab-2-Netmiko-Connection.py",
+    "lab4": "Lab-4-Single-Loop.py",
+    "lab5": "Lab-5-Nested-For-Loops.py",
+    "lab6": "Lab-6-Error-Handling.py",
+}
+SHOW_FLAGS = [
+    "--show-interface-brief", "--show-route", "--show-version",
+    "--show-eigrp-interfaces", "--show-eigrp-neighbors", "--show-eigrp-topology",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak RSS of this process. On Linux ru_maxrss survives fork+exec, so a child of
+    the (large) process running the fake devices would report the parent's peak;
+    VmHWM belongs to this process image alone.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def child(args) -> None:
+    """Run one lab in this process with timing hooks, then write the stats as JSON."""
+    sys.path.insert(0, str(JOBS))
+    from netmiko.base_connection import BaseConnection
+
+    import tools.async_utils as async_utils
+    import tools.command_utils as command_utils
+    import tools.connect_utils as connect_utils
+
+    logins: List[float] = []
+    commands: List[float] = []
+    # Timings go through a pipe so worker processes forked by --processes report too
+    samples = multiprocessing.SimpleQueue()
+    connect = connect_utils.open_connection
+    run_command_batch = command_utils.run_command_batch
+
+    def gather() -> None:
+        while True:
+            kind, seconds = samples.get()
+            if kind is None:
+                return
+            (logins if kind == "login" else commands).append(seconds)
+
+    def timed(send_command):
+        def timed_send_command(self, *a, **kw):
+            start = time.perf_counter()
+            try:
+                return send_command(self, *a, **kw)
+            finally:
+                samples.put(("command", time.perf_counter() - start))
+        return timed_send_command
+
+    def timed_connect(conn):
+        start = time.perf_counter()
+        try:
+            return connect(conn)
+        finally:
+            samples.put(("login", time.perf_counter() - start))
+
+    def timed_batch(*a, **kw):
+        results = run_command_batch(*a, **kw)
+        for r in results.values():
+            samples.put(("command", r["elapsed"]))
+        return results
+
+    gatherer = threading.Thread(target=gather, daemon=True)
+    gatherer.start()
+
+    BaseConnection.send_command = timed(BaseConnection.send_command)
+    async_utils.AsyncConnectHandler.send_command = timed(async_utils.AsyncConnectHandler.send_command)
+    connect_utils.open_connection = timed_connect
+    command_utils.run_command_batch = timed_batch
+
+    sys.argv = [WORKLOADS[args.child], "--username", "bench", "--password", "bench", "--csv-path", args.csv,
+                "--workers", str(args.workers), *SHOW_FLAGS, *shlex.split(args.lab_args)]
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        runpy.run_path(str(JOBS / WORKLOADS[args.child]), run_name="__main__")
+    elapsed = time.perf_counter() - start
+    samples.put((None, 0.0))
+    gatherer.join()
+    stats = {
+        "seconds": elapsed,
+        "errors": output.getvalue().count("Error on "),
+        "logins": logins,
+        "commands": commands,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    Path(args.result_file).write_text(json.dumps(stats), encoding="utf-8")
+
+
+def run_workload(name: str, csv_path: Path, args) -> Dict[str, Any]:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_file = f.name
+    try:
+        subprocess.run(
+            [sys.executable, __file__, "--child", name, "--csv", str(csv_path), "--result-file", result_file,
+             "--workers", str(args.workers), f"--lab-args={args.lab_args}"],
+            check=True, cwd=str(ROOT),
+        )
+        return json.loads(Path(result_file).read_text(encoding="utf-8"))
+    finally:
+        os.unlink(result_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lab runners against local fake IOS devices")
+    add_fleet_args(parser)
+    parser.add_argument("--labs", default="lab2,lab4,lab5,lab6", help=f"Workloads to run: {','.join(WORKLOADS)}")
+    parser.add_argument("--workers", type=int, default=10, help="--workers passed to every lab")
+    parser.add_argument("--lab-args", default="", help="Extra flags for every lab, e.g. --lab-args=\"--batch-commands\"")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per lab (the median run is reported)")
+    parser.add_argument("--child", choices=sorted(WORKLOADS), help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    labs = [name.strip() for name in args.labs.split(",") if name.strip()]
+    unknown = [name for name in labs if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown lab(s): {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp, fleet_from_args(args, Path(tmp) / "devices.csv") as fleet:
+        print(
+            f"{args.devices} fake device(s), login {args.login_delay:g} ms, {args.command_latency:g} ms and "
+            f"{args.output_lines} line(s) per command, --workers {args.workers} {args.lab_args}".rstrip()
+        )
+        print(f"{'lab':<6} {'seconds':>8} {'dev/s':>7} {'login p50':>10} {'cmd p50':>8} {'cmd p99':>8} {'errors':>6} {'peak RSS':>9}")
+        for name in labs:
+            runs = sorted((run_workload(name, fleet.csv_path, args) for _ in range(max(1, args.repeat))), key=lambda r: r["seconds"])
+            run = runs[len(runs) // 2]
+            ms = [c * 1000 for c in run["commands"]]
+            login_ms = statistics.median(run["logins"]) * 1000 if run["logins"] else float("nan")
+            print(
+                f"{name:<6} {run['seconds']:8.2f} {args.devices / run['seconds']:7.1f} {login_ms:8.0f}ms"
+                f" {percentile(ms, 50):6.0f}ms {percentile(ms, 99):6.0f}ms {run['errors']:6d} {run['peak_rss_mb']:7.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: building NETCONF description edits for many interfaces.
+- "f-string+parse": the old script's way, an f-string per change re-parsed with to_ele()
+- "compiled": DescriptionPayload.element() from tools/netconf_utils.py (skeleton built once)
+- "streamed": DescriptionPayload.write(), serialized one interface at a time
+- "streamed rpc": the whole <rpc><edit-config> as StreamedEditConfig sends it to
+  a device, streamed into one buffer (the string ncclient's session is handed)
+- Every method builds and serializes the same --interfaces changes, each in a fresh
+  process so the reported peak RSS belongs to that method alone
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "python_ansible_lvt-main"))
+
+METHODS = ("f-string+parse", "compiled", "streamed", "streamed rpc")
+
+
+def changes(count):
+    return {f"GigabitEthernet1/0/{n}": f"uplink {n} <bench> & co" for n in range(count)}
+
+
+def build(method, descriptions, out):
+    from lxml import etree
+    from ncclient.xml_ import to_ele, to_xml
+    from xml.sax.saxutils import escape
+
+    import io
+
+    from tools.netconf_utils import IETF_INTERFACES_NS, NC_NS, PAYLOAD
+
+    if method == "f-string+parse":
+        for name, description in descriptions.items():
+            rpc = (
+                f'<config xmlns="{NC_NS}"><interfaces xmlns="{IETF_INTERFACES_NS}"><interface>'
+                f"<name>{escape(name)}</name><description>{escape(description)}</description>"
+                "</interface></interfaces></config>"
+            )
+            out.write(to_xml(to_ele(rpc)).encode("utf-8"))
+    elif method == "compiled":
+        out.write(etree.tostring(PAYLOAD.element(descriptions)))
+    elif method == "streamed":
+        PAYLOAD.write(descriptions, out)
+    else:
+        buffer = io.BytesIO()
+        PAYLOAD.write_edit_config(descriptions, buffer, "urn:uuid:bench")
+        out.write(buffer.getvalue().decode("utf-8").encode("utf-8"))
+
+
+def child(method, count):
+    descriptions = changes(count)
+    with open("/dev/null", "wb") as out:
+        start = time.perf_counter()
+        build(method, descriptions, out)
+        elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NETCONF description payload builders")
+    parser.add_argument("--interfaces", type=int, default=100000, help="Interface changes to build")
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.method:
+        child(args.method, args.interfaces)
+        return
+
+    print(f"{args.interfaces} interface change(s)")
+    baseline = None
+    for method in METHODS:
+        run = subprocess.run(
+            [sys.executable, __file__, "--method", method, "--interfaces", str(args.interfaces)],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(run.stdout)
+        baseline = baseline or result["seconds"]
+        print(
+            f"{method:<15} {result['seconds']:8.3f} s  {args.interfaces / result['seconds']:10.0f} changes/s"
+            f"  peak RSS {result['peak_rss_kb'] / 1024:7.1f} MB  {baseline / result['seconds']:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
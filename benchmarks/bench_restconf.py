@@ -0,0 +1,176 @@
+"""
+Benchmark: add_description_using_restconf.py before and after tools/restconf_utils.py.
+- Starts --devices local HTTPS RESTCONF stand-ins (self-signed, one port each) that
+  accept PATCHes to ietf-interfaces, keep connections alive, and add --rtt MS per
+  request plus --handshake-rtts round trips per new connection (TCP + TLS set-up)
+- "per-request": requests.patch() per interface per device, one device after another
+- "pooled": one keep-alive session per device, devices in parallel, one PATCH per interface
+- "pooled+bulk": as pooled, but every device's interfaces go in one PATCH
+- Checks that every stand-in ends up with the expected descriptions
+"""
+
+import argparse
+import datetime
+import json
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts" / "python_ansible_lvt-main"))
+
+from tools.restconf_utils import HEADERS, INTERFACES_PATH, RestconfPool, fan_out, interface_payload, patch_descriptions  # noqa: E402
+
+
+def self_signed_cert(directory: Path):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "restconf-standin")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class StandinDevice:
+    """One RESTCONF stand-in: HTTPS on 127.0.0.1, interface descriptions kept in memory."""
+
+    def __init__(self, context: ssl.SSLContext, rtt: float, handshake_rtts: int):
+        self.descriptions = {}
+        self.requests = 0
+        self.connections = 0
+        device = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                device.connections += 1
+                time.sleep(rtt * handshake_rtts)
+                super().setup()
+
+            def log_message(self, *args):
+                pass
+
+            def do_PATCH(self):
+                time.sleep(rtt)
+                device.requests += 1
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == INTERFACES_PATH:
+                    entries = body.get("ietf-interfaces:interfaces", {}).get("interface", [])
+                elif self.path.startswith(INTERFACES_PATH + "/interface="):
+                    entries = [body.get("ietf-interfaces:interface", {})]
+                else:
+                    entries = None
+                if not entries or not all(entry.get("name") for entry in entries):
+                    self.send_response(400)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                for entry in entries:
+                    device.descriptions[entry["name"]] = entry.get("description")
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def device(self):
+        return {"host": "127.0.0.1", "port": self.port, "username": "admin", "password": "admin"}
+
+    def reset(self):
+        self.descriptions.clear()
+        self.requests = self.connections = 0
+
+
+def per_request(devices, descriptions, timeout):
+    """The original script: requests.patch() per interface, device after device."""
+    for device in devices:
+        for name, description in descriptions.items():
+            payload = {"ietf-interfaces:interface": interface_payload({name: description})["ietf-interfaces:interfaces"]["interface"][0]}
+            requests.patch(
+                f"https://{device['host']}:{device['port']}{INTERFACES_PATH}/interface={name}",
+                headers=HEADERS,
+                auth=(device["username"], device["password"]),
+                data=json.dumps(payload),
+                verify=False,
+                timeout=timeout,
+            ).raise_for_status()
+
+
+def pooled(devices, descriptions, timeout, concurrency, bulk):
+    with RestconfPool(timeout=timeout) as pool:
+        if bulk:
+            tasks = lambda device: [patch_descriptions(pool, device, descriptions)]  # noqa: E731
+        else:
+            tasks = lambda device: [patch_descriptions(pool, device, {n: d}) for n, d in descriptions.items()]  # noqa: E731
+        failed = [r for results in fan_out(devices, tasks, concurrency) for r in results if not r["ok"]]
+    if failed:
+        raise RuntimeError(f"{len(failed)} PATCH(es) failed, e.g. {failed[0]['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RESTCONF description push against local HTTPS stand-ins")
+    parser.add_argument("--devices", type=int, default=20, help="Stand-in devices to start")
+    parser.add_argument("--interfaces", type=int, default=4, help="Interfaces to describe per device")
+    parser.add_argument("--rtt", type=float, default=20.0, help="Simulated round trip per request, in ms")
+    parser.add_argument("--handshake-rtts", type=int, default=3, help="Extra round trips per new connection (TCP + TLS)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Devices at a time for the pooled runs")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*self_signed_cert(Path(tmp)))
+        standins = [StandinDevice(context, args.rtt / 1000, args.handshake_rtts) for _ in range(args.devices)]
+    devices = [s.device() for s in standins]
+    descriptions = {f"GigabitEthernet{n}": f"bench {n}" for n in range(1, args.interfaces + 1)}
+
+    methods = [
+        ("per-request", lambda: per_request(devices, descriptions, 5.0)),
+        ("pooled", lambda: pooled(devices, descriptions, 5.0, args.concurrency, bulk=False)),
+        ("pooled+bulk", lambda: pooled(devices, descriptions, 5.0, args.concurrency, bulk=True)),
+    ]
+    print(f"{args.devices} device(s) x {args.interfaces} interface(s), rtt {args.rtt:g} ms, {args.handshake_rtts} handshake rtt(s)")
+    baseline = None
+    for label, run in methods:
+        times = []
+        for _ in range(args.repeat):
+            for s in standins:
+                s.reset()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+            assert all(s.descriptions == descriptions for s in standins), f"{label}: wrong descriptions on a stand-in"
+        best = statistics.median(times)
+        baseline = baseline or best
+        reqs = sum(s.requests for s in standins)
+        conns = sum(s.connections for s in standins)
+        print(f"{label:<12} {best:8.3f} s  {reqs:5d} request(s)  {conns:4d} connection(s)  {baseline / best:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Local fake Cisco IOS SSH devices for benchmarking the labs without routers.
+- Each FakeIOSDevice is a paramiko SSH server on 127.0.0.1 with its own port,
+  hostname and "R1#"-style prompt; Netmiko's cisco_ios driver logs in as usual
+- --login-delay is added to every login, --command-latency to every command,
+  and every show command returns --output-lines lines (per command: --profile JSON
+  of {"show ip route": {"lines": 5000, "latency_ms": 200}, ...})
+- FakeIOSFleet starts N of them and writes a lab CSV (hostname,ip,device_type,port)
+- Stand-alone: python benchmarks/fake_ios.py --devices 20 --csv runs/fake-devices.csv
+  then run any lab with --csv-path runs/fake-devices.csv (any username/password)
+"""
+
+import argparse
+import csv
+import json
+import logging
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import paramiko
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_COMMANDS_JSON = ROOT / "data" / "show-commands.json"
+DEFAULT_LOGIN_DELAY = 0.2
+DEFAULT_COMMAND_LATENCY = 0.02
+DEFAULT_OUTPUT_LINES = 40
+SILENT_COMMANDS = ("terminal ", "configure terminal", "end", "write", "no ", "router ", "network ", "interface ", "description ")
+
+# Clients that drop the TCP connection without a clean SSH disconnect are not news here
+logging.getLogger("paramiko.transport").setLevel(logging.CRITICAL)
+
+_host_key: Optional[paramiko.RSAKey] = None
+_host_key_lock = threading.Lock()
+
+
+def host_key() -> paramiko.RSAKey:
+    """One RSA host key per process; generating it is the slow part of starting a device."""
+    global _host_key
+    with _host_key_lock:
+        if _host_key is None:
+            _host_key = paramiko.RSAKey.generate(2048)
+        return _host_key
+
+
+def load_profile(commands_json: Path, lines: int, latency: float, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, float]]:
+    """{command: {"lines", "latency"}} for every command in the labs' commands JSON, plus overrides."""
+    try:
+        commands = json.loads(Path(commands_json).read_text(encoding="utf-8")).get("commands", {}).values()
+    except (OSError, ValueError):
+        commands = []
+    profile = {cmd: {"lines": lines, "latency": latency} for cmd in commands}
+    for cmd, spec in (overrides or {}).items():
+        profile[cmd] = {
+            "lines": int(spec.get("lines", lines)),
+            "latency": float(spec.get("latency_ms", latency * 1000)) / 1000,
+        }
+    return profile
+
+
+def fake_output(hostname: str, command: str, lines: int) -> str:
+    if command.startswith("show version"):
+        head = ["Cisco IOS XE Software, Version 17.09.04a", f"{hostname} uptime is 1 week, 2 days, 3 hours, 4 minutes"]
+    else:
+        head = [f"{hostname} {command}"]
+    body = [f"GigabitEthernet{n // 4}/0/{n % 4:<6} 10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256:<5} YES NVRAM  up  up" for n in range(max(0, lines - len(head)))]
+    return "\r\n".join(head + body)
+
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self, device: "FakeIOSDevice"):
+        self.device = device
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        time.sleep(self.device.login_delay)
+        return paramiko.AUTH_SUCCESSFUL
+
+    def get_allowed_auths(self, username: str) -> str:
+        return "password"
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args) -> bool:
+        return True
+
+    def check_channel_shell_request(self, channel) -> bool:
+        return True
+
+
+class FakeIOSDevice:
+    """One fake IOS router listening on 127.0.0.1:<port> until close()."""
+
+    def __init__(
+        self,
+        hostname: str,
+        profile: Dict[str, Dict[str, float]],
+        login_delay: float = DEFAULT_LOGIN_DELAY,
+        default_lines: int = DEFAULT_OUTPUT_LINES,
+        default_latency: float = DEFAULT_COMMAND_LATENCY,
+        port: int = 0,
+    ):
+        self.hostname = hostname
+        self.profile = profile
+        self.login_delay = login_delay
+        self.default_lines = default_lines
+        self.default_latency = default_latency
+        self.logins = 0
+        self.commands = 0
+        self._outputs: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", port))
+        self._sock.listen(1024)
+        self.port = self._sock.getsockname()[1]
+        self._closed = False
+        threading.Thread(target=self._accept, name=f"fake-ios-{hostname}", daemon=True).start()
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client: socket.socket) -> None:
+        transport = paramiko.Transport(client)
+        transport.add_server_key(host_key())
+        # Under a login storm the fleet gets slow; make clients wait instead of dropping them
+        transport.banner_timeout = transport.handshake_timeout = transport.auth_timeout = 300
+        try:
+            transport.start_server(server=_Server(self))
+            channel = transport.accept(30)
+            if channel is None:
+                return
+            self._count("logins")
+            self._shell(channel)
+        except (EOFError, OSError, paramiko.SSHException):
+            pass
+        finally:
+            transport.close()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _answer(self, command: str) -> str:
+        spec = self.profile.get(command)
+        lines = int(spec["lines"]) if spec else self.default_lines
+        time.sleep(spec["latency"] if spec else self.default_latency)
+        key = f"{command}\0{lines}"
+        if key not in self._outputs:
+            self._outputs[key] = fake_output(self.hostname, command, lines)
+        return self._outputs[key]
+
+    def _shell(self, channel: paramiko.Channel) -> None:
+        mode = ""
+        channel.sendall(f"\r\n{self.hostname}#")
+        pending = ""
+        after_cr = False
+        while not channel.closed:
+            data = channel.recv(65536)
+            if not data:
+                return
+            text = data.decode("utf-8", "replace")
+            # Lines may end in \r, \n or \r\n, and a \r\n may be split across reads
+            if after_cr and text.startswith("\n"):
+                text = text[1:]
+            after_cr = text.endswith("\r")
+            pending += text.replace("\r\n", "\n").replace("\r", "\n")
+            while "\n" in pending:
+                line, pending = pending.split("\n", 1)
+                command = line.strip()
+                reply = ""
+                if command in ("exit", "logout", "quit") and not mode:
+                    channel.sendall(f"{line}\r\n")
+                    channel.close()
+                    return
+                if command == "configure terminal":
+                    mode = "(config)"
+                elif command in ("end", "exit") and mode:
+                    mode = "" if command == "end" or mode == "(config)" else "(config)"
+                elif mode and command.startswith(("interface ", "router ", "line ")):
+                    mode = "(config-if)" if command.startswith("interface ") else "(config-router)"
+                elif command and not mode and not command.startswith(SILENT_COMMANDS):
+                    self._count("commands")
+                    reply = self._answer(command) + "\r\n"
+                channel.sendall(f"{line}\r\n{reply}{self.hostname}{mode}#")
+
+    def close(self) -> None:
+        self._closed = True
+        self._sock.close()
+
+
+class FakeIOSFleet:
+    """N fake devices plus a CSV the labs can read; use as a context manager."""
+
+    def __init__(self, count: int, csv_path: Path, profile: Dict[str, Dict[str, float]], **options: Any):
+        host_key()
+        self.devices: List[FakeIOSDevice] = [
+            FakeIOSDevice(f"FAKE-R{n + 1}", profile, **options) for n in range(count)
+        ]
+        self.csv_path = Path(csv_path)
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.csv_path.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["hostname", "ip", "device_type", "port"])
+            for device in self.devices:
+                writer.writerow([device.hostname, "127.0.0.1", "cisco_ios", device.port])
+
+    @property
+    def logins(self) -> int:
+        return sum(d.logins for d in self.devices)
+
+    @property
+    def commands(self) -> int:
+        return sum(d.commands for d in self.devices)
+
+    def close(self) -> None:
+        for device in self.devices:
+            device.close()
+
+    def __enter__(self) -> "FakeIOSFleet":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def add_fleet_args(parser) -> None:
+    parser.add_argument("--devices", type=int, default=20, help="Fake devices to start")
+    parser.add_argument("--login-delay", type=float, default=DEFAULT_LOGIN_DELAY * 1000, help="Extra delay per SSH login, in ms")
+    parser.add_argument("--command-latency", type=float, default=DEFAULT_COMMAND_LATENCY * 1000, help="Delay before every command's output, in ms")
+    parser.add_argument("--output-lines", type=int, default=DEFAULT_OUTPUT_LINES, help="Lines of output per show command")
+    parser.add_argument("--profile", help='JSON file with per-command overrides: {"show ip route": {"lines": 5000, "latency_ms": 200}}')
+    parser.add_argument("--commands-json", default=str(DEFAULT_COMMANDS_JSON), help="Commands JSON the labs use (one profile entry per command)")
+
+
+def fleet_from_args(args, csv_path: Path) -> FakeIOSFleet:
+    overrides = json.loads(Path(args.profile).read_text(encoding="utf-8")) if args.profile else None
+    latency = args.command_latency / 1000
+    profile = load_profile(Path(args.commands_json), args.output_lines, latency, overrides)
+    return FakeIOSFleet(
+        args.devices,
+        csv_path,
+        profile,
+        login_delay=args.login_delay / 1000,
+        default_lines=args.output_lines,
+        default_latency=latency,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fake Cisco IOS SSH devices on 127.0.0.1")
+    add_fleet_args(parser)
+    parser.add_argument("--csv", default=str(ROOT / "runs" / "fake-devices.csv"), help="Where to write the devices CSV for the labs")
+    args = parser.parse_args()
+    with fleet_from_args(args, Path(args.csv)) as fleet:
+        print(f"{len(fleet.devices)} fake device(s) listening; devices CSV: {args.csv}. Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,9 @@
 # Import Modules
 # ======================================================================
 
-from ncclient import manager
-from ncclient.xml_ import to_ele
+import argparse
+
+from tools.netconf_utils import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, PAYLOAD, push_descriptions, rpc_summary
 
 # ======================================================================
 # Variables
@@ -13,47 +14,38 @@ DEVICES = [
     {"host": "10.0.0.51",   "port": 830, "username": "admin", "password": "C1sc0123!"},
     {"host": "10.0.0.52",  "port": 830, "username": "admin", "password": "C1sc0123!"},
 ]
-IF_NAME = "GigabitEthernet1"
-DESC_TEXT = "Configured via NetConf Ncclient"
+# Every interface listed here goes into one <edit-config> and one <commit> per device
+INTERFACES = {
+    "GigabitEthernet1": "Configured via NetConf Ncclient",
+}
 # =========================
 
-COMMON_OPTS = {
-    "hostkey_verify": False,
-    "look_for_keys": False,
-    "allow_agent": False,
-}
+parser = argparse.ArgumentParser(description="Set interface descriptions on the devices over NETCONF")
+parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Devices to update at the same time")
+parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for the session and each RPC")
+parser.add_argument("--save-config", help="Only write the <config> payload to this file (no devices are contacted)")
+args = parser.parse_args()
 
-NC_NS = "{urn:ietf:params:xml:ns:netconf:base:1.0}"
-
-EDIT_RPC = f"""
-<rpc xmlns="urn:ietf:params:xml:ns:netconf:base:1.0" message-id="101">
-  <edit-config>
-    <target><candidate/></target>
-    <config>
-      <interfaces xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
-        <interface>
-          <name>{IF_NAME}</name>
-          <description>{DESC_TEXT}</description>
-        </interface>
-      </interfaces>
-    </config>
-  </edit-config>
-</rpc>
-"""
-
-COMMIT_RPC = """
-<rpc xmlns="urn:ietf:params:xml:ns:netconf:base:1.0" message-id="102">
-  <commit/>
-</rpc>
-"""
+if args.save_config:
+    PAYLOAD.write(INTERFACES, args.save_config)
+    print(f"Wrote the <config> for {len(INTERFACES)} interface(s) to {args.save_config}")
+    raise SystemExit(0)
 
 # ======================================================================
-# Build the For Loop
+# Push to every device in parallel
 # ======================================================================
 
+print(f"\nPushing descriptions to {', '.join(INTERFACES)} on {len(DEVICES)} device(s) ...")
 
-for device in DEVICES:
-    try:
+results = push_descriptions(DEVICES, INTERFACES, concurrency=args.concurrency, timeout=args.timeout)
 
-    except Exception as e:
+for result in results:
+    rpcs = ", ".join(f"{name} {ms:.0f} ms" for name, ms in result["rpc_ms"])
+    if result["ok"]:
+        print(f"✅ Successfully updated description on {result['host']} ({rpcs})")
+    else:
+        print(f"❌ Failed on {result['host']}: {result['error']} ({rpcs})")
 
+print("\nRPC latency:")
+for name, stats in rpc_summary(results).items():
+    print(f"  {name:<16} {stats['count']:>4} call(s)  avg {stats['avg_ms']:.0f} ms  max {stats['max_ms']:.0f} ms")
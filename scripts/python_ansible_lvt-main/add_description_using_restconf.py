@@ -1,8 +1,6 @@
-import requests
-import json
-import urllib3
+import argparse
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from tools.restconf_utils import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, push_descriptions
 
 devices = [
     {
@@ -19,49 +17,29 @@ devices = [
     }
 ]
 
-interface_name = "GigabitEthernet1"
-interface_description = "Configured via RESTCONF"
-
-headers = {
-    "Content-Type": "application/yang-data+json",
-    "Accept": "application/yang-data+json"
-}
-
-payload = {
-    "ietf-interfaces:interface": {
-        "name": interface_name,
-        "description": interface_description,
-        "type": "iana-if-type:ethernetCsmacd",
-        "enabled": True
-    }
+# Every interface listed here is updated in one PATCH per device
+interface_descriptions = {
+    "GigabitEthernet1": "Configured via RESTCONF",
 }
 
-for device in devices:
-    url = (
-        f"https://{device['host']}:{device['port']}"
-        f"/restconf/data/ietf-interfaces:interfaces/interface={interface_name}"
-    )
-
-    print(f"\nPushing description to {interface_name} on {device['host']} ...")
-
-    try:
-        response = requests.patch(
-            url,
-            headers=headers,
-            auth=(device["username"], device["password"]),
-            data=json.dumps(payload),
-            verify=False,
-            timeout=5,   # <-- explicit timeout in seconds
-        )
-    except requests.exceptions.ConnectTimeout:
-        print(f"❌ Could not reach {device['host']} on port {device['port']} (connect timeout)")
-        continue
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Request error talking to {device['host']}: {e}")
-        continue
-
-    if response.status_code in [200, 201, 204]:
-        print(f"✅ Successfully updated description on {device['host']}")
+parser = argparse.ArgumentParser(description="Set interface descriptions on the devices over RESTCONF")
+parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Devices to update at the same time")
+parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each request")
+args = parser.parse_args()
+
+interfaces = ", ".join(interface_descriptions)
+print(f"\nPushing descriptions to {interfaces} on {len(devices)} device(s) ...")
+
+results = push_descriptions(
+    devices,
+    interface_descriptions,
+    concurrency=args.concurrency,
+    timeout=args.timeout,
+    enabled=True,
+)
+
+for result in results:
+    if result["ok"]:
+        print(f"✅ Successfully updated description on {result['host']} ({result['elapsed_ms']:.0f} ms)")
     else:
-        print(f"❌ Failed on {device['host']} (status {response.status_code})")
-        print(f"Response: {response.text}")
+        print(f"❌ Failed on {result['host']} ({result['error']})")
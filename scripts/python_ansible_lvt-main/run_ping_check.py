@@ -1,11 +1,24 @@
-from tools.check_reachability_utils import run_ping_check
+import argparse
+
+from tools.check_reachability_utils import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, MANAGEMENT_PORTS, expand_targets, run_ping_check
 from tools.inventory_utils import load_devices_from_yaml
 
-devices = load_devices_from_yaml()
+parser = argparse.ArgumentParser(description="Check reachability of the devices in devices.yaml")
+parser.add_argument("--targets", nargs="+", metavar="IP_OR_CIDR", help="Check these IPs and/or CIDR blocks (e.g. 10.0.0.0/22) instead of devices.yaml")
+parser.add_argument("--method", choices=("icmp", "tcp"), default="icmp", help="Ping, or TCP connect to --port")
+parser.add_argument("--port", type=int, default=22, help=f"TCP port for --method tcp (e.g. {', '.join(map(str, MANAGEMENT_PORTS))})")
+parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Probes to run at the same time")
+parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to wait for each probe")
+args = parser.parse_args()
+
+if args.targets:
+    ips = expand_targets(args.targets)
+else:
+    devices = load_devices_from_yaml()
 
-ips = []
+    ips = []
 
-for device in devices:
-    ips.append(device['ip'])
+    for device in devices:
+        ips.append(device['ip'])
 
-run_ping_check(ips)
\ No newline at end of file
+run_ping_check(ips, method=args.method, port=args.port, concurrency=args.concurrency, timeout=args.timeout)
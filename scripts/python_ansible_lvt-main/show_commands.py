@@ -1,6 +1,6 @@
-show_commands.pyimport os
 import yaml
 from netmiko import ConnectHandler
+from tools.check_reachability_utils import sweep
 
 
 # ----------------------------------------
@@ -13,21 +13,16 @@ def load_devices(filename="devices.yaml"):
 
 
 # ----------------------------------------
-# Ping a single IP
+# Ping all devices in parallel
 # ----------------------------------------
-def ping_device(ip):
-    response = os.system(f"ping -c 1 {ip} > /dev/null 2>&1")
-    return response == 0
-
-
-# Ping all devices
 def check_reachability(devices):
-    for dev in devices:
-        ip = dev["ip"]
-        if ping_device(ip):
-            print(f"{ip} is reachable.")
+    results = sweep([dev["ip"] for dev in devices])
+    for result in results:
+        if result["reachable"]:
+            print(f"{result['ip']} is reachable.")
         else:
-            print(f"{ip} is NOT reachable.")
+            print(f"{result['ip']} is NOT reachable.")
+    return results
 
 
 # ----------------------------------------
@@ -59,7 +54,7 @@ def connect_and_run_commands(device, commands):
 # ----------------------------------------
 # Main workflow
 # ----------------------------------------
-if name == "main":
+if __name__ == "__main__":
     devices = load_devices()
 
     print("=== Reachability Check ===")
@@ -1,27 +1,115 @@
-import os
+import ipaddress
 import platform
+import re
+import socket
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tools.inventory_utils import load_devices_from_yaml
 
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 2.0
+MANAGEMENT_PORTS = (22, 830, 443)
+# "time=0.045 ms" (Linux/macOS), "time=12ms" / "time<1ms" (Windows)
+PING_TIME = re.compile(r"time[=<]\s*([\d.]+)\s*ms", re.IGNORECASE)
 
-def run_ping_check(ips):
+
+def expand_targets(targets):
+    """
+    Turn a list of IPs and/or CIDR blocks ("10.0.0.0/22") into a flat list of IPs.
+    """
+    ips = []
+    for target in targets:
+        target = str(target).strip()
+        if "/" in target:
+            network = ipaddress.ip_network(target, strict=False)
+            hosts = list(network.hosts()) or [network.network_address]
+            ips.extend(str(ip) for ip in hosts)
+        elif target:
+            ips.append(target)
+    return ips
+
+
+def ping_probe(ip, timeout=DEFAULT_TIMEOUT):
     """
-    Ping each IP once. Uses platform-appropriate flags to avoid false negatives on Windows.
+    One ICMP echo via the system ping binary.
+    Returns {"ip", "method", "port", "reachable", "rtt_ms", "error"}.
+    rtt_ms is the round trip ping itself reports (its "time=" value), not the
+    time taken to start and run the ping process; None if ping printed none.
     """
     is_windows = platform.system().lower().startswith("win")
     count_flag = "-n" if is_windows else "-c"
-    # Quiet output; redirect handled by subprocess pipes
-    for ip in ips:
-        try:
-            result = subprocess.run(
-                ["ping", count_flag, "1", ip],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                timeout=5,
-            )
-            if result.returncode == 0:
-                print(f"{ip} is reachable")
-            else:
-                print(f"{ip} is NOT reachable")
-        except Exception as exc:
-            print(f"{ip} is NOT reachable (error: {exc})")
+    rtt = None
+    try:
+        result = subprocess.run(
+            ["ping", count_flag, "1", ip],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            timeout=timeout,
+        )
+        reachable = result.returncode == 0
+        error = None if reachable else f"ping exit code {result.returncode}"
+        match = PING_TIME.search(result.stdout or "")
+        if reachable and match:
+            rtt = float(match.group(1))
+    except subprocess.TimeoutExpired:
+        reachable, error = False, f"timed out after {timeout:g}s"
+    except Exception as exc:
+        reachable, error = False, str(exc)
+    return {"ip": ip, "method": "icmp", "port": None, "reachable": reachable, "rtt_ms": rtt, "error": error}
+
+
+def tcp_probe(ip, port=22, timeout=DEFAULT_TIMEOUT):
+    """
+    TCP connect to ip:port (no ping binary or raw sockets needed).
+    Reachable means the port accepted the connection; a refused port is reported as an error.
+    """
+    start = time.perf_counter()
+    try:
+        with socket.create_connection((ip, port), timeout=timeout):
+            rtt = (time.perf_counter() - start) * 1000
+        return {"ip": ip, "method": "tcp", "port": port, "reachable": True, "rtt_ms": rtt, "error": None}
+    except socket.timeout:
+        error = f"timed out after {timeout:g}s"
+    except ConnectionRefusedError:
+        error = "connection refused"
+    except OSError as exc:
+        error = exc.strerror or str(exc)
+    return {"ip": ip, "method": "tcp", "port": port, "reachable": False, "rtt_ms": None, "error": error}
+
+
+def sweep(ips, method="icmp", port=22, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """
+    Probe many IPs in parallel (at most `concurrency` at once).
+    method is "icmp" (ping binary) or "tcp" (connect to `port`, e.g. 22/830/443).
+    Returns one result dict per IP, in the same order as `ips`.
+    """
+    ips = list(ips)
+    if not ips:
+        return []
+    if method == "tcp":
+        probe = lambda ip: tcp_probe(ip, port, timeout)  # noqa: E731
+    elif method == "icmp":
+        probe = lambda ip: ping_probe(ip, timeout)  # noqa: E731
+    else:
+        raise ValueError(f"Unknown probe method {method!r}; use 'icmp' or 'tcp'")
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(ips)))) as pool:
+        return list(pool.map(probe, ips))
+
+
+def run_ping_check(ips, method="icmp", port=22, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """
+    Check each IP once, in parallel, and print the outcome.
+    Uses platform-appropriate ping flags to avoid false negatives on Windows.
+    Returns the structured results from sweep().
+    """
+    results = sweep(ips, method=method, port=port, concurrency=concurrency, timeout=timeout)
+    for result in results:
+        if result["reachable"] and result["rtt_ms"] is not None:
+            print(f"{result['ip']} is reachable ({result['rtt_ms']:.1f} ms)")
+        elif result["reachable"]:
+            print(f"{result['ip']} is reachable")
+        else:
+            print(f"{result['ip']} is NOT reachable ({result['error']})")
+    return results
@@ -0,0 +1,280 @@
+import copy
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from lxml import etree
+from ncclient import manager
+from ncclient.operations import EditConfig, RPCError
+
+DEFAULT_PORT = 830
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 30
+COMMON_OPTS = {
+    "hostkey_verify": False,
+    "look_for_keys": False,
+    "allow_agent": False,
+}
+NC_NS = "urn:ietf:params:xml:ns:netconf:base:1.0"
+IETF_INTERFACES_NS = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+IF_NS = f"{{{IETF_INTERFACES_NS}}}"
+CANDIDATE_CAPABILITY = "urn:ietf:params:netconf:capability:candidate:1.0"
+
+
+class DescriptionPayload:
+    """
+    The ietf-interfaces description edit, built as an lxml tree once. Each change
+    only copies the small <interface> skeleton and fills in its name/description
+    leaves; nothing is formatted as a string or parsed again.
+    """
+
+    def __init__(self):
+        self._config = etree.Element(f"{{{NC_NS}}}config", nsmap={None: NC_NS})
+        etree.SubElement(self._config, IF_NS + "interfaces", nsmap={None: IETF_INTERFACES_NS})
+        self._interface = etree.Element(IF_NS + "interface", nsmap={None: IETF_INTERFACES_NS})
+        etree.SubElement(self._interface, IF_NS + "name")
+        etree.SubElement(self._interface, IF_NS + "description")
+        self._stream_interface = etree.Element("interface")
+        etree.SubElement(self._stream_interface, "name")
+        etree.SubElement(self._stream_interface, "description")
+
+    def element(self, descriptions):
+        """<config> element for {name: description}, ready for edit_config()."""
+        config = copy.deepcopy(self._config)
+        interfaces = config[0]
+        for name, description in descriptions.items():
+            interface = copy.deepcopy(self._interface)
+            interface[0].text = name
+            interface[1].text = description
+            interfaces.append(interface)
+        return config
+
+    def write(self, descriptions, out):
+        """
+        Serialize the same <config> to `out` (a path or binary file) one interface
+        at a time, so memory stays flat however many interfaces there are.
+        """
+        with etree.xmlfile(out, encoding="utf-8") as xf:
+            self._write_config(xf, descriptions)
+
+    def write_edit_config(self, descriptions, out, message_id, target="candidate"):
+        """
+        The whole <rpc><edit-config> for `descriptions`, streamed like write():
+        what StreamedEditConfig sends, without building the tree.
+        """
+        with etree.xmlfile(out, encoding="utf-8") as xf:
+            xf.write_declaration()
+            with xf.element(f"{{{NC_NS}}}rpc", {"message-id": message_id}, nsmap={None: NC_NS}):
+                with xf.element(f"{{{NC_NS}}}edit-config"):
+                    with xf.element(f"{{{NC_NS}}}target"):
+                        with xf.element(f"{{{NC_NS}}}{target}"):
+                            pass
+                    self._write_config(xf, descriptions)
+
+    def _write_config(self, xf, descriptions):
+        # One <interface> whose leaves are refilled per change. Its tags carry no
+        # namespace of their own, so written inside the default-namespace
+        # <interfaces> they serialize as ietf-interfaces without repeating xmlns.
+        interface = copy.deepcopy(self._stream_interface)
+        name, description = interface
+        with xf.element(f"{{{NC_NS}}}config", nsmap={None: NC_NS}):
+            with xf.element(IF_NS + "interfaces", nsmap={None: IETF_INTERFACES_NS}):
+                for name.text, description.text in descriptions.items():
+                    xf.write(interface)
+
+
+PAYLOAD = DescriptionPayload()
+
+
+class StreamedEditConfig(EditConfig):
+    """
+    ncclient's edit-config with the <rpc> written by PAYLOAD.write_edit_config()
+    into one buffer and handed to the session as it is: no lxml tree of the
+    interfaces is built (ncclient's own request() appends the <config> to one and
+    serializes that). Replies are handled by ncclient as usual. The device
+    handler's transform_edit_config() is skipped; it only patches a <config>
+    without a namespace, and this one always has the NETCONF base namespace.
+    """
+
+    def request(self, descriptions, target="candidate"):
+        self._descriptions = descriptions
+        self._target = target
+        return self._request(None)
+
+    def _wrap(self, subele):
+        out = io.BytesIO()
+        PAYLOAD.write_edit_config(self._descriptions, out, self._id, self._target)
+        return out.getvalue().decode("utf-8")
+
+
+class NetconfSession:
+    """
+    One NETCONF session to one device, opened on first use and kept until close().
+    Every RPC's latency is recorded in `timings` as (rpc name, ms).
+    """
+
+    def __init__(self, device, timeout=DEFAULT_TIMEOUT):
+        self.device = device
+        self.timeout = timeout
+        self.timings = []
+        self._manager = None
+
+    def _timed(self, name, call, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.timings.append((name, (time.perf_counter() - start) * 1000))
+
+    @property
+    def manager(self):
+        if self._manager is None or not self._manager.connected:
+            self._manager = self._timed(
+                "connect",
+                manager.connect,
+                host=self.device["host"],
+                port=self.device.get("port", DEFAULT_PORT),
+                username=self.device["username"],
+                password=self.device["password"],
+                timeout=self.timeout,
+                **COMMON_OPTS,
+            )
+        return self._manager
+
+    def supports_candidate(self):
+        return CANDIDATE_CAPABILITY in self.manager.server_capabilities
+
+    def edit(self, config):
+        """
+        Apply one <config> (string or lxml element) in a single transaction: lock,
+        edit-config and commit on the candidate datastore (discarded again on
+        failure), or a plain edit-config on running when the device has no
+        candidate datastore.
+        """
+        return self._transaction(lambda target: self.manager.edit_config(target=target, config=config))
+
+    def _transaction(self, edit_config):
+        # edit_config(target) sends the edit-config RPC to that datastore
+        m = self.manager
+        if not self.supports_candidate():
+            return self._timed("edit-config", edit_config, "running")
+        self._timed("lock", m.lock, target="candidate")
+        try:
+            reply = self._timed("edit-config", edit_config, "candidate")
+            self._timed("commit", m.commit)
+        except Exception:
+            # Leave nothing half-edited in the candidate (a dead session drops its lock anyway)
+            try:
+                self._timed("discard-changes", m.discard_changes)
+                self._timed("unlock", m.unlock, target="candidate")
+            except Exception:
+                pass
+            raise
+        self._timed("unlock", m.unlock, target="candidate")
+        return reply
+
+    def set_descriptions(self, descriptions):
+        """Like edit(), with the edit-config streamed by StreamedEditConfig (no tree in memory)."""
+        return self._transaction(lambda target: self.manager.execute(StreamedEditConfig, descriptions, target=target))
+
+    def close(self):
+        if self._manager is not None and self._manager.connected:
+            self._timed("close-session", self._manager.close_session)
+        self._manager = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NetconfPool:
+    """NetconfSession per device (host, port, username), reused by every batch in this process."""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def session(self, device):
+        key = (device["host"], device.get("port", DEFAULT_PORT), device["username"])
+        with self._lock:
+            if key not in self._sessions:
+                self._sessions[key] = NetconfSession(device, self.timeout)
+            return self._sessions[key]
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def set_descriptions(pool, device, descriptions):
+    """
+    All of `descriptions` ({interface: description}) on one device in one
+    edit-config and one commit.
+    Returns {"host", "ok", "interfaces", "elapsed_ms", "rpc_ms", "error"}; rpc_ms is
+    the (rpc name, ms) list for this call.
+    """
+    session = pool.session(device)
+    first = len(session.timings)
+    start = time.perf_counter()
+    error = None
+    try:
+        session.set_descriptions(descriptions)
+    except RPCError as exc:
+        error = f"rpc-error: {exc.message or exc}"
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    elapsed = (time.perf_counter() - start) * 1000
+    return {
+        "host": device["host"],
+        "ok": error is None,
+        "interfaces": list(descriptions),
+        "elapsed_ms": elapsed,
+        "rpc_ms": session.timings[first:],
+        "error": error,
+    }
+
+
+def push_descriptions(devices, descriptions, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, pool=None):
+    """
+    Set the same {interface: description} map on every device, up to `concurrency`
+    devices at a time. Returns set_descriptions() results in device order.
+    """
+    devices = list(devices)
+    if not devices:
+        return []
+    owned = pool is None
+    pool = pool or NetconfPool(timeout=timeout)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(devices)))) as executor:
+            return list(executor.map(lambda device: set_descriptions(pool, device, descriptions), devices))
+    finally:
+        if owned:
+            pool.close()
+
+
+def rpc_summary(results):
+    """{rpc name: {"count", "avg_ms", "max_ms"}} over the rpc_ms of many results."""
+    by_rpc = {}
+    for result in results:
+        for name, ms in result["rpc_ms"]:
+            by_rpc.setdefault(name, []).append(ms)
+    return {
+        name: {"count": len(values), "avg_ms": sum(values) / len(values), "max_ms": max(values)}
+        for name, values in by_rpc.items()
+    }
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 5.0
+CONNECTIONS_PER_HOST = 4
+OK_STATUSES = (200, 201, 204)
+INTERFACES_PATH = "/restconf/data/ietf-interfaces:interfaces"
+HEADERS = {
+    "Content-Type": "application/yang-data+json",
+    "Accept": "application/yang-data+json",
+}
+
+
+class RestconfPool:
+    """
+    One keep-alive requests.Session per device (host, port, username), reused by
+    every request to that device, so TCP and TLS are set up once per host.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, verify=False, connections_per_host=CONNECTIONS_PER_HOST):
+        self.timeout = timeout
+        self.verify = verify
+        self.connections_per_host = connections_per_host
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def session(self, device):
+        key = (device["host"], device.get("port", 443), device["username"])
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.auth = (device["username"], device["password"])
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.connections_per_host)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[key] = session
+            return session
+
+    def request(self, device, method, path, payload=None):
+        url = f"{base_url(device)}{path}"
+        data = json.dumps(payload) if payload is not None else None
+        # verify per request: requests lets REQUESTS_CA_BUNDLE override Session.verify
+        return self.session(device).request(method, url, data=data, timeout=self.timeout, verify=self.verify)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def base_url(device):
+    scheme = device.get("scheme", "https")
+    return f"{scheme}://{device['host']}:{device.get('port', 443)}"
+
+
+def interface_payload(descriptions, if_type="iana-if-type:ethernetCsmacd", enabled=None):
+    """
+    One ietf-interfaces body for several interfaces: {name: description, ...}.
+    `enabled` is only sent when given (True brings the interfaces up).
+    """
+    interfaces = []
+    for name, description in descriptions.items():
+        entry = {"name": name, "description": description, "type": if_type}
+        if enabled is not None:
+            entry["enabled"] = enabled
+        interfaces.append(entry)
+    return {"ietf-interfaces:interfaces": {"interface": interfaces}}
+
+
+def patch_descriptions(pool, device, descriptions, enabled=None):
+    """
+    Set the descriptions of several interfaces on one device with a single PATCH.
+    Returns {"host", "ok", "status", "elapsed_ms", "interfaces", "error"}.
+    """
+    start = time.perf_counter()
+    status, error = None, None
+    try:
+        response = pool.request(device, "PATCH", INTERFACES_PATH, interface_payload(descriptions, enabled=enabled))
+        status = response.status_code
+        if status not in OK_STATUSES:
+            error = f"status {status}: {response.text.strip()[:500]}"
+    except requests.exceptions.ConnectTimeout:
+        error = f"could not reach port {device.get('port', 443)} (connect timeout)"
+    except requests.exceptions.RequestException as exc:
+        error = f"request error: {exc}"
+    elapsed = (time.perf_counter() - start) * 1000
+    return {"host": device["host"], "ok": error is None, "status": status, "elapsed_ms": elapsed, "interfaces": list(descriptions), "error": error}
+
+
+def fan_out(devices, task, concurrency=DEFAULT_CONCURRENCY):
+    """Run task(device) for many devices in parallel; results come back in device order."""
+    devices = list(devices)
+    if not devices:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(devices)))) as pool:
+        return list(pool.map(task, devices))
+
+
+def push_descriptions(devices, descriptions, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, enabled=None, pool=None):
+    """
+    Patch the same {interface: description} map onto every device, one request per
+    device, up to `concurrency` devices at a time. Returns patch_descriptions() results.
+    """
+    owned = pool is None
+    pool = pool or RestconfPool(timeout=timeout)
+    try:
+        return fan_out(devices, lambda device: patch_descriptions(pool, device, descriptions, enabled), concurrency)
+    finally:
+        if owned:
+            pool.close()